@@ -0,0 +1,154 @@
+"""
+Admission Control and Load Shedding
+Past a certain concurrency every call slows down together. This middleware
+watches three load signals and, when any is over its limit, rejects new
+low-priority calls at once instead of letting them queue:
+
+- in-flight tool calls (MOSPI_ADMIT_MAX_INFLIGHT)
+- upstream waiters: fair-queue depth plus bulkhead queues (MOSPI_ADMIT_MAX_QUEUED)
+- p90 latency of upstream tool calls over the last WINDOW_SECONDS (MOSPI_ADMIT_TARGET_LATENCY)
+
+Load is the highest of the three ratios. At load >= 1 bulk calls are shed; at
+load >= MOSPI_ADMIT_SHED_DATA_AT data calls are shed too. Interactive calls
+(metadata, lookups; see mospi.scheduler) are always admitted. Rejections use
+the rate limiter's {"error", "reason": "overloaded", "retry_after", "retryable"}
+shape. A limit of 0 disables that signal.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Tuple
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+from observability.metrics import Counter, Gauge, registry
+
+from .bulkhead import bulkheads
+from .ratelimit import LOCAL_TOOLS, fair_queue_depth, retry_result
+from .scheduler import BULK, INTERACTIVE, current_class
+
+MAX_INFLIGHT = int(os.environ.get("MOSPI_ADMIT_MAX_INFLIGHT", "32"))
+MAX_QUEUED = int(os.environ.get("MOSPI_ADMIT_MAX_QUEUED", "32"))
+TARGET_LATENCY = float(os.environ.get("MOSPI_ADMIT_TARGET_LATENCY", "8"))
+SHED_DATA_AT = float(os.environ.get("MOSPI_ADMIT_SHED_DATA_AT", "1.5"))
+
+# Latency samples older than this no longer count, so the signal recovers once load drops
+WINDOW_SECONDS = 30.0
+MAX_SAMPLES = 512
+
+# retry_after never goes below this
+MIN_RETRY_AFTER = 1.0
+
+admission_load = registry.register(Gauge(
+    "mospi_admission_load", "Highest of in-flight, queued and latency load ratios; 1 means at limit."))
+admission_inflight = registry.register(Gauge(
+    "mospi_admission_inflight", "Tool calls admitted and not yet finished."))
+admission_shed = registry.register(Counter(
+    "mospi_admission_shed_total", "Tool calls shed by admission control, per priority class and signal.",
+    ("class", "signal")))
+
+
+class LatencyWindow:
+    """Recent (time, seconds) samples; percentile over those inside WINDOW_SECONDS."""
+
+    def __init__(self, window: float = WINDOW_SECONDS, max_samples: int = MAX_SAMPLES):
+        self.window = window
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), seconds))
+
+    def percentile(self, q: float = 0.9) -> float:
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            values = sorted(s for _, s in self._samples)
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def upstream_queued() -> float:
+    """Calls waiting in the fair queue plus upstream requests waiting in any bulkhead."""
+    return fair_queue_depth.value() + sum(s["queued"] for s in bulkheads.stats().values())
+
+
+class AdmissionController:
+    """Computes load from the three signals and decides per priority class."""
+
+    def __init__(
+        self,
+        max_inflight: int = MAX_INFLIGHT,
+        max_queued: int = MAX_QUEUED,
+        target_latency: float = TARGET_LATENCY,
+        shed_data_at: float = SHED_DATA_AT,
+        queued: Callable[[], float] = upstream_queued,
+    ):
+        self.max_inflight = max_inflight
+        self.max_queued = max_queued
+        self.target_latency = target_latency
+        self.shed_data_at = shed_data_at
+        self.queued = queued
+        self.inflight = 0
+        self.latency = LatencyWindow()
+
+    def load(self) -> Tuple[float, str]:
+        """(load ratio, name of the signal that set it)."""
+        signals = [("none", 0.0)]
+        if self.max_inflight > 0:
+            signals.append(("inflight", self.inflight / self.max_inflight))
+        if self.max_queued > 0:
+            signals.append(("queued", self.queued() / self.max_queued))
+        if self.target_latency > 0:
+            signals.append(("latency", self.latency.percentile() / self.target_latency))
+        signal, ratio = max(signals, key=lambda s: s[1])
+        admission_load.set(value=round(ratio, 3))
+        return ratio, signal
+
+    def admit(self, priority_class: str) -> Tuple[bool, str]:
+        """(admitted, signal); interactive calls are always admitted."""
+        if priority_class == INTERACTIVE:
+            return True, "none"
+        ratio, signal = self.load()
+        if ratio >= self.shed_data_at or (ratio >= 1 and priority_class == BULK):
+            return False, signal
+        return True, signal
+
+    def retry_after(self) -> float:
+        return max(MIN_RETRY_AFTER, self.latency.percentile(0.5))
+
+
+class AdmissionMiddleware(Middleware):
+    """Sheds low-priority tool calls while the server is overloaded."""
+
+    def __init__(self, controller: Optional[AdmissionController] = None):
+        super().__init__()
+        self.controller = controller or AdmissionController()
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool_name = getattr(context.message, 'name', 'unknown')
+        # Set by PriorityMiddleware, which runs first
+        priority_class = current_class()
+
+        admitted, signal = self.controller.admit(priority_class)
+        if not admitted:
+            admission_shed.inc(priority_class, signal)
+            wait = self.controller.retry_after()
+            return retry_result(tool_name, "overloaded", wait,
+                                f"Server is overloaded; {priority_class} requests are paused. Retry after {wait:.1f}s.")
+
+        self.controller.inflight += 1
+        admission_inflight.set(value=self.controller.inflight)
+        start = time.monotonic()
+        try:
+            return await call_next(context)
+        finally:
+            self.controller.inflight -= 1
+            admission_inflight.set(value=self.controller.inflight)
+            if tool_name not in LOCAL_TOOLS:
+                self.controller.latency.add(time.monotonic() - start)
@@ -0,0 +1,159 @@
+"""
+ASI Classification-Year Router
+Maps ASI data years to the NIC classification year they were published under,
+plans one getASIData request per era and stitches the results back together.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# (classification_year, first data year, last data year) — start year of the YYYY-YY financial year.
+# The latest era is open ended so newly published years keep routing to it.
+ASI_CLASSIFICATION_ERAS: List[Tuple[str, int, Optional[int]]] = [
+    ("1987", 1992, 1997),
+    ("1998", 1998, 2003),
+    ("2004", 2004, 2007),
+    ("2008", 2008, None),
+]
+
+_YEAR_RE = re.compile(r"(\d{4})")
+
+
+def financial_year(start: int) -> str:
+    """1995 -> '1995-96' (the YYYY-YY format getASIData expects)."""
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def parse_year(value: Any) -> Optional[int]:
+    """Start year of '1995-96', '1995' or 1995; None if no year is found."""
+    match = _YEAR_RE.search(str(value))
+    return int(match.group(1)) if match else None
+
+
+def classification_year_for(year: Any) -> Optional[str]:
+    """NIC classification year a data year was published under, or None if before 1992-93."""
+    start = parse_year(year)
+    if start is None:
+        return None
+    for classification_year, first, last in ASI_CLASSIFICATION_ERAS:
+        if start >= first and (last is None or start <= last):
+            return classification_year
+    return None
+
+
+def era_note() -> str:
+    """Human readable era mapping, e.g. "'1987' → 1992-93 to 1997-98 | ..."."""
+    parts = []
+    for classification_year, first, last in ASI_CLASSIFICATION_ERAS:
+        end = financial_year(last) if last is not None else "latest"
+        parts.append(f"'{classification_year}' → {financial_year(first)} to {end}")
+    return " | ".join(parts)
+
+
+def expand_years(years: str) -> List[str]:
+    """Split a comma-separated year filter, expanding ranges like '1995-96..2020-21'."""
+    values = []
+    for value in str(years).split(","):
+        value = value.strip()
+        if ".." in value:
+            first, last = (parse_year(v) for v in value.split("..", 1))
+            if first is not None and last is not None:
+                values.extend(financial_year(y) for y in range(first, last + 1))
+                continue
+        if value:
+            values.append(value)
+    return values
+
+
+def route_years(years: str) -> Tuple[Dict[str, List[str]], List[str]]:
+    """
+    Group a comma-separated year filter (ranges allowed) by classification year.
+
+    Returns ({classification_year: [data years]}, [years that fall outside every era]).
+    """
+    routed: Dict[str, List[str]] = {}
+    unroutable = []
+    for value in expand_years(years):
+        start = parse_year(value)
+        classification_year = classification_year_for(value)
+        if start is None or classification_year is None:
+            unroutable.append(value)
+            continue
+        year = financial_year(start)
+        if year not in routed.setdefault(classification_year, []):
+            routed[classification_year].append(year)
+    return routed, unroutable
+
+
+def plan_requests(filters: Dict[str, str]) -> Tuple[List[Dict[str, str]], List[str]]:
+    """
+    Split ASI filters with a multi-era year list into one request per classification year.
+
+    Returns (per-era filter dicts, unroutable years).
+    """
+    routed, unroutable = route_years(filters.get("year", ""))
+    plans = [
+        {**filters, "classification_year": classification_year, "year": ",".join(years)}
+        for classification_year, years in sorted(routed.items())
+    ]
+    return plans, unroutable
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _more_pages(plan: Dict[str, str], response: Dict[str, Any], fetched: int) -> Optional[Dict[str, int]]:
+    """{"total_records", "next_page"} when meta_data.totalRecords says the era has records past this page."""
+    meta = response.get("meta_data")
+    total = _int(meta.get("totalRecords")) if isinstance(meta, dict) else None
+    limit = _int(plan.get("limit"))
+    page = _int(plan.get("page")) or 1
+    if total is None or not limit or (page - 1) * limit + fetched >= total:
+        return None
+    return {"total_records": total, "next_page": page + 1}
+
+
+def merge_responses(plans: List[Dict[str, str]], responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Stitch per-era responses into one year-ordered series.
+
+    Each record is tagged with the classification_year it came from. Eras
+    whose totalRecords exceed the page that was fetched are listed under
+    truncated with the page to ask for next.
+    """
+    records, eras, errors, truncated = [], [], [], []
+    for plan, response in zip(plans, responses):
+        classification_year = plan["classification_year"]
+        era = {"classification_year": classification_year, "years": plan["year"].split(",")}
+        if not isinstance(response, dict) or "error" in response:
+            errors.append({**era, "error": (response or {}).get("error")})
+            continue
+        data = response.get("data")
+        if not isinstance(data, list):
+            era["msg"] = response.get("msg")
+            eras.append(era)
+            continue
+        era["records"] = len(data)
+        eras.append(era)
+        more = _more_pages(plan, response, len(data))
+        if more is not None:
+            truncated.append({**era, **more})
+        records.extend({**record, "_classification_year": classification_year} for record in data)
+
+    records.sort(key=lambda r: parse_year(r.get("year")) or 0)
+    result: Dict[str, Any] = {
+        "data": records,
+        "eras": eras,
+        "statusCode": bool(records) or not errors,
+    }
+    if errors:
+        result["errors"] = errors
+    if truncated:
+        result["truncated"] = truncated
+    if not records and not errors:
+        result["msg"] = "No Data Found"
+    return result
@@ -0,0 +1,214 @@
+"""
+Per-Dataset Bulkheads
+Each MoSPI dataset (the top-level DATASET_SWAGGER keys: PLFS, CPI, IIP, ASI,
+NAS, WPI, ENERGY) gets its own pool of upstream request slots and its own
+wait queue, so a slow getASIData or getWpiRecords can only tie up its own
+pool while CPI and PLFS calls keep flowing. Sub-endpoints share their
+family's pool (CPI_GROUP and CPI_ITEM both use CPI), as do metadata calls.
+
+A request waits for a slot until its tool call's deadline; when the pool's
+queue is already full it is rejected at once with BulkheadFull. Freed slots
+go to the waiter with the best aged priority class (see mospi.scheduler),
+so metadata lookups overtake bulk data pulls without starving them.
+
+- MOSPI_BULKHEAD_LIMIT / MOSPI_BULKHEAD_QUEUE: default slots and queue depth per pool
+- MOSPI_BULKHEADS: per-pool overrides as POOL=limit:queue, e.g. "ASI=2:4,WPI=2:4,CPI=8:32"
+
+Per-pool active, queued, saturation, wait time and rejections, and wait time per
+priority class, are exported at /metrics.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from observability.metrics import Counter, Gauge, Histogram, registry
+
+from .deadline import current_deadline
+from .scheduler import current_class, effective_priority, rank
+
+DEFAULT_LIMIT = int(os.environ.get("MOSPI_BULKHEAD_LIMIT", "4"))
+DEFAULT_QUEUE = int(os.environ.get("MOSPI_BULKHEAD_QUEUE", "16"))
+
+# Pool used for paths outside /api/<dataset>/
+SHARED_POOL = "OTHER"
+
+# Waiters re-check their deadline (and cancellation) at least this often
+WAIT_SLICE = 0.25
+
+bulkhead_active = registry.register(Gauge(
+    "mospi_bulkhead_active", "Upstream requests holding a slot, per dataset pool.", ("pool",)))
+bulkhead_queued = registry.register(Gauge(
+    "mospi_bulkhead_queued", "Upstream requests waiting for a slot, per dataset pool.", ("pool",)))
+bulkhead_limit = registry.register(Gauge(
+    "mospi_bulkhead_limit", "Configured slots per dataset pool.", ("pool",)))
+bulkhead_saturation = registry.register(Gauge(
+    "mospi_bulkhead_saturation", "(active + queued) / limit per dataset pool; above 1 means waiting.", ("pool",)))
+bulkhead_wait = registry.register(Histogram(
+    "mospi_bulkhead_wait_seconds", "Time spent waiting for a dataset pool slot.", ("pool",)))
+bulkhead_rejected = registry.register(Counter(
+    "mospi_bulkhead_rejected_total", "Upstream requests rejected by a dataset pool.", ("pool", "reason")))
+priority_wait = registry.register(Histogram(
+    "mospi_priority_wait_seconds", "Time spent waiting for an upstream slot, per priority class.", ("class",)))
+
+
+class BulkheadFull(requests.RequestException):
+    """A dataset pool had no free slot (queue full, or none freed before the deadline)."""
+
+
+def parse_pools(value: str) -> Dict[str, Tuple[int, int]]:
+    """'ASI=2:4,WPI=2' -> {'ASI': (2, 4), 'WPI': (2, DEFAULT_QUEUE)}; malformed entries are ignored."""
+    pools = {}
+    for entry in value.split(","):
+        name, _, spec = entry.partition("=")
+        limit, _, queue = spec.partition(":")
+        try:
+            pools[name.strip().upper()] = (int(limit), int(queue) if queue else DEFAULT_QUEUE)
+        except ValueError:
+            continue
+    return pools
+
+
+class _Waiter:
+    __slots__ = ("rank", "enqueued", "granted")
+
+    def __init__(self, rank_value: int):
+        self.rank = rank_value
+        self.enqueued = time.monotonic()
+        self.granted = threading.Event()
+
+
+class Bulkhead:
+    """Counting semaphore with a bounded wait queue served in aged priority order."""
+
+    def __init__(self, name: str, limit: int = DEFAULT_LIMIT, max_queue: int = DEFAULT_QUEUE):
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.active = 0
+        self._waiters: List[_Waiter] = []
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one slot for the duration of the block."""
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        """Hand the slot to the best waiter, or free it."""
+        with self._lock:
+            if not self._waiters:
+                self.active -= 1
+                return
+            now = time.monotonic()
+            waiter = min(self._waiters, key=lambda w: effective_priority(w.rank, now - w.enqueued))
+            self._waiters.remove(waiter)
+            # The slot passes straight to the waiter; active is unchanged
+            waiter.granted.set()
+
+    def _acquire(self) -> None:
+        deadline = current_deadline()
+        priority_class = current_class()
+        with self._lock:
+            if self.active < self.limit:
+                self.active += 1
+                return
+            if len(self._waiters) >= self.max_queue:
+                bulkhead_rejected.inc(self.name, "queue_full")
+                raise BulkheadFull(f"Upstream pool for {self.name} is saturated; retry shortly")
+            waiter = _Waiter(rank(priority_class))
+            self._waiters.append(waiter)
+
+        try:
+            while True:
+                if deadline is not None:
+                    try:
+                        deadline.check()
+                    except requests.RequestException:
+                        with self._lock:
+                            granted = waiter not in self._waiters
+                            if not granted:
+                                self._waiters.remove(waiter)
+                        if granted:
+                            # Granted while timing out: pass the slot on
+                            self._release()
+                        bulkhead_rejected.inc(self.name, "deadline")
+                        raise
+                    timeout = min(WAIT_SLICE, max(deadline.remaining(), 0.0))
+                else:
+                    timeout = WAIT_SLICE
+                if waiter.granted.wait(timeout):
+                    return
+        finally:
+            waited = time.monotonic() - waiter.enqueued
+            bulkhead_wait.observe(waited, self.name)
+            priority_wait.observe(waited, priority_class)
+
+
+class BulkheadRegistry:
+    """Pools by dataset key, created on first use with the configured or default size."""
+
+    def __init__(self, pools: Optional[Dict[str, Tuple[int, int]]] = None):
+        self._config = pools or {}
+        self._pools: Dict[str, Bulkhead] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "BulkheadRegistry":
+        return cls(parse_pools(os.environ.get("MOSPI_BULKHEADS", "")))
+
+    @staticmethod
+    def pool_for(path: str) -> str:
+        """'/api/asi/getASIData' -> 'ASI'."""
+        parts = path.strip("/").split("/")
+        return parts[1].upper() if len(parts) > 2 and parts[0] == "api" else SHARED_POOL
+
+    def get(self, name: str) -> Bulkhead:
+        pool = self._pools.get(name)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(name)
+                if pool is None:
+                    limit, queue = self._config.get(name, (DEFAULT_LIMIT, DEFAULT_QUEUE))
+                    pool = self._pools[name] = Bulkhead(name, limit, queue)
+        return pool
+
+    def slot(self, path: str):
+        """Context manager holding a slot in the pool for an API path."""
+        return self.get(self.pool_for(path)).slot()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "active": pool.active,
+                "queued": pool.queued,
+                "limit": pool.limit,
+                "saturation": round((pool.active + pool.queued) / pool.limit, 3),
+            }
+            for name, pool in list(self._pools.items())
+        }
+
+
+def _collect_bulkheads() -> None:
+    for name, stats in bulkheads.stats().items():
+        bulkhead_active.set(name, value=stats["active"])
+        bulkhead_queued.set(name, value=stats["queued"])
+        bulkhead_limit.set(name, value=stats["limit"])
+        bulkhead_saturation.set(name, value=stats["saturation"])
+
+
+# Global instance
+bulkheads = BulkheadRegistry.from_env()
+registry.add_collector(_collect_bulkheads)
@@ -0,0 +1,168 @@
+"""
+Tool Result Cache
+FastMCP middleware that caches whole tool results keyed by tool name and
+canonicalized arguments, so a repeated call skips the tool body, the MoSPI
+request and the swagger work.
+
+- keys are built from canonicalized arguments (mospi.canonical), so aliases,
+  list order and default-valued params do not split entries
+- TTLs are per tool (TOOL_TTLS, overridable with MOSPI_RESULT_CACHE_TTLS);
+  tools without a TTL are never cached
+- error results ({"error": ...}, including rate-limit rejections) are not cached,
+  nor are partial results that report failed sub-requests in "errors"
+  (get_wpi_subtree, get_long_series, the ASI era merge)
+- entries are evicted least-recently-used first to stay within a global
+  memory budget (MOSPI_RESULT_CACHE_BYTES)
+- the tool span gets cache.hit; hit ratios are exported at /metrics
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from opentelemetry import trace
+
+from observability.config import parse_tool_values
+from observability.metrics import Gauge, record_cache, registry, response_size
+from observability.sampling import is_error_result
+
+from .canonical import record_canonical_hit, request_keys
+
+# Seconds a result stays fresh. Metadata changes rarely; data is refreshed by MoSPI
+# on release days, so it gets a shorter TTL. Local in-memory tools are not worth caching.
+TOOL_TTLS: Dict[str, float] = {
+    "2_get_indicators": 6 * 3600,
+    "3_get_metadata": 6 * 3600,
+    "4_get_data": 30 * 60,
+    "get_wpi_subtree": 30 * 60,
+    "get_long_series": 60 * 60,
+}
+TOOL_TTLS.update(parse_tool_values(os.environ.get("MOSPI_RESULT_CACHE_TTLS", "")))
+
+RESULT_CACHE_BYTES = int(os.environ.get("MOSPI_RESULT_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+# A single result may use at most this share of the budget
+MAX_ENTRY_SHARE = 0.25
+
+result_cache_bytes = registry.register(Gauge(
+    "mospi_result_cache_bytes", "Estimated memory held by the tool result cache."))
+result_cache_entries = registry.register(Gauge(
+    "mospi_result_cache_entries", "Entries in the tool result cache."))
+
+
+def canonical_key(tool: str, arguments: Any) -> str:
+    """Tool name plus arguments as sorted, compact JSON with None values dropped."""
+    if isinstance(arguments, dict):
+        arguments = {k: v for k, v in arguments.items() if v is not None}
+    return tool + ":" + json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ResultCache:
+    """LRU map of key -> (result, size, expires_at, origin) bounded by total estimated size."""
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, int, float, Optional[str]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def origin(self, key: str) -> Optional[str]:
+        """The raw (pre-canonicalization) key of the request that stored key."""
+        entry = self._entries.get(key)
+        return entry[3] if entry is not None else None
+
+    def put(self, key: str, value: Any, size: int, ttl: float, origin: Optional[str] = None) -> bool:
+        """Store value; returns False if it is too large for the budget."""
+        if size > self.max_bytes * MAX_ENTRY_SHARE:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + ttl, origin)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def invalidate(self, tool: Optional[str] = None) -> None:
+        """Drop all entries, or only those of one tool."""
+        with self._lock:
+            for key in [k for k in self._entries if tool is None or k.startswith(tool + ":")]:
+                self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+def is_cacheable(result: Any) -> bool:
+    """False for errors and for partial results carrying a non-empty "errors" list."""
+    if is_error_result(result):
+        return False
+    structured = getattr(result, "structured_content", None)
+    return not (isinstance(structured, dict) and structured.get("errors"))
+
+
+def result_size(result: Any, key: str) -> int:
+    """Estimated footprint: rendered text plus a same-sized structured copy, plus the key."""
+    return 2 * response_size(result) + len(key)
+
+
+class ResultCacheMiddleware(Middleware):
+    """Serves repeated tool calls from ResultCache; sets cache.hit on the current (tool) span."""
+
+    def __init__(self, cache: Optional[ResultCache] = None, ttls: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.cache = cache or result_cache
+        self.ttls = TOOL_TTLS if ttls is None else ttls
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool_name = getattr(context.message, 'name', 'unknown')
+        ttl = self.ttls.get(tool_name)
+        if not ttl:
+            return await call_next(context)
+
+        arguments = getattr(context.message, 'arguments', None) or {}
+        key = canonical_key(tool_name, request_keys.arguments(tool_name, arguments))
+        raw_key = canonical_key(tool_name, arguments)
+        span = trace.get_current_span()
+        cached = self.cache.get(key)
+        record_cache("tool_result", cached is not None)
+        span.set_attribute("cache.hit", cached is not None)
+        if cached is not None:
+            if self.cache.origin(key) != raw_key:
+                record_canonical_hit("tool_result")
+            return cached
+
+        result = await call_next(context)
+        if is_cacheable(result):
+            self.cache.put(key, result, result_size(result, key), ttl, origin=raw_key)
+            result_cache_bytes.set(value=self.cache.bytes)
+            result_cache_entries.set(value=len(self.cache))
+        return result
+
+
+# Global instance
+result_cache = ResultCache()
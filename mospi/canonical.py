@@ -0,0 +1,186 @@
+"""
+Canonical Request Keys
+One normal form for tool arguments and get_data filters, shared by the tool
+result cache and the containment cache, so requests that differ only in
+spelling map to the same key:
+
+- dataset names are upper-cased; for get_data, aliases resolve through
+  DATASET_MAP ("CPI" with no item_code and "CPI_GROUP" both become "CPI_Group")
+- values are stringified the way transform_filters does (2012 -> "2012"),
+  None values are dropped
+- multi-valued filters are de-duplicated and sorted ("3,2,1,1" -> "1,2,3");
+  codes are compared as given, so "01" and "1" stay distinct
+- params left at their default are dropped: Format=JSON, page=1, limit=10 and
+  swagger defaults of optional params (defaults of required params are kept,
+  since leaving those out is a validation error)
+- while get_data plans limit/page itself (MOSPI_AUTO_LIMIT), tool arguments
+  keep an explicit limit=10 or page=1: leaving them out asks for the planned
+  page, which may be larger, so the two are different requests to the tool
+  result cache. Upstream filters still drop them, since MoSPI sees the same request
+
+Hits that only happened because of canonicalization (the cached entry was
+stored under a differently spelled request) are counted per cache, and the
+share of lookups they account for is exported as
+mospi_cache_canonical_gain{cache}: the hit-ratio points gained.
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from observability.metrics import Counter, Gauge, cache_requests, registry
+
+# Defaults MoSPI applies when the param is absent
+IMPLICIT_DEFAULTS: Dict[str, str] = {"Format": "JSON", "page": "1", "limit": "10"}
+
+# Params get_data chooses itself when the caller leaves them out
+PLANNED_PARAMS = ("limit", "page")
+
+# Tools that resolve their dataset through resolve_dataset + DATASET_MAP
+DATASET_ROUTED_TOOLS = {"4_get_data", "export_data"}
+
+canonical_hits = registry.register(Counter(
+    "mospi_cache_canonical_hits_total",
+    "Cache hits whose raw request key differed from the one the entry was stored under.", ("cache",)))
+canonical_gain = registry.register(Gauge(
+    "mospi_cache_canonical_gain",
+    "Share of cache lookups that hit only because keys are canonicalized.", ("cache",)))
+
+
+def _sort_key(value: str):
+    """Numeric codes in numeric order, then everything else alphabetically."""
+    return (0, int(value), value) if value.isdigit() else (1, 0, value)
+
+
+def canonical_value(value: Any) -> str:
+    """Stringified, stripped; comma lists de-duplicated and sorted."""
+    text = str(value).strip()
+    if "," not in text:
+        return text
+    parts = {part.strip() for part in text.split(",") if part.strip()}
+    return ",".join(sorted(parts, key=_sort_key))
+
+
+def canonical_filters(
+    filters: Dict[str, Any], defaults: Optional[Dict[str, str]] = None, keep: Tuple[str, ...] = ()
+) -> Dict[str, str]:
+    """Filters in normal form, sorted by name, with default-valued params (other than keep) dropped."""
+    defaults = {**IMPLICIT_DEFAULTS, **(defaults or {})}
+    for name in keep:
+        defaults.pop(name, None)
+    canonical = {}
+    for name in sorted(filters):
+        if filters[name] is None:
+            continue
+        value = canonical_value(filters[name])
+        if defaults.get(name) == value:
+            continue
+        canonical[name] = value
+    return canonical
+
+
+class RequestCanonicalizer:
+    """
+    Canonical dataset names and filters. The server configures how datasets
+    resolve and where swagger defaults come from; until then aliases are only
+    upper-cased and only the implicit defaults are dropped.
+    """
+
+    def __init__(self):
+        self._resolve: Optional[Callable[[str, Dict[str, Any]], str]] = None
+        self._dataset_map: Dict[str, str] = {}
+        self._param_defs: Optional[Callable[[str], List[Dict[str, Any]]]] = None
+        self._defaults: Dict[str, Dict[str, str]] = {}
+        # Params that stay in tool argument keys even at their default
+        self._keep: Tuple[str, ...] = ()
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        resolve: Callable[[str, Dict[str, Any]], str],
+        dataset_map: Dict[str, str],
+        param_defs: Callable[[str], List[Dict[str, Any]]],
+        planned_paging: bool = False,
+    ) -> None:
+        """
+        resolve: (dataset, filters) -> swagger key; param_defs: swagger key -> swagger parameter list;
+        planned_paging: get_data picks limit/page when they are left out, so tool argument keys keep them.
+        """
+        self._resolve = resolve
+        self._dataset_map = dataset_map
+        self._param_defs = param_defs
+        self._keep = PLANNED_PARAMS if planned_paging else ()
+        with self._lock:
+            self._defaults.clear()
+
+    def swagger_key(self, dataset: str, filters: Dict[str, Any]) -> str:
+        dataset = str(dataset).upper()
+        return self._resolve(dataset, filters) if self._resolve else dataset
+
+    def dataset(self, dataset: str, filters: Optional[Dict[str, Any]] = None) -> str:
+        """API dataset name for a user-facing name or alias."""
+        key = self.swagger_key(dataset, filters or {})
+        return self._dataset_map.get(key, key)
+
+    def defaults(self, swagger_key: str) -> Dict[str, str]:
+        """Swagger defaults of optional params (plus Format) for a dataset; read once per dataset."""
+        with self._lock:
+            cached = self._defaults.get(swagger_key)
+        if cached is not None:
+            return cached
+        defaults = {}
+        for param in (self._param_defs(swagger_key) if self._param_defs else []):
+            default = (param.get("schema") or {}).get("default")
+            if default is not None and (not param.get("required") or param.get("name") == "Format"):
+                defaults[param["name"]] = str(default)
+        with self._lock:
+            self._defaults[swagger_key] = defaults
+        return defaults
+
+    def filters(self, dataset: str, filters: Dict[str, Any], keep: Tuple[str, ...] = ()) -> Dict[str, str]:
+        return canonical_filters(filters, self.defaults(self.swagger_key(dataset, filters)), keep)
+
+    def arguments(self, tool: str, arguments: Any) -> Any:
+        """
+        Tool arguments in normal form: scalars stringified, filters canonical and,
+        for tools that route datasets like get_data, the dataset alias resolved.
+        Other tools only see their dataset upper-cased, as they do themselves.
+        """
+        if not isinstance(arguments, dict):
+            return arguments
+        canonical: Dict[str, Any] = {}
+        for name, value in arguments.items():
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                # Order may matter to the tool (e.g. output order), so only the elements are normalized
+                canonical[name] = [str(v) for v in value]
+            elif isinstance(value, dict):
+                canonical[name] = canonical_filters(value)
+            else:
+                canonical[name] = str(value)
+        if isinstance(arguments.get("dataset"), str):
+            filters = arguments.get("filters") if isinstance(arguments.get("filters"), dict) else {}
+            if tool in DATASET_ROUTED_TOOLS:
+                canonical["dataset"] = self.dataset(arguments["dataset"], filters)
+                if "filters" in canonical:
+                    canonical["filters"] = self.filters(arguments["dataset"], filters, self._keep)
+            else:
+                canonical["dataset"] = arguments["dataset"].upper()
+        return canonical
+
+
+def record_canonical_hit(cache: str) -> None:
+    canonical_hits.inc(cache)
+
+
+def _collect_canonical_gain() -> None:
+    lookups: Dict[str, float] = {}
+    for (cache, _), count in cache_requests.items():
+        lookups[cache] = lookups.get(cache, 0) + count
+    for (cache,), hits in canonical_hits.items():
+        canonical_gain.set(cache, value=hits / lookups[cache] if lookups.get(cache) else 0.0)
+
+
+# Global instance
+request_keys = RequestCanonicalizer()
+registry.add_collector(_collect_canonical_gain)
@@ -0,0 +1,224 @@
+"""
+Result Size Estimation for get_data
+Estimates how many records a 4_get_data request returns before it is sent,
+so the server can pick limit and page itself instead of relying on the model
+to guess ("pass limit if you expect more than 10 records").
+
+- Each dimension param contributes a factor: the number of values requested
+  ("1,2,3" -> 3), 1 if the param is left at its swagger default, or the size
+  of its code set in the cached metadata if it is omitted (MoSPI then returns
+  every value). Omitted params with no known code set count as 1 and are
+  reported as unknown_dimensions, which makes the estimate a lower bound.
+- expected_records is the product of the factors; estimated_bytes multiplies
+  it by the average JSON size of a record, learned per dataset from responses.
+- Without an explicit limit, get_data asks for expected_records (at least
+  MoSPI's default page of 10, at most MOSPI_AUTO_LIMIT_MAX per page) and, if
+  page 1 reports more in meta_data.totalRecords, fetches the remaining pages
+  concurrently up to MOSPI_AUTO_MAX_RECORDS. Both default to the bulk
+  threshold of mospi.scheduler, so an unlimited call stays a data call unless
+  the operator opts in to larger automatic pulls.
+- The planned size is also what mospi.scheduler classifies an unlimited
+  4_get_data call by, so priority and admission see the real pull size.
+
+Hierarchical code sets (group/subgroup) make the plain product an
+overestimate. After a response reports totalRecords, later estimates for the
+same dataset and set of omitted params are scaled by actual/expected, and
+mospi_cardinality_ratio tracks the uncalibrated ratio so drift is visible.
+"""
+
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from observability.metrics import Histogram, registry
+
+from .canonical import request_keys
+from .codes import code_index, normalize_category
+from .containment import DEFAULT_LIMIT, PAGING_PARAMS, split_values
+from .scheduler import BULK_LIMIT
+
+AUTO_LIMIT = os.environ.get("MOSPI_AUTO_LIMIT", "1") == "1"
+AUTO_LIMIT_MAX = int(os.environ.get("MOSPI_AUTO_LIMIT_MAX", str(BULK_LIMIT)))
+AUTO_MAX_RECORDS = int(os.environ.get("MOSPI_AUTO_MAX_RECORDS", str(BULK_LIMIT)))
+
+# Bytes per record until a dataset's responses have been seen
+DEFAULT_RECORD_BYTES = 200
+# Records serialized per response to learn the record size
+RECORD_SAMPLE = 20
+
+# Dimensions whose size does not depend on metadata
+FIXED_SIZES: Dict[str, int] = {"month": 12, "quarter": 4}
+
+cardinality_ratio = registry.register(Histogram(
+    "mospi_cardinality_ratio", "Actual / expected records for get_data requests.", ("dataset",),
+    buckets=(0.1, 0.25, 0.5, 0.8, 1.0, 1.25, 2.0, 4.0, 10.0)))
+
+
+# (API dataset, omitted params): requests whose estimates share a calibration
+ShapeKey = Tuple[str, FrozenSet[str]]
+
+
+@dataclass
+class Estimate:
+    records: int
+    record_bytes: int
+    # param -> factor it contributed
+    dimensions: Dict[str, int] = field(default_factory=dict)
+    # omitted params whose code set is not cached (counted as 1)
+    unknown: List[str] = field(default_factory=list)
+    # product of the factors before calibration
+    product: int = 0
+    shape: Optional[ShapeKey] = None
+
+    @property
+    def bytes(self) -> int:
+        return self.records * self.record_bytes
+
+    def describe(self) -> Dict[str, Any]:
+        described = {
+            "expected_records": self.records,
+            "estimated_bytes": self.bytes,
+            # Only the filters that multiply the result
+            "dimensions": {name: size for name, size in self.dimensions.items() if size > 1},
+        }
+        if self.unknown:
+            described["unknown_dimensions"] = self.unknown
+            described["lower_bound"] = True
+        if self.product and self.product != self.records:
+            described["calibrated"] = True
+        return described
+
+
+@dataclass
+class Plan:
+    limit: int
+    pages: int
+    # False when the caller chose limit/page and the plan only reports
+    automatic: bool = True
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def total_records(result: Any) -> Optional[int]:
+    """meta_data.totalRecords of a MoSPI response, if present."""
+    meta = result.get("meta_data") if isinstance(result, dict) else None
+    return _int(meta.get("totalRecords")) if isinstance(meta, dict) else None
+
+
+class CardinalityEstimator:
+    """
+    Record count and size estimates from code-set sizes.
+
+    sizes: dataset (as indexed by the code index, e.g. "CPI") -> {category: number of codes}.
+    The server configures where swagger parameter lists come from; they are read
+    once per dataset, since scheduling estimates every unlimited get_data call.
+    """
+
+    def __init__(self, sizes: Callable[[str], Dict[str, int]]):
+        self._sizes = sizes
+        self._param_defs: Optional[Callable[[str], List[Dict[str, Any]]]] = None
+        self._defs: Dict[str, List[Dict[str, Any]]] = {}
+        self._record_bytes: Dict[str, float] = {}
+        # shape -> actual / product, from the last response that reported totalRecords
+        self._ratios: Dict[ShapeKey, float] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, param_defs: Callable[[str], List[Dict[str, Any]]]) -> None:
+        """param_defs: swagger key -> swagger parameter list."""
+        self._param_defs = param_defs
+        with self._lock:
+            self._defs.clear()
+
+    def param_defs(self, swagger_key: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            cached = self._defs.get(swagger_key)
+        if cached is None:
+            cached = self._param_defs(swagger_key) if self._param_defs else []
+            with self._lock:
+                self._defs[swagger_key] = cached
+        return cached
+
+    def estimate(self, swagger_key: str, api_dataset: str, filters: Dict[str, str]) -> Estimate:
+        # The code index keys datasets by base name: CPI_GROUP -> CPI
+        sizes = self._sizes(swagger_key.split("_")[0])
+        dimensions: Dict[str, int] = {}
+        unknown: List[str] = []
+        omitted = set()
+        for name, value in filters.items():
+            if name not in PAGING_PARAMS:
+                dimensions[name] = max(1, len(split_values(value)))
+        for param in self.param_defs(swagger_key):
+            name = param.get("name")
+            if not name or name in PAGING_PARAMS or name in filters:
+                continue
+            if (param.get("schema") or {}).get("default") is not None:
+                continue
+            omitted.add(name)
+            category = normalize_category(name)
+            size = sizes.get(category) or FIXED_SIZES.get(category)
+            if size:
+                dimensions[name] = size
+            else:
+                unknown.append(name)
+        product = math.prod(dimensions.values())
+        shape = (api_dataset, frozenset(omitted))
+        with self._lock:
+            ratio = self._ratios.get(shape)
+        records = product if ratio is None else max(1, round(product * ratio))
+        return Estimate(records, self.record_bytes(api_dataset), dimensions, unknown, product, shape)
+
+    def plan(self, estimate: Estimate, filters: Dict[str, str]) -> Plan:
+        """Page size and page count for an estimate; explicit limit/page are kept."""
+        if not AUTO_LIMIT or "limit" in filters or "page" in filters:
+            limit = _int(filters.get("limit")) or DEFAULT_LIMIT
+            return Plan(limit, max(1, math.ceil(estimate.records / max(1, limit))), automatic=False)
+        wanted = min(estimate.records, AUTO_MAX_RECORDS)
+        limit = min(max(wanted, DEFAULT_LIMIT), AUTO_LIMIT_MAX)
+        return Plan(limit, max(1, math.ceil(wanted / limit)))
+
+    def planned_records(self, dataset: Any, filters: Any) -> Optional[int]:
+        """
+        Records an unlimited 4_get_data call will fetch, from its raw tool arguments;
+        None when the caller set limit/page or the request cannot be sized.
+        """
+        if not AUTO_LIMIT or not isinstance(dataset, str) or not isinstance(filters, dict):
+            return None
+        filters = {k: str(v) for k, v in filters.items() if v is not None}
+        if "limit" in filters or "page" in filters:
+            return None
+        swagger_key = request_keys.swagger_key(dataset, filters)
+        plan = self.plan(self.estimate(swagger_key, request_keys.dataset(dataset, filters), filters), filters)
+        return min(plan.limit * plan.pages, max(plan.limit, AUTO_MAX_RECORDS))
+
+    def record_bytes(self, api_dataset: str) -> int:
+        with self._lock:
+            return round(self._record_bytes.get(api_dataset, DEFAULT_RECORD_BYTES))
+
+    def observe(self, api_dataset: str, estimate: Estimate, result: Any) -> None:
+        """Learn the record size from a response and track estimate accuracy against totalRecords."""
+        records = result.get("data") if isinstance(result, dict) else None
+        if not isinstance(records, list) or not records:
+            return
+        sample = records[:RECORD_SAMPLE]
+        size = len(json.dumps(sample, default=str, ensure_ascii=False)) / len(sample)
+        with self._lock:
+            previous = self._record_bytes.get(api_dataset)
+            self._record_bytes[api_dataset] = size if previous is None else 0.8 * previous + 0.2 * size
+        actual = total_records(result)
+        if actual is not None and estimate.product:
+            cardinality_ratio.observe(actual / estimate.product, api_dataset)
+            if estimate.shape is not None:
+                with self._lock:
+                    self._ratios[estimate.shape] = actual / estimate.product
+
+
+# Global instance
+result_sizes = CardinalityEstimator(code_index.category_sizes)
@@ -0,0 +1,253 @@
+"""
+MoSPI Catalogue Cache
+Keeps indicator lists and filter payloads fetched from MoSPI in memory so that
+search and lookup indexes can be (re)built without extra API calls.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from observability.metrics import record_cache
+
+# Indicator lists and filter codes change rarely (new survey rounds), so a long TTL is fine
+CATALOGUE_TTL = 6 * 60 * 60
+# A source whose fetch failed is not retried by background refreshes for this long
+REFRESH_RETRY_AFTER = 60
+
+# Keys that hold a code / a human readable label inside a metadata entry
+CODE_KEYS = ("code", "id")
+LABEL_KEYS = ("name", "description", "title", "label")
+
+
+def metadata_key(*parts: Any) -> str:
+    """Catalogue key for a filter payload, e.g. metadata_key("2012", "Group") -> "filters:2012:Group"."""
+    return ":".join(["filters", *(str(p) for p in parts)])
+
+
+def _fingerprint(payload: Any) -> str:
+    """Stable hash of a payload, used to detect whether a refresh changed anything."""
+    serialized = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+
+
+def entry_code(entry: Dict[str, Any], category: str) -> Optional[str]:
+    """Pick the code field of a metadata entry, e.g. state_code for category 'state'."""
+    for preferred in (f"{category}_code", "indicator_code"):
+        if entry.get(preferred) is not None:
+            return str(entry[preferred])
+    for key, value in entry.items():
+        if value is not None and (key in CODE_KEYS or key.endswith("_code")):
+            return str(value)
+    return None
+
+
+def entry_label(entry: Dict[str, Any], category: str, code: Optional[str]) -> Optional[str]:
+    """Pick the label field of a metadata entry, e.g. state_name for category 'state'."""
+    preferred = entry.get(f"{category}_name")
+    if isinstance(preferred, str) and preferred.strip():
+        return preferred.strip()
+    for key, value in entry.items():
+        if isinstance(value, str) and value.strip() and (key in LABEL_KEYS or key.endswith("_name")):
+            return value.strip()
+    # Fall back to any other string field that is not the code itself
+    for key, value in entry.items():
+        if isinstance(value, str) and value.strip() and value != code and not key.endswith("_code"):
+            return value.strip()
+    return None
+
+
+def iter_code_labels(payload: Any, category: str = "indicator") -> Iterator[Tuple[str, str, str]]:
+    """
+    Walk a MoSPI metadata payload and yield (category, code, label) triples.
+
+    Handles both shapes returned by the API: a list of entries under "data",
+    and a dict of filter name -> list of entries (state, group, item, ...).
+    Nested dicts are walked with the dict key as the category.
+    """
+    if isinstance(payload, dict):
+        for key, value in payload.items():
+            if key.startswith("_") or key in ("api_params", "statusCode", "msg", "message"):
+                continue
+            # "data"/"filter_values" are wrappers, keep the parent category
+            child_category = category if key in ("data", "filter_values", "filters") else key
+            yield from iter_code_labels(value, child_category)
+    elif isinstance(payload, list):
+        for entry in payload:
+            if not isinstance(entry, dict):
+                continue
+            code = entry_code(entry, category)
+            label = entry_label(entry, category, code)
+            if code is not None and label:
+                yield category, code, label
+
+
+class Catalogue:
+    """
+    In-process cache of MoSPI indicator lists and filter payloads.
+
+    Payloads are stored per (dataset, key). Listeners are notified only when a
+    payload actually changes, so indexes built on top can update incrementally.
+    put() stores a copy, so callers may decorate the dict they passed in;
+    payloads returned by get()/ensure() are shared and must not be modified.
+    """
+
+    def __init__(self, ttl: float = CATALOGUE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._sources: Dict[Tuple[str, str], Callable[[], Dict[str, Any]]] = {}
+        self._listeners: List[Callable[[str, str, Any], None]] = []
+        self._failed_at: Dict[Tuple[str, str], float] = {}
+        self._refreshing = False
+
+    def register_source(self, dataset: str, key: str, fetch: Callable[[], Dict[str, Any]]) -> None:
+        """Register a fetch function that refresh() uses to (re)load a payload."""
+        self._sources[(dataset, key)] = fetch
+
+    def subscribe(self, listener: Callable[[str, str, Any], None]) -> None:
+        """Call listener(dataset, key, payload) whenever a payload changes."""
+        self._listeners.append(listener)
+        for (dataset, key), entry in list(self._entries.items()):
+            listener(dataset, key, entry["payload"])
+
+    def put(self, dataset: str, key: str, payload: Any) -> bool:
+        """
+        Store a copy of a payload. Error payloads are ignored.
+
+        Returns True if the payload was new or changed (listeners were notified).
+        """
+        if not isinstance(payload, dict) or "error" in payload:
+            return False
+
+        fingerprint = _fingerprint(payload)
+        with self._lock:
+            entry = self._entries.get((dataset, key))
+            if entry and entry["fingerprint"] == fingerprint:
+                entry["fetched_at"] = time.monotonic()
+                return False
+            payload = copy.deepcopy(payload)
+            self._entries[(dataset, key)] = {
+                "payload": payload,
+                "fingerprint": fingerprint,
+                "fetched_at": time.monotonic(),
+            }
+
+        for listener in self._listeners:
+            listener(dataset, key, payload)
+        return True
+
+    def has_source(self, dataset: str, key: str) -> bool:
+        """True if (dataset, key) is a registered refresh source."""
+        return (dataset, key) in self._sources
+
+    def ensure(self, dataset: str, key: str, fetch: Callable[[], Dict[str, Any]]) -> Optional[Any]:
+        """Return the cached payload, fetching and storing it first if it is missing or stale."""
+        stale = self.is_stale(dataset, key)
+        record_cache("catalogue", not stale)
+        if stale:
+            self.put(dataset, key, fetch())
+        return self.get(dataset, key)
+
+    def get(self, dataset: str, key: str) -> Optional[Any]:
+        """Return the cached payload for (dataset, key), or None."""
+        entry = self._entries.get((dataset, key))
+        return entry["payload"] if entry else None
+
+    def entries(self, dataset: Optional[str] = None) -> List[Tuple[str, str, Any]]:
+        """List cached (dataset, key, payload) triples, optionally for one dataset."""
+        return [
+            (ds, key, entry["payload"])
+            for (ds, key), entry in list(self._entries.items())
+            if dataset is None or ds == dataset
+        ]
+
+    def is_stale(self, dataset: str, key: str) -> bool:
+        """True if the payload was never fetched or is older than the TTL."""
+        entry = self._entries.get((dataset, key))
+        return entry is None or time.monotonic() - entry["fetched_at"] > self.ttl
+
+    def needs_refresh(self) -> bool:
+        """True if a registered source is stale and not waiting out a recent failed fetch."""
+        now = time.monotonic()
+        for dataset, key in list(self._sources):
+            failed_at = self._failed_at.get((dataset, key))
+            if self.is_stale(dataset, key) and (failed_at is None or now - failed_at >= REFRESH_RETRY_AFTER):
+                return True
+        return False
+
+    def refresh(self, force: bool = False) -> List[Tuple[str, str]]:
+        """
+        Re-fetch registered sources that are stale (or all of them if force=True).
+
+        Returns the (dataset, key) pairs whose payload changed.
+        """
+        changed = []
+        for (dataset, key), fetch in list(self._sources.items()):
+            if not force and not self.is_stale(dataset, key):
+                continue
+            try:
+                payload = fetch()
+            except Exception:
+                self._failed_at[(dataset, key)] = time.monotonic()
+                continue
+            if not isinstance(payload, dict) or "error" in payload:
+                self._failed_at[(dataset, key)] = time.monotonic()
+            if self.put(dataset, key, payload):
+                changed.append((dataset, key))
+        return changed
+
+    def refresh_in_background(self, force: bool = False) -> None:
+        """
+        Run refresh() on a daemon thread; no-op if a refresh is already running
+        or (unless force=True) no source needs one.
+        """
+        if not force and not self.needs_refresh():
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def _run():
+            try:
+                self.refresh(force=force)
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=_run, name="mospi-catalogue-refresh", daemon=True).start()
+
+
+def metadata_sources(client) -> Dict[str, List[Tuple[str, Callable[[], Dict[str, Any]]]]]:
+    """Default filter payloads per dataset, keyed the same way 3_get_metadata caches them."""
+    return {
+        "PLFS": [(metadata_key(1, 1), lambda: client.get_plfs_filters(indicator_code=1, frequency_code=1))],
+        "CPI": [
+            (metadata_key("2012", "Group"), lambda: client.get_cpi_filters("2012", "Group")),
+            (metadata_key("2012", "Item"), lambda: client.get_cpi_filters("2012", "Item")),
+        ],
+        "IIP": [(metadata_key("2011-12", "Annually"), lambda: client.get_iip_filters("2011-12", "Annually"))],
+        "ASI": [(metadata_key("2008"), lambda: client.get_asi_filters("2008"))],
+        "NAS": [(metadata_key("Current", 1, 1), lambda: client.get_nas_filters("Current", 1, 1))],
+        "WPI": [(metadata_key(), client.get_wpi_filters)],
+        "ENERGY": [(metadata_key(1, 1), lambda: client.get_energy_filters(1, 1))],
+    }
+
+
+def register_default_sources(catalogue: Catalogue, client) -> None:
+    """Register the indicator lists and filter payloads used for search across all 7 datasets."""
+    catalogue.register_source("PLFS", "indicators", client.get_plfs_indicators)
+    catalogue.register_source("NAS", "indicators", client.get_nas_indicators)
+    catalogue.register_source("ASI", "indicators", client.get_asi_indicators)
+    catalogue.register_source("ENERGY", "indicators", client.get_energy_indicators)
+    sources = metadata_sources(client)
+    for dataset in ("CPI", "IIP", "WPI"):
+        for key, fetch in sources[dataset]:
+            catalogue.register_source(dataset, key, fetch)
+
+
+# Global instance
+catalogue = Catalogue()
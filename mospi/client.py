@@ -3,8 +3,43 @@ MoSPI API Client
 Handles all API calls to the MoSPI data portal
 """
 
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, List, Tuple
+from urllib.parse import urlsplit
+
+from observability.metrics import upstream_call
+from observability.tracing import TRACE_CALLS, TRACE_PHASES, enabled, phase
+
+from .asi import ASI_CLASSIFICATION_ERAS, era_note
+from .bulkhead import bulkheads
+from .deadline import check_deadline, child_deadline, upstream_timeout, use_deadline
+
+# Upstream API root; point at a local stand-in for benchmarks and traffic replay
+MOSPI_BASE_URL = os.environ.get("MOSPI_BASE_URL", "https://api.mospi.gov.in")
+
+# Per-request upstream timeout; shortened to what is left of the tool call's deadline
+UPSTREAM_TIMEOUT = 30
+
+# Body download chunk; the deadline is checked between chunks
+BODY_CHUNK_SIZE = 64 * 1024
+
+# Upper bound on concurrent upstream requests issued by a single fan-out
+MAX_FANOUT_WORKERS = 4
+
+
+def request_size(request: requests.PreparedRequest) -> int:
+    """Bytes of an HTTP/1.1 request as sent: request line, headers and body."""
+    headers = dict(request.headers)
+    # Added by the connection rather than requests
+    headers.setdefault("Host", urlsplit(request.url).netloc)
+    size = len(f"{request.method} {request.path_url} HTTP/1.1\r\n")
+    size += sum(len(f"{name}: {value}\r\n") for name, value in headers.items()) + 2
+    body = request.body or b""
+    return size + len(body.encode("utf-8") if isinstance(body, str) else body)
 
 
 class MoSPI:
@@ -12,7 +47,7 @@ class MoSPI:
     A unified class to interact with various MoSPI APIs.
     """
 
-    def __init__(self, base_url: str = "https://api.mospi.gov.in"):
+    def __init__(self, base_url: str = MOSPI_BASE_URL):
         self.base_url = base_url
         self.api_endpoints = {
             "PLFS": "/api/plfs/getData",
@@ -26,6 +61,54 @@ class MoSPI:
             "Energy": "/api/energy/getEnergyRecords",
         }
 
+    def _get(self, path: str, params: Optional[Dict] = None) -> bytes:
+        """GET an API path and return the body, recording latency, size and errors per endpoint. Raises on HTTP errors."""
+        # The dataset's bulkhead slot is taken first so queueing time is not counted as upstream latency
+        with bulkheads.slot(path), upstream_call(path) as call, \
+                phase("mospi.http", TRACE_CALLS, **{"http.route": path}) as span:
+            # Bounded by the tool call's deadline; raises if it is already spent or cancelled
+            timeout = upstream_timeout(UPSTREAM_TIMEOUT)
+            # stream=True returns once headers arrive, so request and body download are timed apart
+            with phase("mospi.http.request", TRACE_PHASES) as request:
+                response = requests.get(f"{self.base_url}{path}", params=params, timeout=timeout, stream=True)
+                if enabled(TRACE_PHASES):
+                    request.set("http.request_size", request_size(response.request))
+            with phase("mospi.http.download", TRACE_PHASES) as download:
+                body = self._read_body(response)
+                download.set("http.response_body_size", len(body))
+            call.response_bytes = len(body)
+            span.set("http.status_code", response.status_code)
+            span.set("http.response_body_size", len(body))
+            response.raise_for_status()
+            return body
+
+    @staticmethod
+    def _read_body(response: requests.Response) -> bytes:
+        """Download the body in chunks, stopping early if the tool call is cancelled or out of time."""
+        chunks = []
+        try:
+            for chunk in response.iter_content(BODY_CHUNK_SIZE):
+                check_deadline()
+                chunks.append(chunk)
+        except Exception:
+            response.close()
+            raise
+        return b"".join(chunks)
+
+    def _decode(self, body: bytes) -> Any:
+        """Decode a JSON response body, traced as its own phase."""
+        # Nobody is waiting for an abandoned call's result; skip the parse
+        check_deadline()
+        with phase("mospi.json.decode", TRACE_PHASES, **{"http.response_body_size": len(body)}) as decode:
+            try:
+                data = json.loads(body)
+            except ValueError as e:
+                # Same exception response.json() raises, which callers catch as a RequestException
+                raise requests.JSONDecodeError(e.msg, e.doc, e.pos) from e
+            if isinstance(data, dict) and isinstance(data.get("data"), list):
+                decode.set("mospi.records", len(data["data"]))
+            return data
+
     def get_data(self, dataset_name: str, params: Optional[Dict] = None) -> Dict[str, Any]:
         """
         Fetches data from a specified MoSPI dataset.
@@ -34,38 +117,87 @@ class MoSPI:
         if not endpoint_path:
             return {"error": f"Dataset '{dataset_name}' not found."}
 
-        full_url = f"{self.base_url}{endpoint_path}"
-
         # Clean up params - remove None values
         if params:
             params = {k: v for k, v in params.items() if v is not None}
 
         try:
-            response = requests.get(full_url, params=params, timeout=30)
-            response.raise_for_status()
+            body = self._get(endpoint_path, params)
 
             # Check if CSV format was requested
             format_param = params.get("Format", "JSON") if params else "JSON"
             if format_param == "CSV":
-                return {"data": response.text, "format": "CSV"}
+                return {"data": body.decode("utf-8", errors="replace"), "format": "CSV"}
             else:
-                return response.json()
+                return self._decode(body)
         except Exception as e:
             return {"error": f"An error occurred: {e}"}
 
+    def get_data_many(self, calls: List[Tuple[str, Optional[Dict]]]) -> List[Dict[str, Any]]:
+        """
+        Fetch several (dataset_name, params) requests concurrently.
+
+        Results are returned in the same order as calls. Each request runs in a
+        copy of the caller's context so tracing context and the tool call's
+        deadline follow it into the pool; requests not yet started when the call
+        is cancelled fail immediately.
+        """
+        if not calls:
+            return []
+        workers = min(MAX_FANOUT_WORKERS, len(calls))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mospi-fanout") as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, self.get_data, dataset_name, params)
+                for dataset_name, params in calls
+            ]
+            return [future.result() for future in futures]
+
+    def get_data_first(
+        self,
+        calls: List[Tuple[str, Optional[Dict]]],
+        accept: Callable[[Dict[str, Any]], bool],
+    ) -> Tuple[Optional[int], Dict[int, Dict[str, Any]]]:
+        """
+        Fetch several (dataset_name, params) requests concurrently and stop at the
+        first result accept() takes, in completion order.
+
+        Returns (index of the accepted call or None, {index: result} for every call
+        that completed). The calls share a child of the tool call's deadline that
+        is cancelled on return: calls not yet started are dropped, and ones in
+        flight stop at their next deadline check, releasing their bulkhead slots.
+        """
+        if not calls:
+            return None, {}
+        pool = ThreadPoolExecutor(max_workers=min(MAX_FANOUT_WORKERS, len(calls)), thread_name_prefix="mospi-fanout")
+        deadline = child_deadline()
+        with use_deadline(deadline):
+            futures = {
+                pool.submit(contextvars.copy_context().run, self.get_data, dataset_name, params): index
+                for index, (dataset_name, params) in enumerate(calls)
+            }
+        completed: Dict[int, Dict[str, Any]] = {}
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                completed[index] = future.result()
+                if accept(completed[index]):
+                    return index, completed
+            return None, completed
+        finally:
+            deadline.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+
     # =========================================================================
     # PLFS Metadata Methods
     # =========================================================================
 
     def get_plfs_indicators(self) -> Dict[str, Any]:
         """Fetch PLFS indicators grouped by frequency_code."""
-        url = f"{self.base_url}/api/plfs/getIndicatorListByFrequency"
         result = {}
         try:
             for fc, label in [(1, "Annual"), (2, "Quarterly"), (3, "Monthly")]:
-                response = requests.get(url, params={"frequency_code": fc}, timeout=30)
-                response.raise_for_status()
-                data = response.json()
+                body = self._get("/api/plfs/getIndicatorListByFrequency", {"frequency_code": fc})
+                data = self._decode(body)
                 result[f"frequency_code_{fc}_{label}"] = data.get("data", [])
             return {
                 "indicators_by_frequency": result,
@@ -97,13 +229,8 @@ class MoSPI:
             params["month_code"] = month_code
 
         try:
-            response = requests.get(
-                f"{self.base_url}/api/plfs/getFilterByIndicatorId",
-                params=params,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            body = self._get("/api/plfs/getFilterByIndicatorId", params)
+            return self._decode(body)
         except requests.RequestException as e:
             return {"error": str(e), "statusCode": False}
 
@@ -128,13 +255,8 @@ class MoSPI:
         }
 
         try:
-            response = requests.get(
-                f"{self.base_url}/api/cpi/getCpiFilterByLevelAndBaseYear",
-                params=params,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            body = self._get("/api/cpi/getCpiFilterByLevelAndBaseYear", params)
+            return self._decode(body)
         except requests.RequestException as e:
             return {"error": str(e), "statusCode": False}
 
@@ -159,13 +281,8 @@ class MoSPI:
         }
 
         try:
-            response = requests.get(
-                f"{self.base_url}/api/iip/getIipFilter",
-                params=params,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            body = self._get("/api/iip/getIipFilter", params)
+            return self._decode(body)
         except requests.RequestException as e:
             return {"error": str(e), "statusCode": False}
 
@@ -176,12 +293,8 @@ class MoSPI:
     def get_asi_classification_years(self) -> Dict[str, Any]:
         """Fetch list of available NIC classification years from MoSPI API."""
         try:
-            response = requests.get(
-                f"{self.base_url}/api/asi/getNicClassificationYear",
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            body = self._get("/api/asi/getNicClassificationYear")
+            return self._decode(body)
         except requests.RequestException as e:
             return {"error": str(e), "statusCode": False}
 
@@ -199,13 +312,8 @@ class MoSPI:
         }
 
         try:
-            response = requests.get(
-                f"{self.base_url}/api/asi/getAsiFilter",
-                params=params,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            body = self._get("/api/asi/getAsiFilter", params)
+            return self._decode(body)
         except requests.RequestException as e:
             return {"error": str(e), "statusCode": False}
 
@@ -216,13 +324,8 @@ class MoSPI:
         it must pass classification_year in get_metadata/get_data.
         """
         try:
-            response = requests.get(
-                f"{self.base_url}/api/asi/getAsiFilter",
-                params={"classification_year": "2008"},
-                timeout=30
-            )
-            response.raise_for_status()
-            data = response.json()
+            body = self._get("/api/asi/getAsiFilter", {"classification_year": "2008"})
+            data = self._decode(body)
             filter_data = data.get("data", data)
             # Extract indicator list if present
             indicators = None
@@ -230,14 +333,12 @@ class MoSPI:
                 indicators = filter_data.get("indicator", filter_data.get("indicators", None))
             result = {
                 "dataset": "ASI",
-                "classification_years": ["2008", "2004", "1998", "1987"],
-                "_note": "classification_year is REQUIRED for ASI. It is the NIC classification version, NOT the data year. "
+                "classification_years": [era[0] for era in reversed(ASI_CLASSIFICATION_ERAS)],
+                "_note": "classification_year is the NIC classification version, NOT the data year. "
                          "Pick based on which data year you need: "
-                         "'1987' → 1992-93 to 1997-98 | "
-                         "'1998' → 1998-99 to 2003-04 | "
-                         "'2004' → 2004-05 to 2007-08 | "
-                         "'2008' → 2008-09 to 2023-24. "
-                         "Pass classification_year in 3_get_metadata() and 4_get_data().",
+                         f"{era_note()}. "
+                         "Pass classification_year in 3_get_metadata(). In 4_get_data() you may omit it and pass "
+                         "year instead — years spanning several classification years are routed and merged automatically.",
                 "statusCode": True,
             }
             if indicators:
@@ -255,12 +356,8 @@ class MoSPI:
     def get_nas_indicators(self) -> Dict[str, Any]:
         """Fetch list of all NAS indicators from MoSPI API."""
         try:
-            response = requests.get(
-                f"{self.base_url}/api/nas/getNasIndicatorList",
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            body = self._get("/api/nas/getNasIndicatorList")
+            return self._decode(body)
         except requests.RequestException as e:
             return {"error": str(e), "statusCode": False}
 
@@ -284,13 +381,8 @@ class MoSPI:
         }
 
         try:
-            response = requests.get(
-                f"{self.base_url}/api/nas/getNasFilterByIndicatorId",
-                params=params,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            body = self._get("/api/nas/getNasFilterByIndicatorId", params)
+            return self._decode(body)
         except requests.RequestException as e:
             return {"error": str(e), "statusCode": False}
 
@@ -305,12 +397,8 @@ class MoSPI:
             Available filters: year, month, major_group, group, sub_group, sub_sub_group, item
         """
         try:
-            response = requests.get(
-                f"{self.base_url}/api/wpi/getWpiData",
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            body = self._get("/api/wpi/getWpiData")
+            return self._decode(body)
         except requests.RequestException as e:
             return {"error": str(e), "statusCode": False}
 
@@ -321,12 +409,8 @@ class MoSPI:
     def get_energy_indicators(self) -> Dict[str, Any]:
         """Fetch list of Energy indicators from MoSPI API."""
         try:
-            response = requests.get(
-                f"{self.base_url}/api/energy/getEnergyIndicatorList",
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            body = self._get("/api/energy/getEnergyIndicatorList")
+            return self._decode(body)
         except requests.RequestException as e:
             return {"error": str(e), "statusCode": False}
 
@@ -347,13 +431,8 @@ class MoSPI:
         }
 
         try:
-            response = requests.get(
-                f"{self.base_url}/api/energy/getEnergyFilterByIndicatorId",
-                params=params,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            body = self._get("/api/energy/getEnergyFilterByIndicatorId", params)
+            return self._decode(body)
         except requests.RequestException as e:
             return {"error": str(e), "statusCode": False}
 
@@ -0,0 +1,234 @@
+"""
+Code Lookup Index
+Prefix trie plus trigram fuzzy index over every label/code pair in the cached
+MoSPI metadata, used by the lookup_mospi_codes tool.
+"""
+
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .catalogue import iter_code_labels
+
+# Minimum trigram similarity (Dice coefficient) for a fuzzy match
+FUZZY_THRESHOLD = 0.4
+
+_NORMALIZE_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse everything that is not a letter or digit to single spaces."""
+    return _NORMALIZE_RE.sub(" ", str(text).lower()).strip()
+
+
+def normalize_category(category: str) -> str:
+    """'State', 'states' and 'state_code' all normalize to 'state'."""
+    category = normalize(category).replace(" ", "_")
+    if category.endswith("_code"):
+        category = category[:-5]
+    if category.endswith("ies"):
+        category = category[:-3] + "y"
+    elif category.endswith("s") and not category.endswith("ss"):
+        category = category[:-1]
+    return category
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of each word, padded so short words and word starts count."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: Set[int] = set()
+
+
+class CodeIndex:
+    """
+    Label/code lookup over cached metadata.
+
+    Every label is inserted into a prefix trie once per word start, so "rajas"
+    and "pradesh" both find "Uttar Pradesh"/"Rajasthan" in O(len(term)).
+    Typos fall through to a trigram index scored by Dice similarity.
+    Entries are grouped by catalogue source so refreshes update incrementally.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._root = _TrieNode()
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._entry_keys: Dict[int, List[str]] = {}
+        self._entry_grams: Dict[int, Set[str]] = {}
+        self._grams: Dict[str, Set[int]] = {}
+        self._codes: Dict[Tuple[str, str], Set[int]] = {}
+        self._sources: Dict[Tuple[str, str], List[int]] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def has_dataset(self, dataset: str) -> bool:
+        return any(ds == dataset and ids for (ds, _), ids in self._sources.items())
+
+    def categories(self, dataset: str) -> List[str]:
+        """Distinct categories indexed for a dataset."""
+        return sorted({e["category"] for e in self._entries.values() if e["dataset"] == dataset})
+
+    def category_sizes(self, dataset: str) -> Dict[str, int]:
+        """Distinct codes per normalized category of a dataset, across all its cached sources."""
+        codes: Dict[str, Set[str]] = {}
+        with self._lock:
+            for entry in self._entries.values():
+                if entry["dataset"] == dataset:
+                    codes.setdefault(entry["_category"], set()).add(entry["code"])
+        return {category: len(values) for category, values in codes.items()}
+
+    def label(self, dataset: str, category: str, code: str) -> Optional[str]:
+        """The label of a code in a category ('state_code', '8' -> 'Rajasthan'); None if unknown or ambiguous."""
+        wanted = normalize_category(category)
+        with self._lock:
+            labels = {
+                self._entries[i]["label"] for i in self._codes.get((dataset, normalize(code)), ())
+                if self._entries[i]["_category"] == wanted
+            }
+        return labels.pop() if len(labels) == 1 else None
+
+    def update_source(self, dataset: str, source: str, payload: Any) -> int:
+        """Replace all entries of (dataset, source) with the label/code pairs in payload."""
+        new_entries = []
+        seen = set()
+        for category, code, label in iter_code_labels(payload):
+            if (category, code) in seen:
+                continue
+            seen.add((category, code))
+            new_entries.append({"dataset": dataset, "category": category, "code": code, "label": label})
+
+        with self._lock:
+            for entry_id in self._sources.pop((dataset, source), []):
+                self._remove(entry_id)
+            ids = [self._add(entry) for entry in new_entries]
+            self._sources[(dataset, source)] = ids
+        return len(ids)
+
+    def _add(self, entry: Dict[str, Any]) -> int:
+        entry_id = self._next_id
+        self._next_id += 1
+        label = normalize(entry["label"])
+        words = label.split()
+        keys = [" ".join(words[i:]) for i in range(len(words))]
+        for key in keys:
+            node = self._root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+                node.ids.add(entry_id)
+        grams = trigrams(label)
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(entry_id)
+        self._codes.setdefault((entry["dataset"], normalize(entry["code"])), set()).add(entry_id)
+        self._entries[entry_id] = {**entry, "_category": normalize_category(entry["category"]), "_label": label}
+        self._entry_keys[entry_id] = keys
+        self._entry_grams[entry_id] = grams
+        return entry_id
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        for key in self._entry_keys.pop(entry_id):
+            node = self._root
+            for char in key:
+                node = node.children.get(char)
+                if node is None:
+                    break
+                node.ids.discard(entry_id)
+        for gram in self._entry_grams.pop(entry_id):
+            posting = self._grams.get(gram)
+            if posting is not None:
+                posting.discard(entry_id)
+                if not posting:
+                    del self._grams[gram]
+        code_key = (entry["dataset"], normalize(entry["code"]))
+        self._codes.get(code_key, set()).discard(entry_id)
+
+    def _prefix(self, term: str) -> Set[int]:
+        node = self._root
+        for char in term:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.ids
+
+    def lookup(
+        self,
+        dataset: str,
+        search_term: Optional[str] = None,
+        category: Optional[str] = None,
+        limit: Optional[int] = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Find codes for search_term within a dataset (and optionally a category).
+
+        Match order: exact code, exact label, label/word prefix, then fuzzy trigram matches.
+        An empty search_term lists every code in the category.
+        """
+        wanted_category = normalize_category(category) if category else None
+        term = normalize(search_term or "")
+
+        def in_scope(entry_id: int) -> bool:
+            entry = self._entries[entry_id]
+            if entry["dataset"] != dataset:
+                return False
+            return wanted_category is None or entry["_category"].startswith(wanted_category)
+
+        with self._lock:
+            scored: Dict[int, Tuple[float, str]] = {}
+
+            if not term:
+                for entry_id in self._entries:
+                    if in_scope(entry_id):
+                        scored[entry_id] = (1.0, "list")
+            else:
+                for entry_id in self._codes.get((dataset, term), ()):
+                    if in_scope(entry_id):
+                        scored[entry_id] = (1.0, "code")
+                for entry_id in self._prefix(term):
+                    if entry_id in scored or not in_scope(entry_id):
+                        continue
+                    exact = self._entries[entry_id]["_label"] == term
+                    scored[entry_id] = (1.0 if exact else 0.9, "exact" if exact else "prefix")
+
+                if limit is None or len(scored) < limit:
+                    query_grams = trigrams(term)
+                    overlap: Counter = Counter()
+                    for gram in query_grams:
+                        overlap.update(self._grams.get(gram, ()))
+                    for entry_id, shared in overlap.items():
+                        if entry_id in scored or not in_scope(entry_id):
+                            continue
+                        # Dice for whole-label typos, containment for a typo in one word of a longer label
+                        dice = 2 * shared / (len(query_grams) + len(self._entry_grams[entry_id]))
+                        similarity = max(dice, 0.8 * shared / len(query_grams))
+                        if similarity >= FUZZY_THRESHOLD:
+                            scored[entry_id] = (round(0.8 * similarity, 3), "fuzzy")
+
+            ranked = sorted(scored, key=lambda i: (-scored[i][0], self._entries[i]["_label"]))
+            return [
+                {
+                    "category": self._entries[i]["category"],
+                    "code": self._entries[i]["code"],
+                    "label": self._entries[i]["label"],
+                    "match": scored[i][1],
+                    "score": scored[i][0],
+                }
+                for i in ranked[:limit]
+            ]
+
+
+# Global instance
+code_index = CodeIndex()
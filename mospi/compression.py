@@ -0,0 +1,192 @@
+"""
+HTTP Response Compression
+ASGI middleware for the HTTP transport that compresses large responses with
+the best encoding the client accepts: zstd or brotli when the optional
+`zstandard` / `brotli` packages are installed, gzip otherwise.
+
+- Plain responses smaller than MOSPI_COMPRESS_MIN_BYTES are sent as is.
+- Streamed responses (the MCP transport's text/event-stream) are compressed
+  chunk by chunk with a sync flush after each one, so every event reaches the
+  client as soon as it is produced.
+- The level is adaptive: lower for very large bodies and when many responses
+  are being compressed at once, so compression never becomes the bottleneck.
+- Compression CPU time and bytes in/out are exported at /metrics.
+"""
+
+import os
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from observability.metrics import Counter, registry
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+COMPRESS_MIN_BYTES = int(os.environ.get("MOSPI_COMPRESS_MIN_BYTES", "1024"))
+
+# Bodies at least this large use the "large" level
+LARGE_BODY_BYTES = 1024 * 1024
+
+# Concurrent compressions above this use the "pressured" (fastest) level
+PRESSURE_STREAMS = os.cpu_count() or 1
+
+# encoding -> (normal, large, pressured) level
+LEVELS: Dict[str, Tuple[int, int, int]] = {
+    "zstd": (6, 3, 1),
+    "br": (5, 4, 1),
+    "gzip": (6, 4, 1),
+}
+
+# Preference order when the client accepts several encodings equally
+PREFERENCE = ["zstd", "br", "gzip"]
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml")
+
+compression_cpu = registry.register(Counter(
+    "mospi_compression_cpu_seconds_total", "CPU time spent compressing HTTP responses.", ("encoding",)))
+compression_bytes = registry.register(Counter(
+    "mospi_compression_bytes_total", "HTTP response bytes before (in) and after (out) compression.",
+    ("encoding", "direction")))
+
+
+def available_encodings() -> List[str]:
+    return [e for e in PREFERENCE if e == "gzip" or (e == "br" and brotli) or (e == "zstd" and zstandard)]
+
+
+def negotiate(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """Pick the encoding with the highest q-value the client accepts; ties go by PREFERENCE."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name.strip()] = q
+    wildcard = weights.get("*", 0.0)
+    candidates = [(weights.get(e, wildcard), -PREFERENCE.index(e), e) for e in encodings]
+    best = max(candidates, default=None)
+    return best[2] if best and best[0] > 0 else None
+
+
+class _Compressor:
+    """Uniform compress / flush / finish over gzip, brotli and zstd streams."""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+        else:
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        start = time.thread_time()
+        if self.encoding == "gzip":
+            out = self._obj.compress(data) + self._obj.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+        elif self.encoding == "br":
+            out = self._obj.process(data) + (self._obj.finish() if final else self._obj.flush())
+        else:
+            out = self._obj.compress(data) + self._obj.flush(
+                zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            )
+        compression_cpu.inc(self.encoding, amount=time.thread_time() - start)
+        compression_bytes.inc(self.encoding, "in", amount=len(data))
+        compression_bytes.inc(self.encoding, "out", amount=len(out))
+        return out
+
+
+class CompressionMiddleware:
+    """ASGI middleware; pass to mcp.run(..., middleware=[starlette Middleware(CompressionMiddleware)])."""
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES, encodings: Optional[List[str]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = encodings or available_encodings()
+        self.active = 0
+
+    def choose_level(self, encoding: str, size: Optional[int]) -> int:
+        normal, large, pressured = LEVELS[encoding]
+        if self.active > PRESSURE_STREAMS:
+            return pressured
+        if size is not None and size >= LARGE_BODY_BYTES:
+            return large
+        return normal
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingSend(self, encoding, send)
+        try:
+            await self.app(scope, receive, responder)
+        finally:
+            if responder.compressor is not None:
+                self.active -= 1
+
+
+class _CompressingSend:
+    """Holds back http.response.start until the first body chunk shows whether to compress."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start_message = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = Headers(raw=self.start_message["headers"])
+            compressible = (
+                "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                and (more_body or len(body) >= self.middleware.minimum_size)
+            )
+            if not compressible:
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            level = self.middleware.choose_level(self.encoding, None if more_body else len(body))
+            self.compressor = _Compressor(self.encoding, level)
+            self.middleware.active += 1
+            self.start_message["headers"] = list(self.start_message["headers"])
+            mutable = MutableHeaders(raw=self.start_message["headers"])
+            mutable["content-encoding"] = self.encoding
+            mutable.add_vary_header("Accept-Encoding")
+            if "content-length" in mutable:
+                del mutable["content-length"]
+            await self.send(self.start_message)
+
+        chunk = self.compressor.compress(body, final=not more_body)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
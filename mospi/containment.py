@@ -0,0 +1,253 @@
+"""
+Query-Containment Cache for get_data
+Answers a narrower 4_get_data request from a cached superset instead of going
+upstream: after CPI for states "1,2,...,36" is fetched, the same query for
+state "32" is answered by filtering the cached records.
+
+An entry answers a request when
+- dataset and the set of params match (limit, page and Format aside),
+- every param's requested values are a subset of the entry's values, and
+- each param whose values differ can be applied locally: the records carry a
+  field for it (see record_fields: state_code may come back as state_code,
+  state or state_name) whose values all fall within the entry's list, either
+  as codes or as the labels of those codes in the cached metadata,
+- the entry holds the complete result (first page, fewer records than its limit).
+
+The request's own limit and page are then applied to the filtered records, and
+meta_data.totalRecords is rewritten to the number of matching records.
+
+Entries are indexed by (dataset, param names) and then by (param, value), so
+the candidates for a request are the intersection of a few posting sets
+rather than a scan over every entry.
+
+- MOSPI_CONTAINMENT_CACHE_ENTRIES / MOSPI_CONTAINMENT_CACHE_TTL: size and lifetime
+- MOSPI_CONTAINMENT_MAX_RECORDS: larger results are not kept
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from observability.metrics import record_cache
+
+from .codes import normalize
+
+CONTAINMENT_ENTRIES = int(os.environ.get("MOSPI_CONTAINMENT_CACHE_ENTRIES", "256"))
+CONTAINMENT_TTL = float(os.environ.get("MOSPI_CONTAINMENT_CACHE_TTL", "1800"))
+CONTAINMENT_MAX_RECORDS = int(os.environ.get("MOSPI_CONTAINMENT_MAX_RECORDS", "20000"))
+
+# MoSPI's page size when no limit is given
+DEFAULT_LIMIT = 10
+
+# Params that shape the response rather than select records
+PAGING_PARAMS = ("limit", "page", "Format")
+
+ShapeKey = Tuple[str, FrozenSet[str]]
+
+# (code index dataset, param, code) -> label of the code, or None
+LabelLookup = Callable[[str, str, str], Optional[str]]
+
+# How a param is applied to records: (record field, param value -> value key in that field)
+FieldMatch = Tuple[str, Dict[str, str]]
+
+
+def split_values(value: Any) -> FrozenSet[str]:
+    """'1, 2,3' -> {'1', '2', '3'}."""
+    return frozenset(v.strip() for v in str(value).split(",") if v.strip())
+
+
+def record_fields(param: str) -> Tuple[str, ...]:
+    """Record fields that may carry a param's values: state_code -> state_code, state, state_name."""
+    if param.endswith("_code"):
+        stem = param[:-len("_code")]
+        return param, stem, f"{stem}_name"
+    return (param,)
+
+
+def _key(value: Any) -> str:
+    """Comparison key for codes and labels alike: case, spacing and punctuation ignored."""
+    return normalize(value)
+
+
+def _int(value: Any, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class Entry:
+    entry_id: int
+    shape: ShapeKey
+    values: Dict[str, FrozenSet[str]]
+    result: Dict[str, Any]
+    # Params that can be narrowed by filtering the records locally, and how
+    filterable: Dict[str, FieldMatch]
+    expires_at: float = field(default_factory=lambda: time.monotonic() + CONTAINMENT_TTL)
+
+
+class ContainmentCache:
+    """LRU of complete get_data results with a (param, value) inverted index per query shape."""
+
+    def __init__(self, max_entries: int = CONTAINMENT_ENTRIES, max_records: int = CONTAINMENT_MAX_RECORDS):
+        self.max_entries = max_entries
+        self.max_records = max_records
+        self._entries: "OrderedDict[int, Entry]" = OrderedDict()
+        # shape -> (param, value) -> entry ids
+        self._index: Dict[ShapeKey, Dict[Tuple[str, str], Set[int]]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._labels: Optional[LabelLookup] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def configure(self, labels: LabelLookup) -> None:
+        """labels: (dataset as keyed by the code index, param, code) -> label, for records that carry labels."""
+        self._labels = labels
+
+    def _match_field(self, dataset: str, param: str, allowed: FrozenSet[str], records: List[Dict[str, Any]]) -> Optional[FieldMatch]:
+        """The record field that carries param's values, with the key each value has in it; None if none does."""
+        labels = None
+        for name in record_fields(param):
+            if not all(name in r for r in records):
+                continue
+            present = {_key(r[name]) for r in records}
+            codes = {value: _key(value) for value in allowed}
+            if present <= set(codes.values()):
+                return name, codes
+            if labels is None and self._labels is not None:
+                # The code index keys datasets by base name: CPI_Group -> CPI
+                base = dataset.split("_")[0].upper()
+                labels = {value: self._labels(base, param, value) for value in allowed}
+            if not labels or None in labels.values():
+                continue
+            keys = {value: _key(label) for value, label in labels.items()}
+            if len(set(keys.values())) == len(keys) and present <= set(keys.values()):
+                return name, keys
+        return None
+
+    @staticmethod
+    def _split(dataset: str, filters: Dict[str, Any]) -> Tuple[ShapeKey, Dict[str, FrozenSet[str]]]:
+        values = {k: split_values(v) for k, v in filters.items() if k not in PAGING_PARAMS and v is not None}
+        return (dataset, frozenset(values)), values
+
+    def store(self, dataset: str, filters: Dict[str, Any], result: Any) -> bool:
+        """Keep result if it is a complete JSON answer for filters; returns whether it was kept."""
+        if filters.get("Format", "JSON") != "JSON" or _int(filters.get("page"), 1) != 1:
+            return False
+        if not isinstance(result, dict) or "error" in result:
+            return False
+        records = result.get("data")
+        if records is None and result.get("msg") == "No Data Found":
+            records = []
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            return False
+        if len(records) >= _int(filters.get("limit"), DEFAULT_LIMIT) or len(records) > self.max_records:
+            # Possibly truncated by the page size: not a complete superset
+            return False
+
+        shape, values = self._split(dataset, filters)
+        filterable = {}
+        for param, allowed in values.items():
+            match = self._match_field(dataset, param, allowed, records)
+            if match is not None:
+                filterable[param] = match
+        # Callers may decorate the response they return; keep our own copy
+        result = dict(result)
+        with self._lock:
+            entry = Entry(next(self._ids), shape, values, result, filterable)
+            self._entries[entry.entry_id] = entry
+            postings = self._index.setdefault(shape, {})
+            for param, allowed in values.items():
+                for value in allowed:
+                    postings.setdefault((param, value), set()).add(entry.entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def lookup(self, dataset: str, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """A response for filters built from a cached superset, or None."""
+        if filters.get("Format", "JSON") != "JSON":
+            return None
+        shape, values = self._split(dataset, filters)
+        with self._lock:
+            entry = self._find(shape, values)
+            if entry is not None:
+                self._entries.move_to_end(entry.entry_id)
+        record_cache("containment", entry is not None)
+        if entry is None:
+            return None
+        return self._answer(entry, values, filters)
+
+    def _find(self, shape: ShapeKey, values: Dict[str, FrozenSet[str]]) -> Optional[Entry]:
+        postings = self._index.get(shape)
+        if not postings:
+            return None
+        candidates: Optional[Set[int]] = None
+        # Rarest postings first keeps the intersection small
+        for key in sorted(((p, v) for p, vs in values.items() for v in vs), key=lambda k: len(postings.get(k, ()))):
+            ids = postings.get(key)
+            if not ids:
+                return None
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return None
+        now = time.monotonic()
+        for entry_id in sorted(candidates or (), reverse=True):
+            entry = self._entries[entry_id]
+            if entry.expires_at <= now:
+                self._remove(entry_id)
+                continue
+            narrowed = {p for p, vs in values.items() if vs != entry.values[p]}
+            if narrowed <= entry.filterable.keys():
+                return entry
+        return None
+
+    @staticmethod
+    def _answer(entry: Entry, values: Dict[str, FrozenSet[str]], filters: Dict[str, Any]) -> Dict[str, Any]:
+        tests = []
+        for param, requested in values.items():
+            if requested != entry.values[param]:
+                name, keys = entry.filterable[param]
+                tests.append((name, {keys[value] for value in requested}))
+        records = entry.result.get("data") or []
+        matching = [r for r in records if all(_key(r[name]) in accepted for name, accepted in tests)]
+        limit = max(1, _int(filters.get("limit"), DEFAULT_LIMIT))
+        page = max(1, _int(filters.get("page"), 1))
+        page_records = matching[(page - 1) * limit:page * limit]
+
+        response = {k: v for k, v in entry.result.items() if k not in ("data", "msg")}
+        meta = response.get("meta_data")
+        if isinstance(meta, dict) and "totalRecords" in meta:
+            # The superset's count would make callers page for records the narrowed answer lacks
+            response["meta_data"] = {**meta, "totalRecords": len(matching)}
+        if page_records:
+            response["data"] = page_records
+            if "msg" in entry.result and entry.result["msg"] != "No Data Found":
+                response["msg"] = entry.result["msg"]
+        else:
+            response["msg"] = "No Data Found"
+        return response
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        postings = self._index.get(entry.shape, {})
+        for param, allowed in entry.values.items():
+            for value in allowed:
+                ids = postings.get((param, value))
+                if ids is not None:
+                    ids.discard(entry_id)
+                    if not ids:
+                        del postings[(param, value)]
+        if not postings:
+            self._index.pop(entry.shape, None)
+
+
+# Global instance
+containment_cache = ContainmentCache()
@@ -0,0 +1,163 @@
+"""
+Tool Call Deadlines and Cancellation
+Every tool call gets a Deadline stored in a contextvar, so it follows the call
+into FastMCP's worker thread and into MoSPI.get_data_many's fan-out pool.
+The client derives its upstream timeouts from the time left and checks the
+deadline between body chunks and before decoding.
+
+When the MCP client disconnects or cancels the request, the middleware marks
+the deadline cancelled; in-flight downloads stop at the next chunk and
+fan-out requests that have not started fail immediately, instead of holding
+a worker thread for up to the full upstream timeout. Fan-outs that stop
+early (MoSPI.get_data_first) run under a child deadline and cancel it, so
+the requests they no longer need stop the same way.
+
+- MOSPI_TOOL_DEADLINE: default budget per tool call in seconds (default 60)
+- MOSPI_TOOL_DEADLINES: per-tool budgets, e.g. "get_long_series=120,4_get_data=45"
+- X-MoSPI-Timeout request header: a client may ask for a shorter budget
+"""
+
+import asyncio
+import contextvars
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import requests
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+from observability.config import parse_tool_values
+
+DEFAULT_DEADLINE = float(os.environ.get("MOSPI_TOOL_DEADLINE", "60"))
+TOOL_DEADLINES: Dict[str, float] = {
+    "get_long_series": 2 * DEFAULT_DEADLINE,
+    "get_wpi_subtree": 2 * DEFAULT_DEADLINE,
+    "export_data": 5 * DEFAULT_DEADLINE,
+}
+TOOL_DEADLINES.update(parse_tool_values(os.environ.get("MOSPI_TOOL_DEADLINES", "")))
+
+TIMEOUT_HEADER = "x-mospi-timeout"
+
+
+class DeadlineExceeded(requests.Timeout):
+    """The tool call ran out of time before the upstream request could finish."""
+
+
+class RequestCancelled(requests.RequestException):
+    """The MCP client went away; the upstream work is no longer wanted."""
+
+
+class Deadline:
+    """
+    Absolute (monotonic) expiry plus a cancellation flag shared across threads.
+
+    A deadline with a parent expires with it and counts as cancelled when the
+    parent is, but can also be cancelled on its own.
+    """
+
+    def __init__(self, budget: float, parent: Optional["Deadline"] = None):
+        self.budget = parent.budget if parent is not None else budget
+        self.expires_at = parent.expires_at if parent is not None else time.monotonic() + budget
+        self._cancelled = threading.Event()
+        self._parent = parent
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or (self._parent is not None and self._parent.cancelled)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def check(self) -> None:
+        """Raise if the call was cancelled or has no time left."""
+        if self.cancelled:
+            raise RequestCancelled("Request cancelled by client")
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(f"Tool deadline of {self.budget:.0f}s exceeded")
+
+    def timeout(self, limit: float) -> float:
+        """An upstream timeout no longer than limit or the time left. Raises if none is left."""
+        self.check()
+        return min(limit, self.remaining())
+
+
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("mospi_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def check_deadline() -> None:
+    """Raise if the current tool call was cancelled or is out of time; no-op outside a tool call."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def child_deadline() -> Deadline:
+    """A deadline for work the caller may abandon early: bound by the current one (if any), cancellable on its own."""
+    parent = _current.get()
+    return Deadline(math.inf, parent)
+
+
+@contextmanager
+def use_deadline(deadline: Deadline) -> Iterator[Deadline]:
+    """Make deadline the current one, e.g. while submitting work that copies the context."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def upstream_timeout(limit: float) -> float:
+    """limit, capped by the current deadline if there is one."""
+    deadline = _current.get()
+    return limit if deadline is None else deadline.timeout(limit)
+
+
+def requested_budget(default: float) -> float:
+    """default, shortened by a valid X-MoSPI-Timeout header."""
+    try:
+        requested = float(get_http_headers(include_all=True).get(TIMEOUT_HEADER, ""))
+    except Exception:
+        return default
+    return min(default, requested) if requested > 0 else default
+
+
+class DeadlineMiddleware(Middleware):
+    """
+    Attaches a Deadline to each tool call and cancels it when the caller goes away.
+
+    The tool runs in its own task that the caller awaits through asyncio.shield:
+    a client disconnect cancels the wait immediately (sync tools otherwise only
+    notice after their worker thread returns) and flags the deadline so that
+    worker stops at its next check.
+    """
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool_name = getattr(context.message, 'name', 'unknown')
+        deadline = Deadline(requested_budget(TOOL_DEADLINES.get(tool_name, DEFAULT_DEADLINE)))
+
+        token = _current.set(deadline)
+        try:
+            # The task copies the current context, deadline included
+            task = asyncio.ensure_future(call_next(context))
+        finally:
+            _current.reset(token)
+        # Retrieve the outcome even if nobody awaits it any more
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            deadline.cancel()
+            raise
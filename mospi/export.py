@@ -0,0 +1,284 @@
+"""
+Arrow IPC / Parquet Exports
+Builds a downloadable columnar file from a 4_get_data query, for notebooks
+that would otherwise page through the tool and parse JSON record by record.
+
+- Upstream pages (limit/page) are fetched one after another and each page is
+  written to the output as one record batch, so only a page of records is held
+  as Python objects at a time.
+- Measures become float64 columns (parsed by mospi.normalize); dimension
+  columns (states, sectors, codes, periods) are dictionary-encoded strings.
+- The first page fixes the schema. Values on later pages that do not parse
+  in a float column are written as null, and fields the first page lacked
+  are left out; both are counted and reported in the export description.
+- Finished exports are kept in memory for MOSPI_EXPORT_TTL seconds within a
+  MOSPI_EXPORT_STORE_BYTES budget, and served as the MCP resource
+  mospi://exports/{id} and over HTTP at /exports/{id}.
+
+Requires the optional pyarrow package (requirements-optional.txt).
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from observability.metrics import Counter, Gauge, registry
+
+from .normalize import YEAR_FIELDS, Table, parse_numbers
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # optional
+    pa = None
+
+EXPORT_PAGE_SIZE = int(os.environ.get("MOSPI_EXPORT_PAGE_SIZE", "1000"))
+EXPORT_MAX_RECORDS = int(os.environ.get("MOSPI_EXPORT_MAX_RECORDS", "200000"))
+EXPORT_STORE_BYTES = int(os.environ.get("MOSPI_EXPORT_STORE_BYTES", str(256 * 1024 * 1024)))
+EXPORT_TTL = float(os.environ.get("MOSPI_EXPORT_TTL", "3600"))
+
+RESOURCE_PREFIX = "mospi://exports/"
+
+# format -> (MIME type, file extension)
+FORMATS: Dict[str, Tuple[str, str]] = {
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrows"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+export_bytes = registry.register(Counter(
+    "mospi_export_bytes_total", "Bytes of Arrow/Parquet exports produced.", ("format",)))
+export_store_bytes = registry.register(Gauge(
+    "mospi_export_store_bytes", "Memory held by finished exports."))
+
+
+@dataclass
+class Conformance:
+    """What fitting later pages to the first page's schema lost."""
+    # float column -> non-null values that did not parse and were written as null
+    coerced: Dict[str, int] = field(default_factory=dict)
+    # field missing from the schema -> non-null values left out
+    dropped: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, counts: Dict[str, int], name: str, count: int) -> None:
+        if count:
+            counts[name] = counts.get(name, 0) + count
+
+
+@dataclass
+class Export:
+    export_id: str
+    format: str
+    data: bytes
+    records: int
+    pages: int
+    schema: Dict[str, str]
+    truncated: bool
+    conformance: Conformance = field(default_factory=Conformance)
+    created: float = field(default_factory=time.monotonic)
+
+    @property
+    def mime_type(self) -> str:
+        return FORMATS[self.format][0]
+
+    @property
+    def filename(self) -> str:
+        return self.export_id + FORMATS[self.format][1]
+
+    def describe(self) -> Dict[str, Any]:
+        described = {
+            "export_id": self.export_id,
+            "resource": RESOURCE_PREFIX + self.export_id,
+            "url": f"/exports/{self.export_id}",
+            "format": self.format,
+            "mime_type": self.mime_type,
+            "records": self.records,
+            "pages": self.pages,
+            "bytes": len(self.data),
+            "truncated": self.truncated,
+            "schema": self.schema,
+            "expires_in": max(0, round(EXPORT_TTL - (time.monotonic() - self.created))),
+        }
+        if self.conformance.coerced:
+            described["coerced_to_null"] = self.conformance.coerced
+        if self.conformance.dropped:
+            described["dropped_fields"] = self.conformance.dropped
+        if self.conformance.coerced or self.conformance.dropped:
+            described["_warning"] = (
+                "Later pages did not fit the schema of the first page: coerced_to_null counts values "
+                "written as null in numeric columns, dropped_fields counts values of fields left out. "
+                "Narrow the filters or use 4_get_data for those records."
+            )
+        return described
+
+
+class ExportStore:
+    """Finished exports by id; oldest first out when over the byte budget or TTL."""
+
+    def __init__(self, max_bytes: int = EXPORT_STORE_BYTES, ttl: float = EXPORT_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._exports: "OrderedDict[str, Export]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, export: Export) -> None:
+        with self._lock:
+            self._exports[export.export_id] = export
+            self._bytes += len(export.data)
+            self._expire()
+            while self._bytes > self.max_bytes and len(self._exports) > 1:
+                self._remove(next(iter(self._exports)))
+            export_store_bytes.set(value=self._bytes)
+
+    def get(self, export_id: str) -> Optional[Export]:
+        with self._lock:
+            self._expire()
+            return self._exports.get(export_id)
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        while self._exports and next(iter(self._exports.values())).created < cutoff:
+            self._remove(next(iter(self._exports)))
+
+    def _remove(self, export_id: str) -> None:
+        self._bytes -= len(self._exports.pop(export_id).data)
+
+
+def fetch_pages(
+    fetch: Callable[[Dict[str, str]], Dict[str, Any]],
+    filters: Dict[str, str],
+    page_size: int = EXPORT_PAGE_SIZE,
+    max_records: int = EXPORT_MAX_RECORDS,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield the record lists of successive upstream pages.
+
+    Stops at an empty or short page, "No Data Found", or max_records. Raises
+    RuntimeError with the upstream message if a page fails.
+    """
+    fetched = 0
+    page = 1
+    while fetched < max_records:
+        size = min(page_size, max_records - fetched)
+        result = fetch({**filters, "limit": str(size), "page": str(page)})
+        if isinstance(result, dict) and "error" in result:
+            raise RuntimeError(result["error"])
+        records = result.get("data") if isinstance(result, dict) else None
+        if not isinstance(records, list) or not records:
+            return
+        fetched += len(records)
+        yield records
+        if len(records) < size:
+            return
+        page += 1
+
+
+def _string_array(values: np.ndarray) -> "pa.Array":
+    strings = [None if v is None else str(v) for v in values]
+    return pa.array(strings, type=pa.string()).dictionary_encode()
+
+
+def _period_array(table: Table) -> "pa.Array":
+    labels = table.period_labels().astype(object)
+    labels[labels == ""] = None
+    return _string_array(labels)
+
+
+def _number_array(number: np.ndarray, missing: np.ndarray) -> "pa.Array":
+    return pa.array(number, type=pa.float64(), mask=missing)
+
+
+def page_batch(
+    records: List[Dict[str, Any]],
+    schema: Optional["pa.Schema"] = None,
+    conformance: Optional[Conformance] = None,
+) -> "pa.RecordBatch":
+    """
+    One record batch for a page. The first page decides the schema (measures
+    float64, everything else dictionary strings); later pages are conformed to
+    it, and what that loses is counted in conformance.
+    """
+    conformance = conformance if conformance is not None else Conformance()
+    table = Table(records)
+    n = len(table)
+    columns: Dict[str, Any] = {}
+
+    if schema is None:
+        for name in table.fields:
+            if name in table.numbers:
+                parsed = table.numbers[name]
+                columns[name] = _number_array(parsed["number"], parsed["null"])
+            else:
+                columns[name] = _string_array(table.raw[name])
+        if any(name in table.raw for name in YEAR_FIELDS):
+            columns["_period"] = _period_array(table)
+        return pa.RecordBatch.from_pydict(columns)
+
+    for name in table.fields:
+        if schema.get_field_index(name) < 0:
+            conformance.add(conformance.dropped, name, int(np.sum(table.raw[name] != None)))  # noqa: E711
+
+    for schema_field in schema:
+        name = schema_field.name
+        if name == "_period":
+            columns[name] = _period_array(table)
+        elif name not in table.raw:
+            columns[name] = pa.nulls(n, type=schema_field.type)
+        elif pa.types.is_floating(schema_field.type):
+            parsed = table.numbers.get(name) or parse_numbers(table.raw[name])
+            unparsed = ~parsed["null"] & ~parsed["parsed"]
+            conformance.add(conformance.coerced, name, int(unparsed.sum()))
+            columns[name] = _number_array(parsed["number"], parsed["null"] | unparsed)
+        else:
+            columns[name] = _string_array(table.raw[name])
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+def write_export(pages: Iterator[List[Dict[str, Any]]], fmt: str, truncated_at: Optional[int] = None) -> Export:
+    """Stream pages into an Arrow IPC stream or a Parquet file held in memory."""
+    if pa is None:
+        raise RuntimeError("Exports need the optional pyarrow package (pip install pyarrow)")
+    sink = pa.BufferOutputStream()
+    writer = None
+    schema = None
+    conformance = Conformance()
+    records = page_count = 0
+    try:
+        for page in pages:
+            batch = page_batch(page, schema, conformance)
+            if writer is None:
+                schema = batch.schema
+                if fmt == "parquet":
+                    writer = pq.ParquetWriter(sink, schema)
+                else:
+                    writer = pa.ipc.new_stream(sink, schema)
+            writer.write_batch(batch)
+            records += batch.num_rows
+            page_count += 1
+    finally:
+        if writer is not None:
+            writer.close()
+
+    data = sink.getvalue().to_pybytes() if writer is not None else b""
+    export_bytes.inc(fmt, amount=len(data))
+    return Export(
+        export_id=uuid.uuid4().hex[:16],
+        format=fmt,
+        data=data,
+        records=records,
+        pages=page_count,
+        schema={f.name: str(f.type) for f in schema} if schema is not None else {},
+        truncated=truncated_at is not None and records >= truncated_at,
+        conformance=conformance,
+    )
+
+
+# Global instance
+export_store = ExportStore()
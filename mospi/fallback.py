@@ -0,0 +1,128 @@
+"""
+"No Data Found" Handling for get_data
+Two things keep an empty answer from costing the model several round trips:
+
+- NegativeCache remembers filter combinations MoSPI answered with
+  "No Data Found" for MOSPI_NEGATIVE_CACHE_TTL seconds, so repeating one does
+  not go upstream again.
+- With MOSPI_NO_DATA_FALLBACK=1, get_data tries the relaxations the _hint
+  suggests by itself: each variant drops one optional filter (alternative
+  code params such as broad_industry_work_code / nic_group_code first). The
+  variants run concurrently and the first one that returns data is used,
+  annotated with _relaxed so the caller knows which filter was dropped.
+
+Keys are canonical filters (mospi.canonical), so spelling differences share
+an entry.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from observability.metrics import record_cache
+
+NEGATIVE_CACHE_TTL = float(os.environ.get("MOSPI_NEGATIVE_CACHE_TTL", "300"))
+NEGATIVE_CACHE_ENTRIES = int(os.environ.get("MOSPI_NEGATIVE_CACHE_ENTRIES", "1024"))
+NO_DATA_FALLBACK = os.environ.get("MOSPI_NO_DATA_FALLBACK", "0") == "1"
+MAX_RELAXATIONS = int(os.environ.get("MOSPI_MAX_RELAXATIONS", "4"))
+
+NO_DATA_MSG = "No Data Found"
+
+# Filters that name the same concept under different code lists; dropped first
+ALTERNATE_PARAMS: Tuple[Tuple[str, str], ...] = (
+    ("broad_industry_work_code", "nic_group_code"),
+)
+
+# Params that never count as a relaxation
+FIXED_PARAMS = ("limit", "page", "Format")
+
+
+def is_no_data(result: Any) -> bool:
+    return isinstance(result, dict) and result.get("msg") == NO_DATA_MSG
+
+
+def has_data(result: Any) -> bool:
+    return isinstance(result, dict) and "error" not in result and bool(result.get("data"))
+
+
+class NegativeCache:
+    """Bounded set of (dataset, canonical filters) known to return no data, with a TTL."""
+
+    def __init__(self, ttl: float = NEGATIVE_CACHE_TTL, max_entries: int = NEGATIVE_CACHE_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Tuple[Tuple[str, str], ...]], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(dataset: str, filters: Dict[str, str]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+        return dataset, tuple(sorted(filters.items()))
+
+    def add(self, dataset: str, filters: Dict[str, str]) -> None:
+        if self.ttl <= 0:
+            return
+        key = self._key(dataset, filters)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = time.monotonic() + self.ttl
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def contains(self, dataset: str, filters: Dict[str, str], record: bool = True) -> bool:
+        key = self._key(dataset, filters)
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                expires_at = None
+        if record:
+            record_cache("negative", expires_at is not None)
+        return expires_at is not None
+
+
+def no_data_result() -> Dict[str, Any]:
+    """What get_data returns for a negatively cached combination."""
+    return {"msg": NO_DATA_MSG, "_negative_cache": True}
+
+
+def plan_relaxations(
+    filters: Dict[str, str],
+    param_defs: List[Dict[str, Any]],
+    max_variants: int = MAX_RELAXATIONS,
+) -> List[Tuple[str, Dict[str, str]]]:
+    """
+    (dropped param, relaxed filters) variants, one optional filter dropped each.
+
+    Alternate-code params come first, then the other optional filters in the
+    order they were given. Required params (per swagger) are never dropped.
+    """
+    required = {p["name"] for p in param_defs if p.get("required")}
+    droppable = [name for name in filters if name not in required and name not in FIXED_PARAMS]
+    alternates = {name for pair in ALTERNATE_PARAMS for name in pair}
+    ordered = [n for n in droppable if n in alternates] + [n for n in droppable if n not in alternates]
+    return [
+        (name, {k: v for k, v in filters.items() if k != name})
+        for name in ordered[:max_variants]
+    ]
+
+
+def annotate_relaxed(result: Dict[str, Any], dropped: str, original: Dict[str, str]) -> Dict[str, Any]:
+    result["_relaxed"] = {
+        "dropped_filters": [dropped],
+        "original_filters": original,
+        "reason": f"No data for the original filters; retried without {dropped}.",
+    }
+    result["_hint"] = (
+        f"Returned data WITHOUT the '{dropped}' filter because the original combination had no data. "
+        f"Records may cover every value of {dropped}; filter them yourself or tell the user."
+    )
+    return result
+
+
+# Global instance
+negative_cache = NegativeCache()
@@ -0,0 +1,275 @@
+"""
+Numeric Normalization of Data Records
+MoSPI returns measures as strings in mixed formats ("1,234.5", "12.3 (P)",
+"5.6%", "NA", "-"). This stage turns a response's records into typed columns
+in one pass per column, so the tool returns real numbers and downstream code
+(stitching, comparisons, sorting by period) works on NumPy arrays.
+
+Per column, the distinct strings are parsed once (np.unique + inverse index)
+and the results are broadcast back to every row:
+- placeholders ("", "-", "NA", "n.a.", "*", ...) become null
+- numbers lose thousands separators; status markers such as (P) / (R) are
+  split off into a "<field>_status" column
+- a unit prefix/suffix from a fixed list (Rs., %, crore, lakh, ...) is
+  extracted; a column-wide unit is reported once in _schema, mixed units stay
+  per record as "<field>_unit"; any other trailing word ("1 Rural") makes the
+  value text
+- period fields (year / financial_year "2022-23", month and quarter codes or
+  names) become a sortable "_period" label: "2022-23", "2023-04", "2022-23-Q1"
+
+A column is treated as numeric only if every non-null value parses; codes,
+ids, NIC classifications and period fields are never converted, and values
+with leading zeros ("01") or outside the float range ("1e400") do not parse.
+
+- MOSPI_NORMALIZE_DATA=0 returns records exactly as MoSPI sent them
+"""
+
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+NORMALIZE_DATA = os.environ.get("MOSPI_NORMALIZE_DATA", "1") != "0"
+
+NULL_TOKENS = np.array(["", "-", "--", "---", "na", "n.a.", "n.a", "nan", "none", "null", "nil", "*", "**", "..", "...", "@", "x"])
+
+STATUS_MARKERS = {"p": "provisional", "r": "revised", "q": "quick", "f": "final", "e": "estimate"}
+
+# Fields describing when a record applies
+YEAR_FIELDS = ("year", "financial_year")
+MONTH_FIELDS = ("month_code", "month")
+QUARTER_FIELDS = ("quarter_code", "quarterly_code", "quarter")
+
+MONTHS = {name: number for number, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+
+# Quarters of the Indian financial year by their first month (Apr-Jun is Q1)
+FY_QUARTER_BY_MONTH = {4: 1, 7: 2, 10: 3, 1: 4}
+
+# Units accepted after a number; anything else ("1 Rural") keeps the column as text
+UNITS = (
+    "%", "per cent", "percent", "crore", "crores", "lakh", "lakhs", "thousand", "million", "billion",
+    "tonnes", "tonne", "mt", "kg", "kwh", "gwh", "mw", "ktoe", "pj", "number", "no.", "nos.",
+)
+
+_NUMBER_RE = re.compile(
+    r"^(?P<prefix>Rs\.?|INR|₹|\$)?\s*"
+    r"(?P<number>[-+]?(?:\d[\d,]*\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*"
+    r"(?P<unit>" + "|".join(re.escape(u) for u in sorted(UNITS, key=len, reverse=True)) + r")?\s*"
+    r"(?:\((?P<status>[A-Za-z]{1,3})\.?\))?$",
+    re.IGNORECASE,
+)
+# "01", "007": codes, not numbers ("0", "0.5" and "-0.25" are numbers)
+_LEADING_ZERO_RE = re.compile(r"^[-+]?0\d")
+_YEAR_RE = re.compile(r"(\d{4})(?:\s*-\s*(\d{2,4}))?")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _is_identifier(field: str) -> bool:
+    """Codes, ids, NIC classifications and period fields keep their original strings."""
+    name = field.lower()
+    return (
+        name.endswith("code") or name.endswith("_id") or name == "id"
+        or name in YEAR_FIELDS or name in MONTH_FIELDS or name in QUARTER_FIELDS
+        or name.startswith("_") or "year" in name
+        or name.startswith("nic") or name.endswith("digit")
+    )
+
+
+def _text(values: np.ndarray) -> np.ndarray:
+    """Object column -> stripped unicode array (None -> 'none')."""
+    return np.char.strip(values.astype(str))
+
+
+def parse_numbers(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Parse a column of raw values.
+
+    Returns arrays aligned with values: number (float64, NaN when null or
+    unparsed), null (bool), parsed (bool), unit and status (str, '' when absent).
+    """
+    uniques, inverse = np.unique(_text(values), return_inverse=True)
+    null = np.isin(np.char.lower(uniques), NULL_TOKENS)
+
+    number = np.full(len(uniques), np.nan)
+    parsed = np.zeros(len(uniques), dtype=bool)
+    unit = np.full(len(uniques), "", dtype=object)
+    status = np.full(len(uniques), "", dtype=object)
+    for i in np.nonzero(~null)[0]:
+        match = _NUMBER_RE.match(uniques[i])
+        if match is None:
+            continue
+        digits = match.group("number")
+        if _LEADING_ZERO_RE.match(digits):
+            continue
+        try:
+            value = float(digits.replace(",", ""))
+        except ValueError:
+            continue
+        if not math.isfinite(value):
+            # "1e400" would serialize as Infinity, which is not JSON
+            continue
+        number[i] = value
+        parsed[i] = True
+        unit[i] = " ".join(u.strip() for u in (match.group("prefix"), match.group("unit")) if u)
+        marker = (match.group("status") or "").lower()
+        status[i] = STATUS_MARKERS.get(marker, marker)
+
+    return {
+        "number": number[inverse],
+        "null": null[inverse],
+        "parsed": parsed[inverse],
+        "unit": unit[inverse],
+        "status": status[inverse],
+    }
+
+
+def parse_years(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(start year, is financial year) per value; -1 where no year is found."""
+    uniques, inverse = np.unique(_text(values), return_inverse=True)
+    start = np.full(len(uniques), -1, dtype=np.int64)
+    fiscal = np.zeros(len(uniques), dtype=bool)
+    for i, value in enumerate(uniques):
+        match = _YEAR_RE.search(value)
+        if match:
+            start[i] = int(match.group(1))
+            fiscal[i] = match.group(2) is not None
+    return start[inverse], fiscal[inverse]
+
+
+def parse_months(values: np.ndarray) -> np.ndarray:
+    """Month number 1-12 from codes ('4', '04') or names ('April', 'Apr'); 0 if unknown."""
+    uniques, inverse = np.unique(np.char.lower(_text(values)), return_inverse=True)
+    month = np.zeros(len(uniques), dtype=np.int64)
+    for i, value in enumerate(uniques):
+        if value.isdigit():
+            month[i] = int(value) if 1 <= int(value) <= 12 else 0
+        else:
+            month[i] = MONTHS.get(value[:3], 0)
+    return month[inverse]
+
+
+def parse_quarters(values: np.ndarray) -> np.ndarray:
+    """Quarter 1-4 from '1', 'Q1' or a month range such as 'Apr-Jun' (financial-year quarters); 0 if unknown."""
+    uniques, inverse = np.unique(np.char.lower(_text(values)), return_inverse=True)
+    quarter = np.zeros(len(uniques), dtype=np.int64)
+    for i, value in enumerate(uniques):
+        digits = _DIGITS_RE.search(value)
+        if digits and len(digits.group()) == 1:
+            quarter[i] = int(digits.group()) if 1 <= int(digits.group()) <= 4 else 0
+        else:
+            quarter[i] = FY_QUARTER_BY_MONTH.get(MONTHS.get(value[:3], 0), 0)
+    return quarter[inverse]
+
+
+class Table:
+    """Columnar view of a list of records: one object array per field plus parsed columns."""
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+        self.fields: List[str] = list(dict.fromkeys(field for record in records for field in record))
+        self.raw: Dict[str, np.ndarray] = {}
+        for field in self.fields:
+            column = np.empty(len(records), dtype=object)
+            column[:] = [record.get(field) for record in records]
+            self.raw[field] = column
+        self.numbers: Dict[str, Dict[str, np.ndarray]] = {}
+        for field in self.fields:
+            if _is_identifier(field):
+                continue
+            parsed = parse_numbers(self.raw[field])
+            present = ~parsed["null"]
+            if present.any() and parsed["parsed"][present].all():
+                self.numbers[field] = parsed
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def number(self, field: str) -> np.ndarray:
+        """float64 column (NaN for nulls); raises KeyError for non-numeric fields."""
+        return self.numbers[field]["number"]
+
+    def _first(self, fields: Tuple[str, ...]) -> Optional[np.ndarray]:
+        """First of fields present in any record, with missing values filled from the next ones."""
+        column = None
+        for field in fields:
+            if field in self.raw:
+                values = self.raw[field]
+                column = values if column is None else np.where(column == None, values, column)  # noqa: E711
+        return column
+
+    def periods(self) -> Dict[str, np.ndarray]:
+        """year (start year, -1 if none), fiscal (bool), month and quarter (0 if none) per record."""
+        n = len(self.records)
+        years = self._first(YEAR_FIELDS)
+        months = self._first(MONTH_FIELDS)
+        quarters = self._first(QUARTER_FIELDS)
+        year, fiscal = parse_years(years) if years is not None else (np.full(n, -1), np.zeros(n, dtype=bool))
+        return {
+            "year": year,
+            "fiscal": fiscal,
+            "month": parse_months(months) if months is not None else np.zeros(n, dtype=np.int64),
+            "quarter": parse_quarters(quarters) if quarters is not None else np.zeros(n, dtype=np.int64),
+        }
+
+    def period_labels(self) -> np.ndarray:
+        """Sortable labels: 'YYYY-MM' for months, '<year>-Q<n>' for quarters, else the year ('2022-23' or '2022')."""
+        p = self.periods()
+        year = p["year"]
+        fy_label = np.char.add(np.char.add(year.astype(str), "-"), np.char.zfill(((year + 1) % 100).astype(str), 2))
+        year_label = np.where(p["fiscal"], fy_label, year.astype(str))
+        # Months in a financial year: April..December belong to the start year
+        calendar_year = np.where(p["fiscal"] & (p["month"] < 4), year + 1, year)
+        month_label = np.char.add(np.char.add(calendar_year.astype(str), "-"), np.char.zfill(p["month"].astype(str), 2))
+        quarter_label = np.char.add(np.char.add(year_label, "-Q"), p["quarter"].astype(str))
+        labels = np.where(p["month"] > 0, month_label, np.where(p["quarter"] > 0, quarter_label, year_label))
+        return np.where(year >= 0, labels, "")
+
+    def to_records(self) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Records with typed measures and _period, plus a _schema describing the numeric columns."""
+        out = [dict(record) for record in self.records]
+        schema: Dict[str, Any] = {}
+        for field, parsed in self.numbers.items():
+            number, null = parsed["number"], parsed["null"]
+            finite = number[~null]
+            if finite.size and np.all(finite == np.round(finite)) and np.all(np.abs(finite) < 2 ** 53):
+                values = np.where(null, 0, number).astype(np.int64).tolist()
+                kind = "integer"
+            else:
+                values = number.tolist()
+                kind = "number"
+            units = sorted({u for u in parsed["unit"][~null] if u})
+            has_status = bool(np.any(parsed["status"] != ""))
+            for i, record in enumerate(out):
+                record[field] = None if null[i] else values[i]
+                if len(units) > 1 and parsed["unit"][i]:
+                    record[f"{field}_unit"] = parsed["unit"][i]
+                if has_status and parsed["status"][i]:
+                    record[f"{field}_status"] = parsed["status"][i]
+            column = {"type": kind, "nulls": int(null.sum())}
+            if len(units) == 1:
+                column["unit"] = units[0]
+            elif units:
+                column["units"] = units
+            schema[field] = column
+
+        if any(f in self.raw for f in YEAR_FIELDS):
+            for record, label in zip(out, self.period_labels().tolist()):
+                if label:
+                    record["_period"] = label
+        return out, schema
+
+
+def normalize_result(result: Any) -> Any:
+    """Normalize the data records of a get_data response in place; other responses pass through."""
+    if not isinstance(result, dict):
+        return result
+    records = result.get("data")
+    if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+        return result
+    result["data"], schema = Table(records).to_records()
+    if schema:
+        result["_schema"] = schema
+    return result
@@ -0,0 +1,415 @@
+"""
+Per-Client Fair-Share Rate Limiting
+Token buckets per client IP and per MCP session, plus a weighted fair queue
+in front of the tools that call the MoSPI API, so one looping agent cannot
+take the whole upstream budget from everyone else.
+
+- Each call costs TOOL_COSTS[tool] tokens from both the IP and the session bucket;
+  an empty bucket rejects immediately with the exact wait in retry_after, and
+  neither bucket is charged. A call without a client address (stdio) or session
+  skips that bucket rather than sharing one with every other anonymous caller.
+- The client IP is the peer address of the connection. X-Forwarded-For is only
+  read when the peer is one of MOSPI_TRUSTED_PROXIES (IPs or CIDRs), and then
+  the right-most hop that is not a trusted proxy is the client, so a caller
+  cannot pick a fresh bucket by rewriting the header.
+- Upstream tools then take one of MAX_CONCURRENT slots in their dataset's queue
+  (the same families as the bulkheads in mospi.bulkhead), so calls stuck on a
+  slow dataset cannot hold the slots other datasets' calls need. When all are
+  busy, waiters are served in weighted-fair order (virtual finish time =
+  start + cost / weight), so a client with many queued calls cannot starve one
+  with a single call. Across priority classes (mospi.scheduler), metadata
+  calls go ahead of data and bulk calls, with the same aging as the bulkheads.
+- A full queue or an over-long expected wait also rejects immediately.
+
+Rejections are returned as the usual {"error": ...} tool result with
+retry_after (seconds) and "retryable": true.
+"""
+
+import asyncio
+import heapq
+import ipaddress
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from fastmcp.server.dependencies import get_http_headers, get_http_request
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from fastmcp.tools.tool import ToolResult
+
+from observability.metrics import Counter, Gauge, registry
+
+from .deadline import current_deadline
+from .scheduler import DATA, current_class, effective_priority, rank
+
+# Tokens per second / bucket size; a rate of 0 disables that limit
+IP_RATE = float(os.environ.get("MOSPI_RATE_LIMIT", "5"))
+IP_BURST = float(os.environ.get("MOSPI_RATE_BURST", "30"))
+SESSION_RATE = float(os.environ.get("MOSPI_SESSION_RATE_LIMIT", "3"))
+SESSION_BURST = float(os.environ.get("MOSPI_SESSION_RATE_BURST", "20"))
+
+# Reverse proxies whose X-Forwarded-For is believed, e.g. "10.0.0.0/8,127.0.0.1"
+TRUSTED_PROXIES = os.environ.get("MOSPI_TRUSTED_PROXIES", "")
+
+# Fair queue in front of upstream tools
+MAX_CONCURRENT = int(os.environ.get("MOSPI_RATE_MAX_CONCURRENT", "8"))
+MAX_QUEUE = int(os.environ.get("MOSPI_RATE_MAX_QUEUE", "64"))
+MAX_WAIT = float(os.environ.get("MOSPI_RATE_MAX_WAIT", "10"))
+
+# Token cost per call, roughly the number of upstream requests a call makes
+DEFAULT_COST = 1.0
+TOOL_COSTS: Dict[str, float] = {
+    "1_know_about_mospi_api": 0.25,
+    "lookup_mospi_codes": 0.25,
+    "estimate_data": 0.25,
+    "wpi_hierarchy": 0.25,
+    "2_get_indicators": 1.0,
+    "3_get_metadata": 1.0,
+    "4_get_data": 2.0,
+    "get_wpi_subtree": 3.0,
+    "get_long_series": 4.0,
+    "export_data": 8.0,
+}
+
+# Tools answered from memory; they skip the fair queue. lookup_mospi_codes and
+# wpi_hierarchy are not among them: on a cold catalogue they fetch metadata upstream.
+LOCAL_TOOLS = {"1_know_about_mospi_api", "estimate_data"}
+
+# Fair queues per dataset family; other dataset names share one queue
+DATASET_QUEUES = {"PLFS", "CPI", "IIP", "ASI", "NAS", "WPI", "ENERGY"}
+SHARED_QUEUE = "OTHER"
+# Tools whose dataset is implied rather than passed as an argument
+TOOL_QUEUES: Dict[str, str] = {"get_wpi_subtree": "WPI", "wpi_hierarchy": "WPI"}
+
+# Buckets idle this long are full again and can be forgotten
+BUCKET_IDLE_SECONDS = 600.0
+
+rate_limited = registry.register(Counter(
+    "mospi_rate_limited_total", "Tool calls rejected by the rate limiter.", ("tool", "reason")))
+fair_queue_depth = registry.register(Gauge(
+    "mospi_fair_queue_depth", "Upstream tool calls waiting for a slot, over all dataset queues."))
+fair_queue_active = registry.register(Gauge(
+    "mospi_fair_queue_active", "Upstream tool calls holding a slot, over all dataset queues."))
+
+
+class TokenBucket:
+    """Classic token bucket; refilled lazily on each acquire."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def wait(self, cost: float, now: float) -> float:
+        """Seconds until cost tokens exist (0 if they do now); takes nothing."""
+        # now may predate a bucket created after it was read
+        self.tokens = min(self.burst, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= cost else (cost - self.tokens) / self.rate
+
+    def acquire(self, cost: float, now: float) -> float:
+        """Take cost tokens. Returns 0 on success, else seconds until enough tokens exist."""
+        wait = self.wait(cost, now)
+        if not wait:
+            self.tokens -= cost
+        return wait
+
+
+class BucketTable:
+    """Token buckets keyed by client; idle buckets are swept periodically."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def wait(self, key: str, cost: float) -> float:
+        """Seconds until key's bucket could pay cost; charges nothing."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            bucket = self._buckets.get(key)
+            return 0.0 if bucket is None else bucket.wait(min(cost, self.burst), time.monotonic())
+
+    def acquire(self, key: str, cost: float) -> float:
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            wait = bucket.acquire(min(cost, self.burst), now)
+            if now - self._last_sweep > BUCKET_IDLE_SECONDS:
+                self._sweep(now)
+        return wait
+
+    def _sweep(self, now: float) -> None:
+        self._last_sweep = now
+        for key in [k for k, b in self._buckets.items() if now - b.updated > BUCKET_IDLE_SECONDS]:
+            del self._buckets[key]
+
+
+class FairQueue:
+    """
+    Weighted fair queue over a fixed number of slots (event-loop only, no locking).
+
+    Waiters are grouped by priority class (mospi.scheduler). A freed slot goes to
+    the class with the best aged priority, judged by its longest-waiting call, so
+    metadata calls overtake bulk pulls without starving them. Within a class,
+    waiters are ordered by virtual finish time: max(virtual clock, client's last
+    finish) + cost / weight. A client that floods the queue pushes its own later
+    calls back, while a newcomer's first call lands near the front.
+    """
+
+    def __init__(self, slots: int = MAX_CONCURRENT, max_queue: int = MAX_QUEUE):
+        self.slots = slots
+        self.max_queue = max_queue
+        self.active = 0
+        # class rank -> heap of (finish, sequence, enqueued, future)
+        self._heaps: Dict[int, list] = {}
+        self._waiting = 0
+        self._virtual_time = 0.0
+        self._finish: Dict[str, float] = {}
+        self._sequence = itertools.count()
+        self._mean_hold = 1.0
+
+    def __len__(self) -> int:
+        return self._waiting
+
+    def estimated_wait(self) -> float:
+        """Rough wait for a new caller: queue ahead of it drained by all slots."""
+        return (self._waiting + 1) * self._mean_hold / max(1, self.slots)
+
+    async def acquire(
+        self,
+        client: str,
+        cost: float,
+        weight: float = 1.0,
+        timeout: float = MAX_WAIT,
+        priority_class: str = DATA,
+    ) -> bool:
+        """Wait for a slot. Returns False if none was granted within timeout."""
+        if self.active < self.slots and not self._waiting:
+            self.active += 1
+            return True
+        start = max(self._virtual_time, self._finish.get(client, 0.0))
+        finish = start + cost / max(weight, 1e-6)
+        self._finish[client] = finish
+        future = asyncio.get_running_loop().create_future()
+        heap = self._heaps.setdefault(rank(priority_class), [])
+        heapq.heappush(heap, (finish, next(self._sequence), time.monotonic(), future))
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up: pass it on
+                self.release()
+            else:
+                self._waiting -= 1
+            if isinstance(e, asyncio.TimeoutError):
+                return False
+            raise
+        return True
+
+    def release(self, held: Optional[float] = None) -> None:
+        """Free a slot (held = seconds it was held) and hand it to the next fair waiter."""
+        if held is not None:
+            self._mean_hold = 0.9 * self._mean_hold + 0.1 * held
+        heap = self._next_heap()
+        if heap is not None:
+            finish, _, _, future = heapq.heappop(heap)
+            self._virtual_time = finish
+            self._waiting -= 1
+            future.set_result(None)
+            return
+        self.active -= 1
+        if not self.active:
+            # Idle: forget per-client finish times so they do not grow without bound
+            self._finish.clear()
+
+    def _next_heap(self) -> Optional[list]:
+        """Heap of the class whose longest waiter has the best aged priority; None if nobody waits."""
+        now = time.monotonic()
+        best, best_score = None, None
+        for class_rank, heap in self._heaps.items():
+            # Drop waiters that timed out or were cancelled
+            while heap and heap[0][3].done():
+                heapq.heappop(heap)
+            if not heap:
+                continue
+            oldest = min(enqueued for _, _, enqueued, future in heap if not future.done())
+            score = effective_priority(class_rank, now - oldest)
+            if best_score is None or score < best_score:
+                best, best_score = heap, score
+        return best
+
+
+def retry_result(tool: str, reason: str, retry_after: float, message: str) -> ToolResult:
+    """Fast rejection in the tools' {"error": ...} shape."""
+    rate_limited.inc(tool, reason)
+    payload = {
+        "error": message,
+        "reason": reason,
+        "retry_after": round(max(retry_after, 0.001), 3),
+        "retryable": True,
+        "statusCode": False,
+    }
+    return ToolResult(content=json.dumps(payload), structured_content=payload)
+
+
+def queue_name(tool: str, arguments: Any) -> str:
+    """Dataset family whose fair queue a call waits in: 'cpi_item' -> 'CPI'."""
+    if tool in TOOL_QUEUES:
+        return TOOL_QUEUES[tool]
+    dataset = arguments.get("dataset") if isinstance(arguments, dict) else None
+    family = dataset.strip().upper().split("_")[0] if isinstance(dataset, str) else ""
+    return family if family in DATASET_QUEUES else SHARED_QUEUE
+
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_networks(value: str) -> List[Network]:
+    """'10.0.0.0/8, 127.0.0.1' -> networks; malformed entries are ignored."""
+    networks = []
+    for entry in value.split(","):
+        try:
+            networks.append(ipaddress.ip_network(entry.strip(), strict=False))
+        except ValueError:
+            continue
+    return networks
+
+
+def _trusted(address: str, proxies: List[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip.version == net.version and ip in net for net in proxies)
+
+
+def client_ip(peer: Optional[str], forwarded_for: str, proxies: List[Network]) -> Optional[str]:
+    """
+    Client address for rate limiting: the peer, unless the peer is a trusted proxy,
+    in which case the right-most X-Forwarded-For hop that is not a trusted proxy.
+    """
+    if not peer or not _trusted(peer, proxies):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _trusted(hop, proxies):
+            return hop
+    # Every hop is a trusted proxy: the left-most is as close to the client as we know
+    return hops[0] if hops else peer
+
+
+trusted_proxies = parse_networks(TRUSTED_PROXIES)
+
+
+def client_keys(context: MiddlewareContext) -> Tuple[Optional[str], Optional[str]]:
+    """(client IP, MCP session id); None where the transport does not identify the client."""
+    try:
+        peer = get_http_request().client
+        peer_host = peer.host if peer is not None else None
+    except Exception:
+        peer_host = None
+    forwarded_for = ""
+    if peer_host and trusted_proxies:
+        try:
+            forwarded_for = get_http_headers(include_all=True).get("x-forwarded-for", "")
+        except Exception:
+            forwarded_for = ""
+    ip = client_ip(peer_host, forwarded_for, trusted_proxies)
+    try:
+        session = getattr(context.fastmcp_context, 'session_id', None)
+    except Exception:
+        session = None
+    return ip, session
+
+
+class RateLimitMiddleware(Middleware):
+    """Enforces per-IP and per-session token buckets and fair-shares upstream slots per dataset."""
+
+    def __init__(
+        self,
+        ip_buckets: Optional[BucketTable] = None,
+        session_buckets: Optional[BucketTable] = None,
+        slots: int = MAX_CONCURRENT,
+        max_queue: int = MAX_QUEUE,
+        weights: Optional[Dict[str, float]] = None,
+    ):
+        super().__init__()
+        self.ip_buckets = ip_buckets or BucketTable(IP_RATE, IP_BURST)
+        self.session_buckets = session_buckets or BucketTable(SESSION_RATE, SESSION_BURST)
+        self.slots = slots
+        self.max_queue = max_queue
+        self.queues: Dict[str, FairQueue] = {}
+        # Optional per-client (IP or session) weights for the fair queue; default 1
+        self.weights = weights or {}
+
+    def queue_for(self, name: str) -> FairQueue:
+        queue = self.queues.get(name)
+        if queue is None:
+            queue = self.queues[name] = FairQueue(self.slots, self.max_queue)
+        return queue
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool_name = getattr(context.message, 'name', 'unknown')
+        cost = TOOL_COSTS.get(tool_name, DEFAULT_COST)
+        ip, session = client_keys(context)
+
+        # Check both buckets before charging either, so a rejected call costs nothing
+        if ip:
+            wait = self.ip_buckets.wait(ip, cost)
+            if wait:
+                return retry_result(tool_name, "client_quota", wait,
+                                    f"Rate limit exceeded for this client. Retry after {wait:.1f}s.")
+        if session:
+            wait = self.session_buckets.wait(session, cost)
+            if wait:
+                return retry_result(tool_name, "session_quota", wait,
+                                    f"Rate limit exceeded for this session. Retry after {wait:.1f}s.")
+        # No await since the checks: nothing else on the event loop has charged these buckets
+        if ip:
+            self.ip_buckets.acquire(ip, cost)
+        if session:
+            self.session_buckets.acquire(session, cost)
+
+        if tool_name in LOCAL_TOOLS:
+            return await call_next(context)
+
+        queue = self.queue_for(queue_name(tool_name, getattr(context.message, 'arguments', None)))
+        if len(queue) >= queue.max_queue or queue.estimated_wait() > MAX_WAIT:
+            wait = queue.estimated_wait()
+            return retry_result(tool_name, "server_busy", wait,
+                                f"Server is at capacity. Retry after {wait:.1f}s.")
+
+        client = session or ip or "local"
+        fair_queue_depth.inc()
+        try:
+            deadline = current_deadline()
+            timeout = MAX_WAIT if deadline is None else max(0.0, min(MAX_WAIT, deadline.remaining()))
+            granted = await queue.acquire(client, cost, self.weights.get(client, 1.0), timeout, current_class())
+        finally:
+            fair_queue_depth.dec()
+        if not granted:
+            wait = queue.estimated_wait()
+            return retry_result(tool_name, "queue_timeout", wait,
+                                f"Timed out waiting for capacity. Retry after {wait:.1f}s.")
+
+        fair_queue_active.inc()
+        start = time.monotonic()
+        try:
+            return await call_next(context)
+        finally:
+            fair_queue_active.dec()
+            queue.release(time.monotonic() - start)
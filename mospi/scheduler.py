@@ -0,0 +1,131 @@
+"""
+Priority Classes for Upstream Scheduling
+Tool calls are classified once per call; the class travels in a contextvar to
+admission control, the rate limiter's fair queues and the upstream client's
+dataset bulkheads, each of which grants free slots to the waiter with the best
+effective priority instead of first come.
+
+Classes (lower runs first):
+- interactive (0): 1_know_about_mospi_api, 2_get_indicators, 3_get_metadata,
+  lookup tools: small and on the critical path of every new session
+- data (1): 4_get_data with limit <= BULK_LIMIT
+- bulk (2): larger 4_get_data pulls, get_long_series, get_wpi_subtree, export_data
+
+A 4_get_data call without a limit is sized by the configured limit planner
+(the records get_data will fetch for it, see mospi.cardinality), not by
+MoSPI's default page of 10.
+
+Aging prevents starvation: a waiter's effective priority improves by one
+class every AGING_SECONDS it has waited, so a bulk pull queued behind a
+steady stream of metadata calls still gets a slot.
+
+- MOSPI_PRIORITY_BULK_LIMIT: 4_get_data limit above which a call is bulk (default 100)
+- MOSPI_PRIORITY_AGING_SECONDS: default 2
+- MOSPI_PRIORITY_CLASSES: per-tool overrides, e.g. "get_long_series=data,4_get_data=bulk"
+"""
+
+import contextvars
+import os
+from typing import Any, Callable, Dict, Optional
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+INTERACTIVE = "interactive"
+DATA = "data"
+BULK = "bulk"
+
+PRIORITIES: Dict[str, int] = {INTERACTIVE: 0, DATA: 1, BULK: 2}
+
+BULK_LIMIT = int(os.environ.get("MOSPI_PRIORITY_BULK_LIMIT", "100"))
+AGING_SECONDS = float(os.environ.get("MOSPI_PRIORITY_AGING_SECONDS", "2"))
+
+TOOL_CLASSES: Dict[str, str] = {
+    "1_know_about_mospi_api": INTERACTIVE,
+    "2_get_indicators": INTERACTIVE,
+    "3_get_metadata": INTERACTIVE,
+    "lookup_mospi_codes": INTERACTIVE,
+    "estimate_data": INTERACTIVE,
+    "wpi_hierarchy": INTERACTIVE,
+    "get_long_series": BULK,
+    "get_wpi_subtree": BULK,
+    "export_data": BULK,
+}
+
+
+def parse_classes(value: str) -> Dict[str, str]:
+    """'tool_a=bulk,tool_b=interactive' -> {...}; unknown class names are ignored."""
+    classes = {}
+    for entry in value.split(","):
+        tool, _, name = entry.partition("=")
+        if name.strip() in PRIORITIES:
+            classes[tool.strip()] = name.strip()
+    return classes
+
+
+TOOL_CLASSES.update(parse_classes(os.environ.get("MOSPI_PRIORITY_CLASSES", "")))
+
+
+# (dataset, filters) -> records an unlimited 4_get_data call will fetch, or None
+_limit_planner: Optional[Callable[[Any, Any], Optional[int]]] = None
+
+
+def configure_limit_planner(planner: Callable[[Any, Any], Optional[int]]) -> None:
+    global _limit_planner
+    _limit_planner = planner
+
+
+def _requested_records(arguments: Any) -> int:
+    """limit of a 4_get_data call, else what the planner will fetch, else MoSPI's default of 10."""
+    arguments = arguments if isinstance(arguments, dict) else {}
+    filters = arguments.get("filters") if isinstance(arguments.get("filters"), dict) else {}
+    try:
+        return int(filters["limit"])
+    except KeyError:
+        pass
+    except (TypeError, ValueError):
+        return 10
+    if _limit_planner is not None:
+        try:
+            planned = _limit_planner(arguments.get("dataset"), filters)
+        except Exception:
+            planned = None
+        if planned is not None:
+            return planned
+    return 10
+
+
+def classify(tool: str, arguments: Any) -> str:
+    """Priority class from the tool name and, for 4_get_data, the number of records it will fetch."""
+    if tool in TOOL_CLASSES:
+        return TOOL_CLASSES[tool]
+    if tool == "4_get_data":
+        return BULK if _requested_records(arguments) > BULK_LIMIT else DATA
+    return DATA
+
+
+_current: contextvars.ContextVar[str] = contextvars.ContextVar("mospi_priority", default=DATA)
+
+
+def current_class() -> str:
+    return _current.get()
+
+
+def rank(priority_class: str) -> int:
+    return PRIORITIES.get(priority_class, PRIORITIES[DATA])
+
+
+def effective_priority(rank_value: int, waited: float) -> float:
+    """Lower is better; improves by one class per AGING_SECONDS waited."""
+    return rank_value - waited / AGING_SECONDS
+
+
+class PriorityMiddleware(Middleware):
+    """Classifies each tool call and exposes the class to the upstream client via a contextvar."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool_name = getattr(context.message, 'name', 'unknown')
+        token = _current.set(classify(tool_name, getattr(context.message, 'arguments', None)))
+        try:
+            return await call_next(context)
+        finally:
+            _current.reset(token)
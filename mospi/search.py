@@ -0,0 +1,147 @@
+"""
+Indicator Search Index
+Offline BM25 ranking of indicators and filter labels across all MoSPI datasets.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .catalogue import iter_code_labels
+
+# BM25 parameters (standard Okapi defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Filter categories that describe where/when, not what — not useful for picking an indicator
+NON_SUBJECT_CATEGORIES = {
+    "state", "year", "financial_year", "month", "quarter", "sector", "series",
+    "base_year", "frequency", "classification_year", "type",
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "by", "for", "from", "how", "in", "is", "of",
+    "on", "or", "the", "to", "what", "which", "with", "show", "me", "give", "data",
+    "india", "indian", "all", "get", "find", "was", "were", "between", "per",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords and strip plurals."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class IndicatorIndex:
+    """
+    Inverted index with BM25 scoring over (dataset, category, code, label) documents.
+
+    Documents are grouped by source (one catalogue payload). Updating a source
+    replaces only that source's documents, so a catalogue refresh rebuilds the
+    index incrementally instead of from scratch.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        self._doc_terms: Dict[int, Counter] = {}
+        self._doc_lengths: Dict[int, int] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._sources: Dict[Tuple[str, str], List[int]] = {}
+        self._total_length = 0
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def update_source(self, dataset: str, source: str, payload: Any) -> int:
+        """Replace all documents of (dataset, source) with those found in payload."""
+        docs = []
+        seen = set()
+        for category, code, label in iter_code_labels(payload):
+            if category in NON_SUBJECT_CATEGORIES or (category, code) in seen:
+                continue
+            seen.add((category, code))
+            docs.append({"dataset": dataset, "category": category, "code": code, "label": label})
+
+        with self._lock:
+            for doc_id in self._sources.pop((dataset, source), []):
+                self._remove(doc_id)
+            ids = []
+            for doc in docs:
+                terms = Counter(tokenize(f"{doc['label']} {doc['category']}"))
+                if not terms:
+                    continue
+                doc_id = self._next_id
+                self._next_id += 1
+                self._docs[doc_id] = doc
+                self._doc_terms[doc_id] = terms
+                self._doc_lengths[doc_id] = sum(terms.values())
+                self._total_length += self._doc_lengths[doc_id]
+                for term, tf in terms.items():
+                    self._postings.setdefault(term, {})[doc_id] = tf
+                ids.append(doc_id)
+            self._sources[(dataset, source)] = ids
+        return len(ids)
+
+    def _remove(self, doc_id: int) -> None:
+        terms = self._doc_terms.pop(doc_id)
+        self._docs.pop(doc_id)
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(doc_id, None)
+            if not posting:
+                del self._postings[term]
+
+    def has_term(self, word: str) -> bool:
+        """True if word (after tokenizing) occurs in some indexed indicator label."""
+        terms = tokenize(word)
+        return bool(terms) and all(term in self._postings for term in terms)
+
+    def search(self, query: str, top_k: int = 5, dataset: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Rank documents against query. Returns top_k dicts with dataset, code, label and score."""
+        query_terms = set(tokenize(query or ""))
+        with self._lock:
+            n_docs = len(self._docs)
+            if not query_terms or not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: Dict[int, float] = {}
+            for term in query_terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                df = len(posting)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in posting.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            ranked = sorted(
+                (doc_id for doc_id in scores if dataset is None or self._docs[doc_id]["dataset"] == dataset),
+                key=lambda doc_id: scores[doc_id],
+                reverse=True,
+            )
+            return [
+                {**self._docs[doc_id], "score": round(scores[doc_id], 3)}
+                for doc_id in ranked[:top_k]
+            ]
+
+
+# Global instance
+indicator_index = IndicatorIndex()
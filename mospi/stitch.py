@@ -0,0 +1,255 @@
+"""
+Cross-Base-Year Series Stitching
+Plans per-base-year (CPI, IIP) or per-series (NAS) sub-requests for a long
+period and links the pieces into one continuous series using overlap-period
+ratios, computed for all dimension groups at once with NumPy.
+
+Series are matched across segments by their codes: a label with a code
+next to it (state / state_code) is left out of the group key, since labels
+are reworded between base years. Records that still land on the same
+(group, period) within a segment are reported under "collisions".
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .asi import financial_year, parse_year
+
+# Segments oldest -> newest: (value of the segmenting param, first year, last year).
+# Years are calendar years for CPI and start years of the financial year for IIP/NAS.
+# Coverage is approximate on purpose: overlaps are detected from the returned data.
+STITCH_SEGMENTS: Dict[str, Dict[str, Any]] = {
+    "CPI": {
+        "param": "base_year",
+        "segments": [("2010", 2011, 2014), ("2012", 2013, None)],
+    },
+    "IIP": {
+        "param": "base_year",
+        "segments": [("1993-94", 1994, 2011), ("2004-05", 2005, 2016), ("2011-12", 2012, None)],
+    },
+    "NAS": {
+        "param": "series",
+        "segments": [("Back", 2004, 2010), ("Current", 2011, None)],
+    },
+}
+
+# Fields that identify the period of a record
+PERIOD_FIELDS = ("year", "financial_year", "month", "month_code", "quarter", "quarterly_code", "quarter_code")
+
+# Fields that identify the base/series a record came from rather than what it measures
+BASE_FIELDS = ("base_year", "series", "baseyear", "base")
+
+# Preferred value fields, checked in order when a record has several numeric fields
+VALUE_FIELD_HINTS = ("index", "value", "price")
+
+# Collision examples listed in a stitched result
+COLLISION_EXAMPLES = 5
+
+MONTHS = {
+    name: number for number, name in enumerate(
+        ["january", "february", "march", "april", "may", "june", "july",
+         "august", "september", "october", "november", "december"], start=1)
+}
+
+_NUMBER_RE = re.compile(r"^-?\d+(\.\d+)?$")
+
+
+def to_float(value: Any) -> float:
+    """Parse '1,234.5' / 1234.5 to float; anything else becomes NaN."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value).replace(",", "").strip()
+    return float(text) if _NUMBER_RE.match(text) else float("nan")
+
+
+def year_param(dataset: str, filters: Dict[str, str]) -> str:
+    """Name of the year filter for a dataset (IIP annual uses financial_year)."""
+    if dataset == "IIP" and "month_code" not in filters:
+        return "financial_year"
+    return "year"
+
+
+def format_year(dataset: str, param: str, start: int) -> str:
+    """CPI/IIP monthly use YYYY; IIP annual and NAS use YYYY-YY."""
+    if dataset == "NAS" or param == "financial_year":
+        return financial_year(start)
+    return str(start)
+
+
+def plan_requests(dataset: str, filters: Dict[str, str], start_year: int, end_year: int) -> List[Dict[str, str]]:
+    """
+    One sub-request per base year / series whose coverage intersects [start_year, end_year].
+
+    Each request carries the years of the requested period that the segment covers,
+    so overlapping segments both return the overlap periods needed for linking.
+    """
+    spec = STITCH_SEGMENTS[dataset]
+    param = year_param(dataset, filters)
+    plans = []
+    for segment, first, last in spec["segments"]:
+        lo = max(start_year, first)
+        hi = min(end_year, last if last is not None else end_year)
+        if lo > hi:
+            continue
+        plans.append({
+            **filters,
+            spec["param"]: segment,
+            param: ",".join(format_year(dataset, param, y) for y in range(lo, hi + 1)),
+        })
+    return plans
+
+
+def period_key(record: Dict[str, Any]) -> Tuple[int, int, int]:
+    """Sortable (year, month, quarter) for a record."""
+    year = parse_year(record.get("year", record.get("financial_year"))) or 0
+    month = record.get("month_code", record.get("month"))
+    if month is not None and not str(month).strip().isdigit():
+        month = MONTHS.get(str(month).strip().lower())
+    quarter = record.get("quarter_code", record.get("quarterly_code", record.get("quarter")))
+    quarter_digits = re.sub(r"\D", "", str(quarter)) if quarter is not None else ""
+    return year, int(month or 0), int(quarter_digits or 0)
+
+
+def numeric_fields(records: List[Dict[str, Any]]) -> List[str]:
+    """Measure fields: numeric in every sampled record (codes, periods and base fields excluded)."""
+    if not records:
+        return []
+    sample = records[:50]
+    return [
+        field for field in sample[0]
+        if field not in PERIOD_FIELDS and field not in BASE_FIELDS
+        and not field.endswith("_code") and not field.startswith("_")
+        and any(r.get(field) not in (None, "") for r in sample)
+        and all(not np.isnan(to_float(r.get(field))) for r in sample if r.get(field) not in (None, ""))
+    ]
+
+
+def detect_value_field(records: List[Dict[str, Any]]) -> Optional[str]:
+    """Pick the numeric measure field, preferring names containing index/value/price."""
+    numeric = numeric_fields(records)
+    for hint in VALUE_FIELD_HINTS:
+        for field in numeric:
+            if hint in field.lower():
+                return field
+    return numeric[0] if len(numeric) == 1 else None
+
+
+def has_code(record: Dict[str, Any], field: str) -> bool:
+    """True if a label field has a code field next to it: state / state_name -> state_code."""
+    stem = field[:-len("_name")] if field.endswith("_name") else field
+    return f"{stem}_code" in record
+
+
+def dimension_key(record: Dict[str, Any], measures: List[str]) -> Tuple[Tuple[str, str], ...]:
+    """
+    What identifies the series a record belongs to (not period, base or measure):
+    its codes, plus any label that has no code.
+    """
+    return tuple(sorted(
+        (field, str(value).strip()) for field, value in record.items()
+        if field not in measures and field not in PERIOD_FIELDS and field not in BASE_FIELDS
+        and not field.startswith("_") and (field.endswith("_code") or not has_code(record, field))
+    ))
+
+
+def link_segments(
+    segments: List[Tuple[str, List[Dict[str, Any]]]],
+    value_field: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Link per-segment records (oldest -> newest) into one continuous series.
+
+    For every dimension group, the factor linking segment i to segment i+1 is
+    mean(new) / mean(old) over the periods both segments report. Factors are
+    chained back from the newest segment, which is the reference level. Each
+    period takes its value from the newest segment that reports it.
+    """
+    all_records = [r for _, records in segments for r in records]
+    value_field = value_field or detect_value_field(all_records)
+    if value_field is None:
+        return {"error": "Could not detect the value field to link on; pass value_field."}
+    measures = sorted(set(numeric_fields(all_records)) | {value_field})
+
+    # Axes shared by every segment: dimension groups x periods
+    groups = sorted({dimension_key(r, measures) for r in all_records})
+    periods = sorted({period_key(r) for r in all_records})
+    group_index = {g: i for i, g in enumerate(groups)}
+    period_index = {p: i for i, p in enumerate(periods)}
+
+    values = np.full((len(segments), len(groups), len(periods)), np.nan)
+    exemplars: Dict[Tuple[int, int, int], Dict[str, Any]] = {}
+    collisions: List[Dict[str, Any]] = []
+    collided = 0
+    for s, (_, records) in enumerate(segments):
+        for record in records:
+            g = group_index[dimension_key(record, measures)]
+            p = period_index[period_key(record)]
+            if (s, g, p) in exemplars:
+                # Same series and period twice in one segment: keep the first, report the rest
+                collided += 1
+                if len(collisions) < COLLISION_EXAMPLES:
+                    collisions.append({"segment": segments[s][0], "group": dict(groups[g]),
+                                       "period": list(periods[p]), "ignored": record.get(value_field)})
+                continue
+            values[s, g, p] = to_float(record.get(value_field))
+            exemplars[(s, g, p)] = record
+
+    # Pairwise overlap ratios for all groups at once
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    step_factors = np.ones((len(segments), len(groups)))
+    links = []
+    for s in range(len(segments) - 1):
+        overlap = present[s] & present[s + 1]
+        counts = overlap.sum(axis=1)
+        old_mean = np.where(overlap, filled[s], 0.0).sum(axis=1) / np.maximum(counts, 1)
+        new_mean = np.where(overlap, filled[s + 1], 0.0).sum(axis=1) / np.maximum(counts, 1)
+        linkable = (counts > 0) & (old_mean != 0)
+        step_factors[s] = np.where(linkable, new_mean / np.where(old_mean == 0, 1.0, old_mean), 1.0)
+        links.append({
+            "from": segments[s][0],
+            "to": segments[s + 1][0],
+            "method": "overlap_ratio" if linkable.any() else "splice",
+            "overlap_periods": int(overlap.any(axis=0).sum()),
+            "groups_linked": int(linkable.sum()),
+            "groups_spliced": int((~linkable).sum()),
+            "mean_factor": round(float(step_factors[s][linkable].mean()), 6) if linkable.any() else 1.0,
+        })
+
+    # Chain factors back from the newest segment: factor[s] = prod(step[s:])
+    chained = np.flip(np.cumprod(np.flip(step_factors[:-1], axis=0), axis=0), axis=0)
+    chained = np.vstack([chained, np.ones((1, len(groups)))])
+
+    # Newest reporting segment per (group, period)
+    newest = np.where(present.any(axis=0), len(segments) - 1 - np.argmax(np.flip(present, axis=0), axis=0), -1)
+
+    stitched = []
+    for g, p in zip(*np.nonzero(newest >= 0)):
+        s = newest[g, p]
+        factor = float(chained[s, g])
+        record = {
+            k: v for k, v in exemplars[(s, g, p)].items()
+            if k != value_field and k not in BASE_FIELDS
+        }
+        record[value_field] = round(float(values[s, g, p]) * factor, 6)
+        record["_source"] = segments[s][0]
+        record["_link_factor"] = round(factor, 6)
+        stitched.append(record)
+
+    stitched.sort(key=lambda r: (period_key(r), dimension_key(r, measures)))
+    result = {
+        "data": stitched,
+        "value_field": value_field,
+        "reference": segments[-1][0],
+        "links": links,
+    }
+    if collided:
+        result["collisions"] = {
+            "count": collided,
+            "examples": collisions,
+            "_hint": "Several records shared a series and period within one base year; only the first was used. "
+                     "Add filters for the dimension that tells them apart.",
+        }
+    return result
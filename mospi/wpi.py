@@ -0,0 +1,207 @@
+"""
+WPI Commodity Hierarchy
+Parent/child tree built from the WPI filter payload (major_group -> group ->
+sub_group -> sub_sub_group -> item) with subtree queries and request planning.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional
+
+from .catalogue import entry_code, entry_label
+
+LEVELS = ["major_group", "group", "sub_group", "sub_sub_group", "item"]
+
+# WPI codes are 10 digits; each level adds digits to its parent's prefix,
+# e.g. major group 1000000000 -> group 1010000000.
+CODE_LENGTH = 10
+LEVEL_DIGITS = {"major_group": 1, "group": 3, "sub_group": 5, "sub_sub_group": 7, "item": 10}
+
+
+def level_param(level: str) -> str:
+    """Filter param for a level, e.g. 'sub_group' -> 'sub_group_code'."""
+    return f"{level}_code"
+
+
+class WpiHierarchy:
+    """
+    In-memory WPI commodity tree.
+
+    Parents come from explicit parent code fields on an entry when present,
+    otherwise from the code prefix of the level above. Levels that are skipped
+    in the payload (an item directly under a sub_group) attach to the nearest
+    existing ancestor.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+        self._roots: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def build(self, payload: Any) -> int:
+        """(Re)build the tree from a get_wpi_filters payload. Returns the node count."""
+        filters = payload.get("data", payload) if isinstance(payload, dict) else {}
+        nodes: Dict[str, Dict[str, Any]] = {}
+        raw_parents: Dict[str, List[Optional[str]]] = {}
+
+        for depth, level in enumerate(LEVELS):
+            for entry in filters.get(level) or []:
+                if not isinstance(entry, dict):
+                    continue
+                code = entry_code(entry, level)
+                if code is None or code in nodes:
+                    continue
+                nodes[code] = {
+                    "code": code,
+                    "label": entry_label(entry, level, code) or code,
+                    "level": level,
+                    "parent": None,
+                    "children": [],
+                }
+                # Explicit parent fields, nearest level first
+                raw_parents[code] = [
+                    str(entry[level_param(upper)])
+                    for upper in reversed(LEVELS[:depth])
+                    if entry.get(level_param(upper)) is not None
+                ]
+
+        for code, node in nodes.items():
+            parent = next((p for p in raw_parents[code] if p in nodes and p != code), None)
+            if parent is None:
+                parent = self._prefix_parent(code, node["level"], nodes)
+            node["parent"] = parent
+            if parent is not None:
+                nodes[parent]["children"].append(code)
+
+        with self._lock:
+            self._nodes = nodes
+            self._roots = [code for code, node in nodes.items() if node["parent"] is None]
+        return len(nodes)
+
+    @staticmethod
+    def _prefix_parent(code: str, level: str, nodes: Dict[str, Dict[str, Any]]) -> Optional[str]:
+        """Derive the parent from the code prefix, walking up past levels missing in the payload."""
+        if len(code) != CODE_LENGTH or not code.isdigit():
+            return None
+        for upper in reversed(LEVELS[:LEVELS.index(level)]):
+            digits = LEVEL_DIGITS[upper]
+            candidate = code[:digits].ljust(CODE_LENGTH, "0")
+            if candidate != code and nodes.get(candidate, {}).get("level") == upper:
+                return candidate
+        return None
+
+    def node(self, code: str) -> Optional[Dict[str, Any]]:
+        """Public view of a node (without its child list)."""
+        node = self._nodes.get(str(code))
+        if node is None:
+            return None
+        return {
+            "code": node["code"],
+            "label": node["label"],
+            "level": node["level"],
+            "child_count": len(node["children"]),
+        }
+
+    def find(self, term: str) -> Optional[str]:
+        """Resolve a code or (case-insensitive) label to a node code."""
+        term = str(term).strip()
+        if term in self._nodes:
+            return term
+        lowered = term.lower()
+        for code, node in self._nodes.items():
+            if node["label"].lower() == lowered:
+                return code
+        return None
+
+    def ancestors(self, code: str) -> List[Dict[str, Any]]:
+        """Path from the root major group down to (and including) the node."""
+        path = []
+        current = self._nodes.get(str(code))
+        while current is not None:
+            path.append(self.node(current["code"]))
+            current = self._nodes.get(current["parent"]) if current["parent"] else None
+        return list(reversed(path))
+
+    def children(self, code: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Direct children of a node, or the root major groups if code is None."""
+        codes = self._roots if code is None else self._nodes.get(str(code), {}).get("children", [])
+        return [self.node(c) for c in codes]
+
+    def expand(self, code: Optional[str] = None, depth: int = 1) -> Dict[str, List[Dict[str, Any]]]:
+        """Level-wise expansion: nodes below code grouped by level, down to depth levels."""
+        levels: Dict[str, List[Dict[str, Any]]] = {}
+        frontier = self._roots if code is None else self._nodes.get(str(code), {}).get("children", [])
+        for _ in range(depth):
+            if not frontier:
+                break
+            next_frontier = []
+            for child in frontier:
+                node = self._nodes[child]
+                levels.setdefault(node["level"], []).append(self.node(child))
+                next_frontier.extend(node["children"])
+            frontier = next_frontier
+        return levels
+
+    def descendant_items(self, code: str) -> List[str]:
+        """All leaf item codes under a node (the node itself if it is an item)."""
+        stack = [str(code)]
+        items = []
+        while stack:
+            node = self._nodes.get(stack.pop())
+            if node is None:
+                continue
+            if node["level"] == "item" or not node["children"]:
+                items.append(node["code"])
+            stack.extend(node["children"])
+        return sorted(items)
+
+    def minimal_cover(self, codes: List[str]) -> List[str]:
+        """
+        Smallest set of nodes covering the same items as codes.
+
+        Drops nodes already covered by a selected ancestor, then rolls a set of
+        siblings up into their parent when every child of that parent is selected.
+        """
+        selected = {str(c) for c in codes if str(c) in self._nodes}
+        changed = True
+        while changed:
+            changed = False
+            # Remove nodes whose ancestor is also selected
+            for code in list(selected):
+                parent = self._nodes[code]["parent"]
+                while parent is not None:
+                    if parent in selected:
+                        selected.discard(code)
+                        changed = True
+                        break
+                    parent = self._nodes[parent]["parent"]
+            # Roll complete sibling sets up into the parent
+            parents = {self._nodes[c]["parent"] for c in selected if self._nodes[c]["parent"]}
+            for parent in parents:
+                siblings = self._nodes[parent]["children"]
+                if siblings and all(s in selected for s in siblings):
+                    selected.difference_update(siblings)
+                    selected.add(parent)
+                    changed = True
+        return sorted(selected)
+
+    def plan_requests(self, codes: List[str]) -> List[Dict[str, str]]:
+        """
+        Turn a set of nodes into the minimal list of getWpiRecords filter sets.
+
+        One request per level in the minimal cover, with that level's codes comma-joined.
+        """
+        by_level: Dict[str, List[str]] = {}
+        for code in self.minimal_cover(codes):
+            by_level.setdefault(self._nodes[code]["level"], []).append(code)
+        return [
+            {level_param(level): ",".join(by_level[level])}
+            for level in LEVELS
+            if level in by_level
+        ]
+
+
+# Global instance
+wpi_hierarchy = WpiHierarchy()
@@ -1,10 +1,38 @@
 import sys
 import os
+import math
 import yaml
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from fastmcp import FastMCP
+from fastmcp.resources import ResourceContent, ResourceResult
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
 from mospi.client import mospi
+from mospi import asi, stitch
+from mospi.admission import AdmissionMiddleware
+from mospi.cache import ResultCacheMiddleware
+from mospi.canonical import request_keys
+from mospi.cardinality import AUTO_LIMIT, AUTO_MAX_RECORDS, Estimate, Plan, result_sizes, total_records
+from mospi.catalogue import catalogue, metadata_key, metadata_sources, register_default_sources
+from mospi.codes import code_index
+from mospi.compression import CompressionMiddleware
+from mospi.containment import DEFAULT_LIMIT, containment_cache
+from mospi.deadline import DeadlineMiddleware
+from mospi.export import FORMATS as EXPORT_FORMATS, EXPORT_MAX_RECORDS, export_store, fetch_pages, write_export
+from mospi.fallback import (
+    NO_DATA_FALLBACK, annotate_relaxed, has_data, is_no_data, negative_cache, no_data_result, plan_relaxations,
+)
+from mospi.normalize import NORMALIZE_DATA, normalize_result
+from mospi.ratelimit import RateLimitMiddleware
+from mospi.scheduler import PriorityMiddleware, configure_limit_planner
+from mospi.search import indicator_index
+from mospi.wpi import LEVELS as WPI_LEVELS, level_param as wpi_level_param, wpi_hierarchy
+from observability.capture import CaptureMiddleware
+from observability.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry as metrics_registry
+from observability.profiling import PROFILING_ENABLED, ProfilingMiddleware, profile_store
 from observability.telemetry import TelemetryMiddleware
+from observability.tracing import TRACE_CALLS, enabled as tracing_enabled, phase
 
 SWAGGER_DIR = os.path.join(os.path.dirname(__file__), "swagger")
 
@@ -18,6 +46,64 @@ mcp = FastMCP("MoSPI Data Server")
 
 # Add telemetry middleware for IP tracking and input/output capture
 mcp.add_middleware(TelemetryMiddleware())
+mcp.add_middleware(MetricsMiddleware())
+# Per-call deadline for everything below; cancels upstream work when the client goes away
+mcp.add_middleware(DeadlineMiddleware())
+# Appends anonymized tool calls to MOSPI_CAPTURE_PATH for scripts/replay.py; off when unset.
+# Outside the cache and rate limiter so the capture sees the full demand.
+mcp.add_middleware(CaptureMiddleware(keep_word=indicator_index.has_term))
+# Repeated calls are answered here, before they use any rate-limit tokens or upstream slots
+mcp.add_middleware(ResultCacheMiddleware())
+# Tags the call's priority class; admission, the fair queues and the bulkheads below all order by it
+mcp.add_middleware(PriorityMiddleware())
+# Sheds bulk (then data) calls while in-flight, queued or recent latency is over its limit
+mcp.add_middleware(AdmissionMiddleware())
+# Per-IP/per-session quotas and fair sharing of upstream capacity; rejections are still traced and counted
+mcp.add_middleware(RateLimitMiddleware())
+# Innermost so it profiles only the tool itself; inert unless MOSPI_PROFILING is set
+mcp.add_middleware(ProfilingMiddleware())
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> Response:
+    """Prometheus scrape endpoint for tool, upstream and cache metrics."""
+    return Response(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@mcp.custom_route("/profiles", methods=["GET"])
+async def list_profiles(request: Request) -> JSONResponse:
+    """Recent per-request profiles (newest first). Only served when MOSPI_PROFILING is enabled."""
+    if not PROFILING_ENABLED:
+        return JSONResponse({"error": "Profiling is disabled"}, status_code=404)
+    return JSONResponse({"profiles": profile_store.list()})
+
+
+@mcp.custom_route("/profiles/{profile_id}", methods=["GET"])
+async def get_profile(request: Request) -> JSONResponse:
+    """Full profile (top frames and collapsed stacks) by id."""
+    profile = profile_store.get(request.path_params["profile_id"]) if PROFILING_ENABLED else None
+    if profile is None:
+        return JSONResponse({"error": "Profile not found"}, status_code=404)
+    return JSONResponse(profile)
+
+
+@mcp.custom_route("/exports/{export_id}", methods=["GET"])
+async def download_export(request: Request) -> Response:
+    """Arrow IPC stream or Parquet file produced by export_data."""
+    export = export_store.get(request.path_params["export_id"])
+    if export is None:
+        return JSONResponse({"error": "Export not found or expired"}, status_code=404)
+    return Response(export.data, media_type=export.mime_type,
+                    headers={"Content-Disposition": f'attachment; filename="{export.filename}"'})
+
+
+@mcp.resource("mospi://exports/{export_id}", name="mospi_export", mime_type="application/octet-stream")
+def read_export(export_id: str) -> ResourceResult:
+    """Arrow IPC stream or Parquet file produced by export_data."""
+    export = export_store.get(export_id)
+    if export is None:
+        raise ValueError(f"Export {export_id} not found or expired")
+    return ResourceResult([ResourceContent(export.data, mime_type=export.mime_type)])
 
 
 VALID_DATASETS = [
@@ -40,11 +126,66 @@ DATASET_SWAGGER = {
     "ENERGY": ("swagger_user_energy.yaml", "/api/energy/getEnergyRecords"),
 }
 
+# Map friendly names to API dataset keys used by MoSPI.get_data
+DATASET_MAP = {
+    "CPI_GROUP": "CPI_Group",
+    "CPI_ITEM": "CPI_Item",
+    "IIP_ANNUAL": "IIP_Annual",
+    "IIP_MONTHLY": "IIP_Monthly",
+    "PLFS": "PLFS",
+    "ASI": "ASI",
+    "NAS": "NAS",
+    "WPI": "WPI",
+    "ENERGY": "Energy",
+}
+
 # Datasets that require indicator_code in get_data
 DATASETS_REQUIRING_INDICATOR = [
     "PLFS", "NAS", "ENERGY",
 ]
 
+# Number of ranked indicator matches returned by 2_get_indicators
+SEARCH_TOP_K = 5
+
+# Max matches returned by lookup_mospi_codes when a search_term is given
+LOOKUP_LIMIT = 10
+
+# Records per sub-request (per page for long series) when stitching long series and ASI eras;
+# the API default of 10 would truncate them
+STITCH_LIMIT = "1000"
+
+# get_wpi_subtree: records per page while paging each level to completion, and the page cap per level
+WPI_SUBTREE_PAGE_SIZE = "1000"
+WPI_SUBTREE_MAX_PAGES = 20
+
+# get_long_series: page cap per base year/series piece (pages are STITCH_LIMIT records unless the caller sets limit)
+LONG_SERIES_MAX_PAGES = 20
+
+# Close matches returned when a WPI node name is not exact
+WPI_CANDIDATES = 5
+
+
+def _index_search_source(dataset: str, key: str, payload: Any) -> None:
+    """Only the registered indicator lists/filter labels feed indicator search."""
+    if catalogue.has_source(dataset, key):
+        indicator_index.update_source(dataset, key, payload)
+
+
+# Indicator lists and filter labels feed the offline search index; every cached
+# metadata payload feeds the code lookup index. Only payloads that changed are re-indexed.
+register_default_sources(catalogue, mospi)
+catalogue.subscribe(_index_search_source)
+catalogue.subscribe(code_index.update_source)
+
+
+def _rebuild_wpi_hierarchy(dataset: str, key: str, payload: Any) -> None:
+    """Rebuild the WPI commodity tree whenever the cached WPI filters change."""
+    if dataset == "WPI" and key == metadata_key():
+        wpi_hierarchy.build(payload)
+
+
+catalogue.subscribe(_rebuild_wpi_hierarchy)
+
 
 def get_swagger_param_definitions(dataset: str) -> list:
     """Load full param definitions from swagger spec for a dataset."""
@@ -55,9 +196,14 @@ def get_swagger_param_definitions(dataset: str) -> list:
     swagger_path = os.path.join(SWAGGER_DIR, yaml_file)
     if not os.path.exists(swagger_path):
         return []
-    with open(swagger_path, 'r') as f:
-        spec = yaml.safe_load(f)
-    return spec.get("paths", {}).get(endpoint_path, {}).get("get", {}).get("parameters", [])
+    with phase("mospi.swagger.load", TRACE_CALLS, **{"mospi.dataset": dataset_upper}) as span:
+        with open(swagger_path, 'rb') as f:
+            raw = f.read()
+        spec = yaml.safe_load(raw)
+        params = spec.get("paths", {}).get(endpoint_path, {}).get("get", {}).get("parameters", [])
+        span.set("swagger.file_size", len(raw))
+        span.set("swagger.param_count", len(params))
+    return params
 
 
 def get_swagger_params(dataset: str) -> list:
@@ -70,6 +216,16 @@ def validate_filters(dataset: str, filters: Dict[str, str]) -> Dict[str, Any]:
     Validate filters against swagger spec for a dataset.
     Checks for unknown params and missing required params.
     """
+    with phase("mospi.validate_filters", TRACE_CALLS, **{"mospi.dataset": dataset.upper()}) as span:
+        if tracing_enabled():
+            span.set("mospi.filter_count", len(filters))
+            span.set("mospi.filter_size", sum(len(str(k)) + len(str(v)) for k, v in filters.items()))
+        result = _validate_filters(dataset, filters)
+        span.set("mospi.filters_valid", result["valid"])
+        return result
+
+
+def _validate_filters(dataset: str, filters: Dict[str, str]) -> Dict[str, Any]:
     param_defs = get_swagger_param_definitions(dataset)
     if not param_defs:
         return {"valid": True}  # Can't validate, pass through
@@ -101,11 +257,203 @@ def validate_filters(dataset: str, filters: Dict[str, str]) -> Dict[str, Any]:
     return {"valid": True}
 
 
+def resolve_dataset(dataset: str, filters: Dict[str, Any]) -> str:
+    """Auto-route CPI and IIP to their Group/Item and Annual/Monthly endpoints based on filters."""
+    dataset = dataset.upper()
+    if dataset == "CPI":
+        return "CPI_ITEM" if "item_code" in filters else "CPI_GROUP"
+    if dataset == "IIP":
+        return "IIP_MONTHLY" if "month_code" in filters else "IIP_ANNUAL"
+    return dataset
+
+
+# Cache keys resolve aliases the way get_data does and drop swagger defaults;
+# an omitted limit/page is planned by get_data, so it is not the same call as limit=10
+request_keys.configure(resolve_dataset, DATASET_MAP, get_swagger_param_definitions, planned_paging=AUTO_LIMIT)
+# Unlimited get_data calls are sized (and classed for priority/admission) by their planned pull
+result_sizes.configure(get_swagger_param_definitions)
+configure_limit_planner(result_sizes.planned_records)
+# Records may carry labels (state) where the request filtered by code (state_code)
+containment_cache.configure(code_index.label)
+
+
 def transform_filters(filters: Dict[str, str]) -> Dict[str, str]:
     """
     Transform filters: skip None values and convert all values to strings.
     """
-    return {k: str(v) for k, v in filters.items() if v is not None}
+    with phase("mospi.transform_filters", TRACE_CALLS) as span:
+        transformed = {k: str(v) for k, v in filters.items() if v is not None}
+        if tracing_enabled():
+            span.set("mospi.filter_count", len(transformed))
+            span.set("mospi.filter_size", sum(len(k) + len(v) for k, v in transformed.items()))
+        return transformed
+
+
+def normalize_data(result: Any) -> Any:
+    """Typed measures, units and _period on get_data records (see mospi/normalize.py)."""
+    if not NORMALIZE_DATA:
+        return result
+    with phase("mospi.normalize", TRACE_CALLS):
+        return normalize_result(result)
+
+
+def fetch_data(dataset: str, api_dataset: str, filters: Dict[str, str]) -> Dict[str, Any]:
+    """One get_data request through the negative and containment caches."""
+    key_filters = request_keys.filters(dataset, filters)
+    # Known to be empty: skip the upstream round trip
+    if negative_cache.contains(api_dataset, key_filters):
+        return no_data_result()
+    # Narrower than a cached complete result: filter it locally instead of going upstream
+    result = containment_cache.lookup(api_dataset, key_filters)
+    if result is None:
+        result = mospi.get_data(api_dataset, filters)
+        containment_cache.store(api_dataset, key_filters, result)
+    if is_no_data(result):
+        negative_cache.add(api_dataset, key_filters)
+    return result
+
+
+def estimate_size(dataset: str, api_dataset: str, filters: Dict[str, str]) -> Estimate:
+    """Expected records and bytes for filters, from the cached code sets (see mospi/cardinality.py)."""
+    with phase("mospi.estimate", TRACE_CALLS, **{"mospi.dataset": dataset}) as span:
+        estimate = result_sizes.estimate(dataset, api_dataset, filters)
+        span.set("mospi.expected_records", estimate.records)
+        return estimate
+
+
+def fetch_planned_pages(api_dataset: str, filters: Dict[str, str], result: Dict[str, Any], plan: Plan) -> Dict[str, Any]:
+    """
+    Append pages 2.. of an automatic plan to the page-1 result (fetched concurrently)
+    and return the paging fields reported in _estimate.
+
+    Further pages are fetched only when page 1 came back full and MoSPI's
+    meta_data.totalRecords says more exist, so an overestimate never adds requests;
+    without totalRecords a full page only sets next_page.
+    """
+    records = result.get("data")
+    paging = {"limit": plan.limit, "pages_fetched": 1}
+    if not isinstance(records, list) or len(records) < plan.limit:
+        return paging
+    total = total_records(result)
+    pages = math.ceil(min(total, AUTO_MAX_RECORDS) / plan.limit) if plan.automatic and total is not None else 1
+    if pages > 1:
+        records = list(records)
+        responses = mospi.get_data_many(
+            [(api_dataset, {**filters, "limit": str(plan.limit), "page": str(p)}) for p in range(2, pages + 1)])
+        for response in responses:
+            page_records = response.get("data") if has_data(response) else None
+            if not page_records:
+                break
+            records.extend(page_records)
+            paging["pages_fetched"] += 1
+        result["data"] = records
+    first_page = int(filters["page"]) if str(filters.get("page", "")).isdigit() else 1
+    if total is not None:
+        more = (first_page - 1) * plan.limit + len(records) < total
+    else:
+        # Every page came back full: there may be more
+        more = len(records) == paging["pages_fetched"] * plan.limit
+    if more:
+        paging["next_page"] = first_page + paging["pages_fetched"]
+    return paging
+
+
+def fetch_all_pages(
+    api_dataset: str, plans: List[Dict[str, str]], page_size: int, max_pages: int
+) -> Tuple[List[List[Dict[str, Any]]], Dict[int, Dict[str, Any]], Dict[int, Dict[str, Any]]]:
+    """
+    Fetch every record of each request, paging each one until it is complete.
+
+    Pages of all unfinished requests are fetched together, one round per page number.
+    A request stops at a short page, at meta_data.totalRecords, or after max_pages pages.
+    Returns (records per request, {request index: {"page", "error"}},
+    {request index: {"records", "total_records", "next_page"}} for requests cut off at max_pages).
+    """
+    records: List[List[Dict[str, Any]]] = [[] for _ in plans]
+    errors: Dict[int, Dict[str, Any]] = {}
+    truncated: Dict[int, Dict[str, Any]] = {}
+    pending = list(range(len(plans)))
+    page = 1
+    while pending:
+        calls = [(api_dataset, {**plans[i], "limit": str(page_size), "page": str(page)}) for i in pending]
+        unfinished = []
+        for i, response in zip(pending, mospi.get_data_many(calls)):
+            if "error" in response:
+                errors[i] = {"page": page, "error": response["error"]}
+                continue
+            page_records = response.get("data") if isinstance(response.get("data"), list) else []
+            records[i].extend(page_records)
+            total = total_records(response)
+            if len(page_records) < page_size or (total is not None and len(records[i]) >= total):
+                continue
+            if page >= max_pages:
+                truncated[i] = {"records": len(records[i]), "total_records": total, "next_page": page + 1}
+                continue
+            unfinished.append(i)
+        pending = unfinished
+        page += 1
+    return records, errors, truncated
+
+
+def relax_no_data(dataset: str, api_dataset: str, filters: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """First relaxed variant (one optional filter dropped) that has data, annotated with _relaxed; None if none does."""
+    pending = []
+    for dropped, variant in plan_relaxations(filters, get_swagger_param_definitions(dataset)):
+        key_filters = request_keys.filters(dataset, variant)
+        if negative_cache.contains(api_dataset, key_filters, record=False):
+            continue
+        cached = containment_cache.lookup(api_dataset, key_filters)
+        if has_data(cached):
+            return annotate_relaxed(cached, dropped, filters)
+        if cached is None:
+            pending.append((dropped, variant, key_filters))
+    if not pending:
+        return None
+
+    index, completed = mospi.get_data_first([(api_dataset, variant) for _, variant, _ in pending], has_data)
+    for i, response in completed.items():
+        _, _, key_filters = pending[i]
+        containment_cache.store(api_dataset, key_filters, response)
+        if is_no_data(response):
+            negative_cache.add(api_dataset, key_filters)
+    if index is None:
+        return None
+    return annotate_relaxed(completed[index], pending[index][0], filters)
+
+
+def get_asi_across_eras(filters: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Fetch an ASI series whose years span several NIC classification years.
+
+    Plans one getASIData request per classification year, fires them concurrently
+    and merges the rows into one year-ordered series tagged with their era.
+    Each era asks for STITCH_LIMIT records unless the caller set a limit; eras
+    with more records than that are reported under truncated.
+    """
+    plans, unroutable = asi.plan_requests({"limit": STITCH_LIMIT, **filters})
+    if unroutable:
+        return {
+            "error": f"Years outside every ASI classification era: {unroutable}",
+            "_hint": f"ASI data years by classification_year: {asi.era_note()}.",
+        }
+
+    for plan in plans:
+        validation = validate_filters("ASI", plan)
+        if not validation["valid"]:
+            return {"error": "Invalid parameters", **validation}
+
+    result = asi.merge_responses(plans, mospi.get_data_many([("ASI", plan) for plan in plans]))
+    if result.get("truncated"):
+        result["_hint"] = (
+            "Some classification years have more records than one page; "
+            "narrow the filters or pass page (see truncated[].next_page) to fetch the rest."
+        )
+    if len(plans) > 1 and "nic_code" in filters:
+        result["_warning"] = (
+            "nic_code values differ between NIC classifications. The same nic_code was sent to every "
+            "classification year — check 3_get_metadata(classification_year=...) for each era."
+        )
+    return result
 
 
 @mcp.tool(name="2_get_indicators")
@@ -143,6 +491,9 @@ def get_indicators(
     After this, pick the matching indicator and call 3_get_metadata().
     Only ask user to choose if multiple indicators could match.
 
+    _ranked_matches lists the best matching indicators/codes ranked against user_query
+    across ALL datasets. If the top matches belong to a different dataset, switch to it.
+
     Args:
         dataset: Dataset name - one of: PLFS, CPI, IIP, ASI, NAS, WPI, ENERGY
                  For PLFS: frequency_code selects the indicator SET, not time granularity.
@@ -168,7 +519,14 @@ def get_indicators(
         return {"error": f"Unknown dataset: {dataset}", "valid_datasets": VALID_DATASETS, "_user_query": user_query}
 
     result = indicator_methods[dataset]()
+    if dataset in ("PLFS", "NAS", "ENERGY", "ASI"):
+        catalogue.put(dataset, "indicators", result)
+    # Fill in the other datasets for cross-dataset ranking without blocking this call
+    catalogue.refresh_in_background()
+
     result["_user_query"] = user_query
+    if user_query:
+        result["_ranked_matches"] = indicator_index.search(user_query, top_k=SEARCH_TOP_K)
     result["_next_step"] = "Call 3_get_metadata() with the matching indicator and required dataset params. MUST NOT skip to 4_get_data."
     result["_retry_hint"] = (
         "If none of the indicators above match the user's query, you may have picked the WRONG dataset. "
@@ -236,6 +594,7 @@ def get_metadata(
         if dataset == "CPI":
             swagger_key = "CPI_ITEM" if (level or "Group") == "Item" else "CPI_GROUP"
             result = mospi.get_cpi_filters(base_year=base_year or "2012", level=level or "Group")
+            catalogue.put("CPI", metadata_key(base_year or "2012", level or "Group"), result)
             result["api_params"] = get_swagger_param_definitions(swagger_key)
             result["_next_step"] = _next
             return result
@@ -243,18 +602,21 @@ def get_metadata(
         elif dataset == "IIP":
             swagger_key = "IIP_MONTHLY" if (frequency or "Annually") == "Monthly" else "IIP_ANNUAL"
             result = mospi.get_iip_filters(base_year=base_year or "2011-12", frequency=frequency or "Annually")
+            catalogue.put("IIP", metadata_key(base_year or "2011-12", frequency or "Annually"), result)
             result["api_params"] = get_swagger_param_definitions(swagger_key)
             result["_next_step"] = _next
             return result
 
         elif dataset == "ASI":
             result = mospi.get_asi_filters(classification_year=classification_year or "2008")
+            catalogue.put("ASI", metadata_key(classification_year or "2008"), result)
             result["api_params"] = get_swagger_param_definitions("ASI")
             result["_next_step"] = _next
             return result
 
         elif dataset == "WPI":
             result = mospi.get_wpi_filters()
+            catalogue.put("WPI", metadata_key(), result)
             result["api_params"] = get_swagger_param_definitions("WPI")
             result["_next_step"] = _next
             return result
@@ -264,6 +626,7 @@ def get_metadata(
                 return {"error": "indicator_code is required for PLFS"}
 
             filters = mospi.get_plfs_filters(indicator_code=indicator_code, frequency_code=frequency_code or 1)
+            catalogue.put("PLFS", metadata_key(indicator_code, frequency_code or 1), filters)
 
             return {
                 "dataset": "PLFS",
@@ -282,6 +645,7 @@ def get_metadata(
             if indicator_code is None:
                 return {"error": "indicator_code is required for NAS"}
             result = mospi.get_nas_filters(series=series or "Current", frequency_code=frequency_code or 1, indicator_code=indicator_code)
+            catalogue.put("NAS", metadata_key(series or "Current", frequency_code or 1, indicator_code), result)
             result["api_params"] = get_swagger_param_definitions("NAS")
             result["_next_step"] = _next
             return result
@@ -290,6 +654,7 @@ def get_metadata(
             ind_code = indicator_code or 1
             energy_code = use_of_energy_balance_code or 1
             result = mospi.get_energy_filters(indicator_code=ind_code, use_of_energy_balance_code=energy_code)
+            catalogue.put("ENERGY", metadata_key(ind_code, energy_code), result)
             result["api_params"] = get_swagger_param_definitions("ENERGY")
             result["_next_step"] = _next
             return result
@@ -326,52 +691,52 @@ def get_data(dataset: str, filters: Dict[str, str]) -> Dict[str, Any]:
         dataset: Dataset name (PLFS, CPI, IIP, ASI, NAS, WPI, ENERGY)
         filters: Key-value pairs using 'id' values from 3_get_metadata().
                  PLFS MUST include frequency_code (1=Annual, 2=Quarterly, 3=Monthly).
-                 Pass limit (e.g., "50", "100") if you expect more than 10 records.
+                 Without limit, the limit is chosen from the expected result size, up to a
+                 server cap (see _estimate in the response); pass limit/page for larger pulls.
+                 ASI: omit classification_year and pass year (e.g. "1995-96..2020-21" or a comma list)
+                 to get one series across classification years; each record carries _classification_year.
+
+    Measures come back as numbers (null for placeholders like "NA" or "-"), with units and
+    status markers such as (P) in _schema or <field>_unit / <field>_status, and each record
+    carries a sortable _period ("2022-23", "2023-04", "2022-23-Q1").
     """
-    dataset = dataset.upper()
-
-    # Auto-route CPI and IIP based on filters provided
-    if dataset == "CPI":
-        if "item_code" in filters:
-            dataset = "CPI_ITEM"
-        else:
-            dataset = "CPI_GROUP"
-
-    if dataset == "IIP":
-        if "month_code" in filters:
-            dataset = "IIP_MONTHLY"
-        else:
-            dataset = "IIP_ANNUAL"
-
-    # Map friendly names to API dataset keys
-    dataset_map = {
-        "CPI_GROUP": "CPI_Group",
-        "CPI_ITEM": "CPI_Item",
-        "IIP_ANNUAL": "IIP_Annual",
-        "IIP_MONTHLY": "IIP_Monthly",
-        "PLFS": "PLFS",
-        "ASI": "ASI",
-        "NAS": "NAS",
-        "WPI": "WPI",
-        "ENERGY": "Energy",
-    }
+    dataset = resolve_dataset(dataset, filters)
 
-    api_dataset = dataset_map.get(dataset)
+    api_dataset = DATASET_MAP.get(dataset)
     if not api_dataset:
         return {"error": f"Unknown dataset: {dataset}", "valid_datasets": VALID_DATASETS}
 
     # Transform filters: skip None values and convert to strings
     transformed_filters = transform_filters(filters)
 
+    # ASI without classification_year: route each data year to its NIC classification year
+    if dataset == "ASI" and "classification_year" not in transformed_filters and transformed_filters.get("year"):
+        return normalize_data(get_asi_across_eras(transformed_filters))
+
     # Validate params against swagger spec
     validation = validate_filters(dataset, transformed_filters)
     if not validation["valid"]:
         return {"error": "Invalid parameters", **validation}
 
-    result = mospi.get_data(api_dataset, transformed_filters)
+    # Size the request from the code sets; without an explicit limit, pick one that fits
+    estimate = estimate_size(dataset, api_dataset, transformed_filters)
+    plan = result_sizes.plan(estimate, transformed_filters)
+    if plan.automatic and plan.limit != DEFAULT_LIMIT:
+        transformed_filters = {**transformed_filters, "limit": str(plan.limit)}
+
+    result = fetch_data(dataset, api_dataset, transformed_filters)
 
-    # If no data found, hint to retry with different filters
-    if isinstance(result, dict) and result.get("msg") == "No Data Found":
+    # No data: optionally try the hinted relaxations concurrently, else hint the model to retry
+    if is_no_data(result) and NO_DATA_FALLBACK:
+        relaxed = relax_no_data(dataset, api_dataset, transformed_filters)
+        if relaxed is not None:
+            return normalize_data(relaxed)
+
+    if has_data(result):
+        result_sizes.observe(api_dataset, estimate, result)
+        result["_estimate"] = {**estimate.describe(), **fetch_planned_pages(api_dataset, transformed_filters, result, plan)}
+
+    if is_no_data(result):
         result["_hint"] = (
             "No data for this filter combination. Try these fixes: "
             "1) Some filters represent the same concept under different params "
@@ -381,9 +746,351 @@ def get_data(dataset: str, filters: Dict[str, str]) -> Dict[str, Any]:
             "may already appear in the response without that filter."
         )
 
+    return normalize_data(result)
+
+
+@mcp.tool(name="estimate_data")
+def estimate_data(dataset: str, filters: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Estimate how many records and bytes 4_get_data() would return, without fetching any data.
+
+    Use before large queries to decide whether to narrow the filters or use export_data().
+    The estimate multiplies the number of values selected per filter (all codes in the
+    metadata for omitted filters); unknown_dimensions make it a lower bound.
+
+    Args:
+        dataset: Same as 4_get_data()
+        filters: Same as 4_get_data()
+    """
+    dataset = resolve_dataset(dataset, filters)
+    api_dataset = DATASET_MAP.get(dataset)
+    if not api_dataset:
+        return {"error": f"Unknown dataset: {dataset}", "valid_datasets": VALID_DATASETS}
+
+    transformed_filters = transform_filters(filters)
+    validation = validate_filters(dataset, transformed_filters)
+    if not validation["valid"]:
+        return {"error": "Invalid parameters", **validation}
+
+    estimate = estimate_size(dataset, api_dataset, transformed_filters)
+    plan = result_sizes.plan(estimate, transformed_filters)
+    result = {"dataset": dataset, **estimate.describe(), "limit": plan.limit, "pages": plan.pages}
+    if estimate.records > AUTO_MAX_RECORDS:
+        result["hint"] = (
+            f"Without a limit, 4_get_data() fetches at most {AUTO_MAX_RECORDS} records; "
+            "narrow the filters, pass limit/page, or use export_data() for the full result."
+        )
+    return result
+
+
+@mcp.tool(name="lookup_mospi_codes")
+def lookup_mospi_codes(
+    dataset: str,
+    category: Optional[str] = None,
+    search_term: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Find filter codes by name without reading the whole metadata dump.
+
+    Use this to resolve a name (state, item, group, sector, ...) to the code you pass in 4_get_data().
+    Matching is case-insensitive and tolerates typos. Codes come from the same metadata
+    that 3_get_metadata() returns, so they are valid filter values.
+
+    Args:
+        dataset: Dataset name - one of: PLFS, CPI, IIP, ASI, NAS, WPI, ENERGY
+        category: Filter name to search in, e.g. "State", "group", "item", "nic". Omit to search all.
+        search_term: Name to look up, e.g. "rajasthan". Omit to list every code in the category.
+    """
+    dataset = dataset.upper()
+    if dataset not in VALID_DATASETS:
+        return {"error": f"Unknown dataset: {dataset}", "valid_datasets": VALID_DATASETS}
+
+    # Load default metadata only if nothing for this dataset has been cached yet
+    if not code_index.has_dataset(dataset):
+        for key, fetch in metadata_sources(mospi)[dataset]:
+            catalogue.ensure(dataset, key, fetch)
+
+    matches = code_index.lookup(
+        dataset,
+        search_term=search_term,
+        category=category,
+        limit=LOOKUP_LIMIT if search_term else None,
+    )
+    result = {
+        "dataset": dataset,
+        "category": category,
+        "search_term": search_term,
+        "matches": matches,
+    }
+    if not matches:
+        result["available_categories"] = code_index.categories(dataset)
+        result["_hint"] = "No match. Check the category name against available_categories or call 3_get_metadata()."
+    result["_next_step"] = "Pass the matching code in 4_get_data() filters (e.g. state_code). MUST NOT guess codes."
+    return result
+
+
+def _resolve_wpi_node(term: str) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Resolve a WPI code or exact commodity name to a node code.
+
+    Anything else is not guessed: the code is None and the closest nodes from the
+    code lookup index are returned as candidates to choose from.
+    """
+    code = wpi_hierarchy.find(term)
+    if code is not None:
+        return code, []
+    candidates: Dict[str, Dict[str, Any]] = {}
+    for match in code_index.lookup("WPI", search_term=term, limit=WPI_CANDIDATES):
+        node = wpi_hierarchy.node(match["code"])
+        if node is not None:
+            candidates.setdefault(node["code"], node)
+    return None, list(candidates.values())
+
+
+def fetch_wpi_levels(plan: List[Dict[str, str]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Fetch every record of each per-level request, paging each level until it is complete
+    (see fetch_all_pages); a level still unfinished after WPI_SUBTREE_MAX_PAGES pages is
+    reported as truncated. Returns (records, errors, truncated).
+    """
+    pages, failed, unfinished = fetch_all_pages("WPI", plan, int(WPI_SUBTREE_PAGE_SIZE), WPI_SUBTREE_MAX_PAGES)
+    records = [record for level_records in pages for record in level_records]
+    errors = [{"filters": plan[i], **failed[i]} for i in sorted(failed)]
+    truncated = [{"filters": plan[i], **unfinished[i]} for i in sorted(unfinished)]
+    return records, errors, truncated
+
+
+@mcp.tool(name="wpi_hierarchy")
+def get_wpi_hierarchy(
+    node: Optional[str] = None,
+    view: str = "children",
+    depth: int = 1
+) -> Dict[str, Any]:
+    """
+    Navigate the WPI commodity tree: major_group -> group -> sub_group -> sub_sub_group -> item.
+
+    Use this instead of reading the full WPI metadata when the user asks about a whole
+    category (e.g. "everything under Manufactured products").
+
+    Args:
+        node: WPI code or commodity name (e.g. "Manufactured products"). Omit for the major groups.
+        view: "children" (direct children), "expand" (all levels down to depth),
+              "ancestors" (path from the major group), or "items" (all item codes under the node).
+        depth: Number of levels to expand for view="expand".
+    """
+    catalogue.ensure("WPI", metadata_key(), mospi.get_wpi_filters)
+    if not len(wpi_hierarchy):
+        return {"error": "WPI hierarchy unavailable. Call 3_get_metadata(dataset='WPI') and retry.", "statusCode": False}
+
+    code = None
+    if node is not None:
+        code, candidates = _resolve_wpi_node(node)
+        if code is None:
+            return {
+                "error": f"WPI node not found: {node}",
+                "candidates": candidates,
+                "_hint": "Retry with one of the candidate codes, or call wpi_hierarchy() without node to list major groups.",
+            }
+
+    result: Dict[str, Any] = {"node": wpi_hierarchy.node(code) if code else None, "view": view}
+    if view == "children":
+        result["children"] = wpi_hierarchy.children(code)
+    elif view == "expand":
+        result["levels"] = wpi_hierarchy.expand(code, depth=depth)
+    elif view == "ancestors":
+        if code is None:
+            return {"error": "view='ancestors' needs a node"}
+        result["ancestors"] = wpi_hierarchy.ancestors(code)
+    elif view == "items":
+        if code is None:
+            return {"error": "view='items' needs a node"}
+        result["item_codes"] = wpi_hierarchy.descendant_items(code)
+    else:
+        return {"error": f"Unknown view: {view}", "valid_views": ["children", "expand", "ancestors", "items"]}
+
+    result["_next_step"] = "Call get_wpi_subtree(nodes, filters) to fetch data for whole subtrees in one step."
+    return result
+
+
+@mcp.tool(name="get_wpi_subtree")
+def get_wpi_subtree(nodes: List[str], filters: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Fetch WPI data for one or more commodity subtrees in a single call.
+
+    The nodes are reduced to the smallest set of codes that cover them and fetched
+    with one request per hierarchy level, in parallel. Every level is paged internally
+    until complete, so the result is the whole subtree. MUST NOT call 4_get_data once
+    per item for a whole category — use this instead.
+
+    Args:
+        nodes: WPI codes or exact commodity names (e.g. ["Manufactured products"]).
+               Inexact names return candidates to pick from instead of data.
+        filters: Other getWpiRecords params (year, month_code).
+                 MUST NOT include major_group_code/group_code/sub_group_code/sub_sub_group_code/item_code,
+                 limit or page.
+    """
+    catalogue.ensure("WPI", metadata_key(), mospi.get_wpi_filters)
+    filters = transform_filters(filters or {})
+
+    hierarchy_params = [wpi_level_param(level) for level in WPI_LEVELS]
+    clashing = [k for k in filters if k in hierarchy_params]
+    if clashing:
+        return {"error": f"Hierarchy params must be passed as nodes, not filters: {clashing}"}
+    paging = [k for k in filters if k in ("limit", "page")]
+    if paging:
+        return {"error": f"get_wpi_subtree pages internally and returns whole subtrees; omit {paging}"}
+
+    codes, unresolved = [], {}
+    for term in nodes:
+        code, candidates = _resolve_wpi_node(term)
+        if code is None:
+            unresolved[term] = candidates
+        else:
+            codes.append(code)
+    if unresolved:
+        return {
+            "error": f"WPI nodes not found: {list(unresolved)}",
+            "candidates": unresolved,
+            "_hint": "Retry with one of the candidate codes, or call wpi_hierarchy() to browse valid nodes.",
+        }
+
+    plan = [{**filters, **level_filters} for level_filters in wpi_hierarchy.plan_requests(codes)]
+    for request_filters in plan:
+        validation = validate_filters("WPI", request_filters)
+        if not validation["valid"]:
+            return {"error": "Invalid parameters", **validation}
+
+    records, errors, truncated = fetch_wpi_levels(plan)
+
+    result = {
+        "data": records,
+        "nodes": [wpi_hierarchy.node(code) for code in codes],
+        "requests": plan,
+        "statusCode": not errors,
+    }
+    if errors:
+        result["errors"] = errors
+    if truncated:
+        result["truncated"] = truncated
+    return result
+
+
+@mcp.tool(name="get_long_series")
+def get_long_series(
+    dataset: str,
+    filters: Dict[str, str],
+    start_year: int,
+    end_year: int,
+    value_field: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Fetch one continuous long-run series across base years (CPI, IIP) or series (NAS).
+
+    Use this instead of several 4_get_data() calls when the requested period spans
+    CPI base years 2010/2012, IIP base years 1993-94/2004-05/2011-12, or NAS Back/Current series.
+    Older pieces are rescaled to the newest base using overlap-period ratios; each record
+    carries _source (base year/series) and _link_factor. "links" describes every linking step.
+    Each piece is paged until complete; a piece cut off at the page cap is listed in "truncated".
+
+    Args:
+        dataset: CPI, IIP or NAS
+        filters: Same filters as 4_get_data() (values from 3_get_metadata()),
+                 WITHOUT base_year/series and WITHOUT year/financial_year.
+        start_year: First year of the period (e.g. 2000).
+        end_year: Last year of the period (e.g. 2024).
+        value_field: Record field to link on. Omit to detect it (e.g. "index").
+    """
+    dataset = dataset.upper()
+    if dataset not in stitch.STITCH_SEGMENTS:
+        return {"error": f"Stitching is available for {list(stitch.STITCH_SEGMENTS)}, not {dataset}"}
+    if start_year > end_year:
+        return {"error": "start_year must not be after end_year"}
+
+    controlled = (stitch.STITCH_SEGMENTS[dataset]["param"], "year", "financial_year", "page")
+    filters = transform_filters(filters)
+    # Each piece is paged to completion; a caller's limit only sets the page size
+    page_size = int(filters["limit"]) if str(filters.get("limit", "")).isdigit() else int(STITCH_LIMIT)
+    filters = {k: v for k, v in filters.items() if k not in controlled and k != "limit"}
+
+    swagger_key = resolve_dataset(dataset, filters)
+    plans = stitch.plan_requests(dataset, filters, start_year, end_year)
+    if not plans:
+        return {"error": f"No {dataset} base year/series covers {start_year}-{end_year}"}
+    for plan in plans:
+        validation = validate_filters(swagger_key, plan)
+        if not validation["valid"]:
+            return {"error": "Invalid parameters", **validation}
+
+    segment_param = stitch.STITCH_SEGMENTS[dataset]["param"]
+    pages, failed, unfinished = fetch_all_pages(DATASET_MAP[swagger_key], plans, page_size, LONG_SERIES_MAX_PAGES)
+
+    segments, errors = [], []
+    for i, plan in enumerate(plans):
+        if i in failed:
+            errors.append({segment_param: plan[segment_param], **failed[i]})
+        elif pages[i]:
+            segments.append((plan[segment_param], pages[i]))
+    truncated = [{segment_param: plans[i][segment_param], **unfinished[i]} for i in sorted(unfinished)]
+
+    if not segments:
+        return {"error": "No data returned for any base year/series", "errors": errors, "requests": plans}
+
+    result = stitch.link_segments(segments, value_field=value_field)
+    result["requests"] = plans
+    if errors:
+        result["errors"] = errors
+    if truncated:
+        result["truncated"] = truncated
     return result
 
 
+@mcp.tool(name="export_data")
+def export_data(
+    dataset: str,
+    filters: Dict[str, str],
+    format: str = "arrow",
+    max_records: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Export a full 4_get_data() result as an Arrow IPC stream or Parquet file for notebooks.
+
+    Use this instead of paging through 4_get_data() when the result feeds a DataFrame.
+    All upstream pages are fetched; measures are float64 columns and dimensions are
+    dictionary-encoded strings. Returns a resource URI (mospi://exports/{id}) and an HTTP
+    path (/exports/{id}) to download it from; exports expire after an hour.
+
+    Args:
+        dataset: Same as 4_get_data()
+        filters: Same as 4_get_data() (values from 3_get_metadata()), without limit/page.
+        format: "arrow" (IPC stream, e.g. pyarrow.ipc.open_stream) or "parquet"
+        max_records: Stop after this many records (default and cap: server limit).
+    """
+    fmt = format.lower()
+    if fmt not in EXPORT_FORMATS:
+        return {"error": f"Unknown format: {format}", "valid_formats": list(EXPORT_FORMATS)}
+
+    dataset = resolve_dataset(dataset, filters)
+    api_dataset = DATASET_MAP.get(dataset)
+    if not api_dataset:
+        return {"error": f"Unknown dataset: {dataset}", "valid_datasets": VALID_DATASETS}
+
+    transformed_filters = {k: v for k, v in transform_filters(filters).items() if k not in ("limit", "page", "Format")}
+    validation = validate_filters(dataset, transformed_filters)
+    if not validation["valid"]:
+        return {"error": "Invalid parameters", **validation}
+
+    limit = min(max_records or EXPORT_MAX_RECORDS, EXPORT_MAX_RECORDS)
+    pages = fetch_pages(lambda params: mospi.get_data(api_dataset, params), transformed_filters, max_records=limit)
+    try:
+        export = write_export(pages, fmt, truncated_at=limit)
+    except RuntimeError as e:
+        return {"error": str(e)}
+    if not export.records:
+        return {"error": "No data found for these filters", "filters": transformed_filters}
+
+    export_store.add(export)
+    return export.describe()
+
 
 # Comprehensive API documentation tool
 @mcp.tool(name="1_know_about_mospi_api")
@@ -494,4 +1201,10 @@ if __name__ == "__main__":
     # Run with HTTP transport for remote access
     # For stdio (local MCP clients): mcp.run()
     # For HTTP (remote/web access): mcp.run(transport="http", port=8000)
-    mcp.run(transport="http", port=8000)
\ No newline at end of file
+    # Responses are compressed (zstd/br/gzip) for clients that accept it
+    mcp.run(
+        transport="http",
+        host=os.environ.get("MOSPI_HOST", "127.0.0.1"),
+        port=int(os.environ.get("MOSPI_PORT", "8000")),
+        middleware=[Middleware(CompressionMiddleware)],
+    )
\ No newline at end of file
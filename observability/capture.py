@@ -0,0 +1,142 @@
+"""
+Tool-call traffic capture for MoSPI MCP Server.
+
+When MOSPI_CAPTURE_PATH is set, every tool call is appended to that file as
+one JSON line (tool, anonymized arguments, timing, outcome), written by a
+background thread through the same bounded queue as the telemetry log.
+scripts/replay.py re-issues a capture against a server.
+
+Anonymization:
+- client IP and MCP session id are replaced by a salted hash (a stable
+  per-capture session key, so the replay can keep each session's calls together)
+- free-text arguments (FREE_TEXT_ARGUMENTS) keep only words accepted by the
+  keep_word callback (the server passes the indicator vocabulary), so queries
+  stay realistic for search cost while anything user-specific is dropped; a
+  value that is a code as a whole (a WPI node "1000000000", "1.2") is kept
+  as is, so the replayed call resolves the same node
+- dataset names, filters and codes are kept verbatim: they are public API
+  parameters and are what makes the replay representative
+
+Record format:
+    {"t": 12.345, "ts": "2025-01-01T00:00:00Z", "session": "3f2a...", "tool": "4_get_data",
+     "arguments": {...}, "duration_ms": 812.4, "status": "ok", "output_size": 48213}
+t is seconds since capture started, used by the replay to reproduce arrival times.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import secrets
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+from observability.log_sink import AsyncLogSink
+from observability.metrics import response_size
+from observability.profiling import PROFILE_ARGUMENT
+from observability.sampling import is_error_result
+from observability.telemetry import extract_client_ip
+
+CAPTURE_PATH = os.environ.get("MOSPI_CAPTURE_PATH", "")
+
+# A fixed salt keeps session keys stable across restarts; the default is random per process
+CAPTURE_SALT = os.environ.get("MOSPI_CAPTURE_SALT") or secrets.token_hex(16)
+
+# Arguments holding user-written text rather than API parameters
+FREE_TEXT_ARGUMENTS = {"user_query", "search_term", "node", "nodes"}
+
+_WORD_RE = re.compile(r"[A-Za-z]+")
+# Numeric codes, optionally dotted or dashed (WPI "1000000000", NIC "10.1", "2022-23")
+_CODE_RE = re.compile(r"\d+(?:[.\-]\d+)*")
+
+
+def anonymize_text(text: Any, keep_word: Optional[Callable[[str], bool]] = None) -> str:
+    """Codes verbatim; otherwise only alphabetic words accepted by keep_word (all dropped if keep_word is None)."""
+    if _CODE_RE.fullmatch(str(text).strip()):
+        return str(text).strip()
+    if keep_word is None:
+        return ""
+    return " ".join(word for word in _WORD_RE.findall(str(text)) if keep_word(word))
+
+
+def _anonymize_value(value: Any, keep_word: Optional[Callable[[str], bool]]) -> Any:
+    """Free text anonymized; lists of terms (get_wpi_subtree nodes) element by element."""
+    if isinstance(value, (list, tuple)):
+        return [anonymize_text(v, keep_word) for v in value if v is not None]
+    return anonymize_text(value, keep_word)
+
+
+def anonymize_arguments(arguments: Any, keep_word: Optional[Callable[[str], bool]] = None) -> Any:
+    if not isinstance(arguments, dict):
+        return arguments
+    return {
+        name: _anonymize_value(value, keep_word) if name in FREE_TEXT_ARGUMENTS and value is not None else value
+        for name, value in arguments.items()
+    }
+
+
+def session_key(client: str, salt: str = CAPTURE_SALT) -> str:
+    return hashlib.sha256(f"{salt}:{client}".encode("utf-8")).hexdigest()[:16]
+
+
+class CaptureMiddleware(Middleware):
+    """Appends one anonymized JSON line per tool call to path."""
+
+    def __init__(self, path: str = CAPTURE_PATH, keep_word: Optional[Callable[[str], bool]] = None):
+        super().__init__()
+        self.path = path
+        self.keep_word = keep_word
+        self._sink: Optional[AsyncLogSink] = None
+        self._origin = time.monotonic()
+        if path:
+            # Line buffered text stream; AsyncLogSink keeps writes off the request path
+            self._sink = AsyncLogSink(stream=open(path, "a", encoding="utf-8", buffering=1))
+            atexit.register(self._sink.flush)
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        if self._sink is None:
+            return await call_next(context)
+
+        tool_name = getattr(context.message, 'name', 'unknown')
+        arguments = anonymize_arguments(dict(getattr(context.message, 'arguments', None) or {}), self.keep_word)
+        arguments.pop(PROFILE_ARGUMENT, None)
+        session = session_key(self._client_id(context))
+        offset = time.monotonic() - self._origin
+        start = time.perf_counter()
+        status, output_size = "ok", 0
+        try:
+            result = await call_next(context)
+            status = "error" if is_error_result(result) else "ok"
+            output_size = response_size(result)
+            return result
+        except Exception:
+            status = "exception"
+            raise
+        finally:
+            record: Dict[str, Any] = {
+                "t": round(offset, 3),
+                "ts": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "session": session,
+                "tool": tool_name,
+                "arguments": arguments,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                "status": status,
+                "output_size": output_size,
+            }
+            self._sink.submit("", json.dumps(record, default=str).encode("utf-8"))
+
+    @staticmethod
+    def _client_id(context: MiddlewareContext) -> str:
+        """MCP session id if there is one, else the client IP."""
+        try:
+            session_id = getattr(context.fastmcp_context, 'session_id', None)
+            if session_id:
+                return str(session_id)
+            return extract_client_ip(get_http_headers(include_all=True))
+        except Exception:
+            return "unknown"
@@ -0,0 +1,19 @@
+"""
+Per-Tool Settings from the Environment
+Parser shared by the modules that take per-tool numbers from env vars:
+telemetry sample rates, result cache TTLs and tool deadlines.
+"""
+
+from typing import Dict
+
+
+def parse_tool_values(value: str) -> Dict[str, float]:
+    """'tool_a=0.1,tool_b=0' -> {'tool_a': 0.1, 'tool_b': 0.0}; malformed entries are ignored."""
+    values = {}
+    for entry in value.split(","):
+        name, _, number = entry.partition("=")
+        try:
+            values[name.strip()] = float(number)
+        except ValueError:
+            continue
+    return values
@@ -0,0 +1,193 @@
+"""
+Non-blocking telemetry log sink.
+
+Tool calls hand their serialized output to a bounded in-memory queue and
+return immediately; a background thread drains the queue to stderr. When the
+queue fills up, large records are sampled and the rest are dropped and
+counted, so a slow log consumer can never stall a tool call.
+"""
+
+import atexit
+import codecs
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Dict, Optional, TextIO
+
+# Queue bounds: whichever limit is hit first applies
+LOG_QUEUE_RECORDS = int(os.environ.get("MOSPI_LOG_QUEUE_RECORDS", "1000"))
+LOG_QUEUE_BYTES = int(os.environ.get("MOSPI_LOG_QUEUE_BYTES", str(64 * 1024 * 1024)))
+
+# Under pressure (queue over half full), records above this size are only kept at LOG_SAMPLE_RATE
+LOG_SAMPLE_BYTES = int(os.environ.get("MOSPI_LOG_SAMPLE_BYTES", str(256 * 1024)))
+LOG_SAMPLE_RATE = float(os.environ.get("MOSPI_LOG_SAMPLE_RATE", "0.1"))
+
+# How often the writer reports drops to the log itself
+DROP_REPORT_INTERVAL = 10.0
+
+# Slice size used when streaming large payloads to the stream
+LOG_WRITE_CHUNK = 64 * 1024
+
+
+class BoundedStreamWriter:
+    """
+    Writes a prefix plus a pre-serialized payload to a stream in bounded slices.
+
+    Large payloads are streamed straight from the serialized bytes (binary streams)
+    or through an incremental decoder (text streams), so no combined
+    "prefix + payload" string is ever built.
+    """
+
+    def __init__(self, stream: TextIO, chunk_size: int = LOG_WRITE_CHUNK):
+        self.stream = stream
+        self.chunk_size = chunk_size
+
+    def write_record(self, prefix: str, payload: bytes) -> None:
+        view = memoryview(payload)
+        binary = getattr(self.stream, 'buffer', None)
+        if binary is not None:
+            self.stream.flush()
+            binary.write(prefix.encode('utf-8'))
+            for start in range(0, len(view), self.chunk_size):
+                binary.write(view[start:start + self.chunk_size])
+            binary.write(b"\n")
+            binary.flush()
+            return
+
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.stream.write(prefix)
+        for start in range(0, len(view), self.chunk_size):
+            self.stream.write(decoder.decode(view[start:start + self.chunk_size]))
+        self.stream.write(decoder.decode(b"", final=True) + "\n")
+        self.stream.flush()
+
+
+class AsyncLogSink:
+    """
+    Bounded queue of (prefix, payload) log records drained by a daemon thread.
+
+    submit() never blocks. Counters are available from stats().
+    """
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        max_records: int = LOG_QUEUE_RECORDS,
+        max_bytes: int = LOG_QUEUE_BYTES,
+        sample_bytes: int = LOG_SAMPLE_BYTES,
+        sample_rate: float = LOG_SAMPLE_RATE,
+    ):
+        self._stream = stream
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.sample_bytes = sample_bytes
+        self.sample_rate = sample_rate
+        self._queue: "queue.Queue[tuple[str, bytes]]" = queue.Queue(maxsize=max_records)
+        self._lock = threading.Lock()
+        self._queued_bytes = 0
+        self._thread: Optional[threading.Thread] = None
+        self._counters = {
+            "submitted": 0,
+            "written": 0,
+            "dropped_full": 0,
+            "dropped_sampled": 0,
+            "dropped_bytes": 0,
+            "write_errors": 0,
+        }
+        self._unreported_drops = 0
+        self._last_drop_report = time.monotonic()
+
+    @property
+    def stream(self) -> TextIO:
+        # Resolved lazily so redirected/replaced stderr is honoured
+        return self._stream or sys.stderr
+
+    def submit(self, prefix: str, payload: bytes) -> bool:
+        """Queue a record for writing. Returns False if it was sampled out or dropped."""
+        size = len(payload)
+        with self._lock:
+            self._counters["submitted"] += 1
+            pressured = (
+                self._queue.qsize() * 2 >= self.max_records
+                or self._queued_bytes * 2 >= self.max_bytes
+            )
+            if pressured and size >= self.sample_bytes and random.random() >= self.sample_rate:
+                self._drop("dropped_sampled", size)
+                return False
+            if self._queued_bytes + size > self.max_bytes:
+                self._drop("dropped_full", size)
+                return False
+            try:
+                self._queue.put_nowait((prefix, payload))
+            except queue.Full:
+                self._drop("dropped_full", size)
+                return False
+            self._queued_bytes += size
+
+        self._ensure_worker()
+        return True
+
+    def _drop(self, counter: str, size: int) -> None:
+        self._counters[counter] += 1
+        self._counters["dropped_bytes"] += size
+        self._unreported_drops += 1
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._drain, name="telemetry-log-sink", daemon=True)
+            self._thread.start()
+
+    def _drain(self) -> None:
+        while True:
+            prefix, payload = self._queue.get()
+            try:
+                BoundedStreamWriter(self.stream).write_record(prefix, payload)
+                self._counters["written"] += 1
+            except Exception:
+                self._counters["write_errors"] += 1
+            finally:
+                with self._lock:
+                    self._queued_bytes -= len(payload)
+                self._queue.task_done()
+            self._report_drops()
+
+    def _report_drops(self) -> None:
+        if not self._unreported_drops or time.monotonic() - self._last_drop_report < DROP_REPORT_INTERVAL:
+            return
+        with self._lock:
+            dropped, self._unreported_drops = self._unreported_drops, 0
+            self._last_drop_report = time.monotonic()
+        try:
+            print(f"[TELEMETRY] Log sink dropped {dropped} records under backpressure", file=self.stream)
+        except Exception:
+            pass
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait up to timeout seconds for queued records to be written. Returns True if drained."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Counters plus current queue depth and queued bytes."""
+        with self._lock:
+            return {
+                **self._counters,
+                "queued_records": self._queue.qsize(),
+                "queued_bytes": self._queued_bytes,
+            }
+
+
+# Global instance; flushed on interpreter exit so short runs don't lose their last records
+telemetry_log_sink = AsyncLogSink()
+atexit.register(telemetry_log_sink.flush)
@@ -0,0 +1,287 @@
+"""
+In-process metrics for MoSPI MCP Server.
+
+Counters, gauges and fixed-bucket histograms rendered in the Prometheus text
+exposition format at /metrics on the HTTP transport. Each metric keeps one
+small lock held only for the increment itself, so recording is cheap on the
+request path.
+
+Metrics:
+- mospi_tool_duration_seconds{tool}: tool call latency
+- mospi_tool_response_bytes{tool}: serialized tool output size
+- mospi_tool_in_flight{tool}: tool calls currently running
+- mospi_tool_errors_total{tool}: tool calls that raised
+- mospi_upstream_duration_seconds{endpoint}: MoSPI API latency
+- mospi_upstream_response_bytes{endpoint}: MoSPI API response size
+- mospi_upstream_in_flight{endpoint}: MoSPI API calls currently running
+- mospi_upstream_errors_total{endpoint,kind}: failed MoSPI API calls
+- mospi_cache_requests_total{cache,result}: cache hits/misses, plus mospi_cache_hit_ratio{cache}
+- mospi_log_sink{stat}: telemetry log sink counters and queue depth
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+from observability.log_sink import telemetry_log_sink
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def items(self) -> List[Tuple[LabelValues, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels, lv)} {_format_value(v)}" for lv, v in self.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values: str, value: float) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            snapshot = [(lv, list(series)) for lv, series in self._series.items()]
+        for label_values, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound) if bound == float("inf") else bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and optional collector callbacks that refresh gauges at scrape time."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception:
+                pass
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+tool_duration = registry.register(Histogram(
+    "mospi_tool_duration_seconds", "Tool call latency in seconds.", ("tool",)))
+tool_response_bytes = registry.register(Histogram(
+    "mospi_tool_response_bytes", "Serialized tool output size in bytes.", ("tool",), buckets=SIZE_BUCKETS))
+tool_in_flight = registry.register(Gauge(
+    "mospi_tool_in_flight", "Tool calls currently running.", ("tool",)))
+tool_errors = registry.register(Counter(
+    "mospi_tool_errors_total", "Tool calls that raised an exception.", ("tool",)))
+
+upstream_duration = registry.register(Histogram(
+    "mospi_upstream_duration_seconds", "MoSPI API request latency in seconds.", ("endpoint",)))
+upstream_response_bytes = registry.register(Histogram(
+    "mospi_upstream_response_bytes", "MoSPI API response body size in bytes.", ("endpoint",), buckets=SIZE_BUCKETS))
+upstream_in_flight = registry.register(Gauge(
+    "mospi_upstream_in_flight", "MoSPI API requests currently running.", ("endpoint",)))
+upstream_errors = registry.register(Counter(
+    "mospi_upstream_errors_total", "Failed MoSPI API requests.", ("endpoint", "kind")))
+
+cache_requests = registry.register(Counter(
+    "mospi_cache_requests_total", "Cache lookups by result (hit/miss).", ("cache", "result")))
+cache_hit_ratio = registry.register(Gauge(
+    "mospi_cache_hit_ratio", "Cache hits / lookups since start.", ("cache",)))
+
+log_sink_stats = registry.register(Gauge(
+    "mospi_log_sink", "Telemetry log sink counters and queue depth.", ("stat",)))
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup for the hit ratio metrics."""
+    cache_requests.inc(cache, "hit" if hit else "miss")
+
+
+def _collect_cache_ratios() -> None:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), count in cache_requests.items():
+        hits_and_total = totals.setdefault(cache, [0, 0])
+        hits_and_total[1] += count
+        if result == "hit":
+            hits_and_total[0] += count
+    for cache, (hits, total) in totals.items():
+        cache_hit_ratio.set(cache, value=hits / total if total else 0.0)
+
+
+def _collect_log_sink() -> None:
+    for stat, value in telemetry_log_sink.stats().items():
+        log_sink_stats.set(stat, value=value)
+
+
+registry.add_collector(_collect_cache_ratios)
+registry.add_collector(_collect_log_sink)
+
+
+class UpstreamCall:
+    """Mutable handle yielded by upstream_call() so the caller can report the response size."""
+
+    __slots__ = ("endpoint", "response_bytes")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.response_bytes: Optional[int] = None
+
+
+@contextmanager
+def upstream_call(endpoint: str) -> Iterator[UpstreamCall]:
+    """Time a MoSPI API request and record its size, in-flight count and errors."""
+    call = UpstreamCall(endpoint)
+    upstream_in_flight.inc(endpoint)
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+        upstream_errors.inc(endpoint, f"http_{status}" if status else type(e).__name__)
+        raise
+    finally:
+        upstream_duration.observe(time.perf_counter() - start, endpoint)
+        if call.response_bytes is not None:
+            upstream_response_bytes.observe(call.response_bytes, endpoint)
+        upstream_in_flight.dec(endpoint)
+
+
+# Attribute holding (content, size) on a measured result. It travels with the result
+# object, so middlewares outside a task boundary (DeadlineMiddleware runs the rest of
+# the chain in its own task, whose context changes never reach its caller) reuse it.
+MEASURED_ATTR = "_mospi_response_size"
+
+
+def response_size(result) -> int:
+    """Approximate serialized size of a ToolResult's content blocks, measured once per result."""
+    content = getattr(result, "content", None)
+    measured = getattr(result, MEASURED_ATTR, None)
+    if measured is not None and measured[0] is content:
+        return measured[1]
+    size = 0
+    for block in content or []:
+        text = getattr(block, "text", None)
+        if text is not None:
+            size += len(text.encode("utf-8"))
+    try:
+        setattr(result, MEASURED_ATTR, (content, size))
+    except (AttributeError, TypeError, ValueError):
+        pass
+    return size
+
+
+class MetricsMiddleware(Middleware):
+    """Records tool latency, response size, in-flight count and errors per tool name."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool_name = getattr(context.message, 'name', 'unknown')
+        tool_in_flight.inc(tool_name)
+        start = time.perf_counter()
+        try:
+            result = await call_next(context)
+        except Exception:
+            tool_errors.inc(tool_name)
+            raise
+        finally:
+            tool_duration.observe(time.perf_counter() - start, tool_name)
+            tool_in_flight.dec(tool_name)
+        tool_response_bytes.observe(response_size(result), tool_name)
+        return result
@@ -0,0 +1,193 @@
+"""
+On-demand per-request profiling for MoSPI MCP Server.
+
+When the operator enables it (MOSPI_PROFILING=1), a tool call that carries the
+X-MoSPI-Profile header or a `_profile: true` argument runs under a sampling
+profiler. A background thread samples the stacks of the threads executing the
+tool (sync tools run in a worker thread; fan-out requests in the mospi-fanout
+pool) every few milliseconds, so the profiled call pays no tracing overhead.
+
+The top frames go on the tool span; the full profile is kept in a small
+rotating in-memory store served at /profiles and /profiles/{id}.
+
+Samples are attributed to a call by the tool's code object on the stack.
+Concurrent calls of the same tool, and concurrent fan-outs, share samples.
+"""
+
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Set
+
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from opentelemetry import trace
+
+PROFILING_ENABLED = os.environ.get("MOSPI_PROFILING", "").lower() in ("1", "true", "yes")
+PROFILE_INTERVAL = float(os.environ.get("MOSPI_PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_STORE_SIZE = int(os.environ.get("MOSPI_PROFILE_STORE_SIZE", "50"))
+
+PROFILE_HEADER = "x-mospi-profile"
+PROFILE_ARGUMENT = "_profile"
+
+# Frames listed on the span
+TOP_FRAMES = 15
+
+# Worker threads of MoSPI.get_data_many
+FANOUT_THREAD_PREFIX = "mospi-fanout"
+
+
+def _frame_label(code, lineno: int) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{lineno})"
+
+
+class SamplingProfiler:
+    """Samples the stacks of threads running any of target_codes until stop() is called."""
+
+    def __init__(self, target_codes: Set[Any], interval: float = PROFILE_INTERVAL):
+        self.target_codes = target_codes
+        self.interval = interval
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="mospi-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                matched = names.get(ident, "").startswith(FANOUT_THREAD_PREFIX)
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code, frame.f_lineno))
+                    matched = matched or frame.f_code in self.target_codes
+                    frame = frame.f_back
+                if matched:
+                    self._stacks[tuple(reversed(stack))] += 1
+                    self._samples += 1
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop sampling and summarize: self/cumulative top frames plus collapsed stacks."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        duration = time.perf_counter() - self._started
+
+        self_counts: Counter = Counter()
+        cumulative: Counter = Counter()
+        for stack, count in self._stacks.items():
+            self_counts[stack[-1]] += count
+            for label in set(stack):
+                cumulative[label] += count
+
+        return {
+            "duration_ms": round(duration * 1000, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self._samples,
+            "top_self": [{"frame": f, "samples": c} for f, c in self_counts.most_common(TOP_FRAMES)],
+            "top_cumulative": [{"frame": f, "samples": c} for f, c in cumulative.most_common(TOP_FRAMES)],
+            # Brendan Gregg's collapsed format, loadable by flamegraph tools and speedscope
+            "collapsed": [";".join(stack) + f" {count}" for stack, count in self._stacks.most_common()],
+        }
+
+
+class ProfileStore:
+    """Rotating in-memory store of the most recent profiles."""
+
+    def __init__(self, size: int = PROFILE_STORE_SIZE):
+        self._profiles: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, profile: Dict[str, Any]) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return next((p for p in self._profiles if p["id"] == profile_id), None)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries, newest first."""
+        with self._lock:
+            return [
+                {k: p[k] for k in ("id", "tool", "started_at", "duration_ms", "samples")}
+                for p in reversed(self._profiles)
+            ]
+
+
+def profile_requested(context: MiddlewareContext) -> bool:
+    """True if the call opted in via header or argument. Strips the argument either way."""
+    arguments = getattr(context.message, 'arguments', None)
+    requested = False
+    if isinstance(arguments, dict) and PROFILE_ARGUMENT in arguments:
+        requested = str(arguments.pop(PROFILE_ARGUMENT)).lower() in ("1", "true", "yes")
+    if not requested:
+        try:
+            requested = get_http_headers(include_all=True).get(PROFILE_HEADER, "").lower() in ("1", "true", "yes")
+        except Exception:
+            requested = False
+    return requested
+
+
+class ProfilingMiddleware(Middleware):
+    """
+    Runs opted-in tool calls under SamplingProfiler when MOSPI_PROFILING is enabled.
+
+    Added after TelemetryMiddleware so the tool span is current and receives:
+    - profile.id: key for /profiles/{id}
+    - profile.samples
+    - profile.top_frames: top self-time frames, one per line
+    """
+
+    def __init__(self, store: Optional[ProfileStore] = None, enabled: Optional[bool] = None):
+        super().__init__()
+        self.store = store or profile_store
+        self.enabled = PROFILING_ENABLED if enabled is None else enabled
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        if not profile_requested(context) or not self.enabled:
+            return await call_next(context)
+
+        tool_name = getattr(context.message, 'name', 'unknown')
+        target_codes = set()
+        try:
+            tool = await context.fastmcp_context.fastmcp.get_tool(tool_name)
+            target_codes.add(tool.fn.__code__)
+        except Exception:
+            pass
+
+        profiler = SamplingProfiler(target_codes)
+        started_at = time.time()
+        profiler.start()
+        try:
+            return await call_next(context)
+        finally:
+            profile = {
+                "id": uuid.uuid4().hex[:12],
+                "tool": tool_name,
+                "started_at": started_at,
+                **profiler.stop(),
+            }
+            self.store.add(profile)
+            span = trace.get_current_span()
+            span.set_attribute("profile.id", profile["id"])
+            span.set_attribute("profile.samples", profile["samples"])
+            span.set_attribute("profile.top_frames", "\n".join(
+                f"{entry['samples']} {entry['frame']}" for entry in profile["top_self"]
+            ))
+
+
+# Global instance
+profile_store = ProfileStore()
@@ -0,0 +1,114 @@
+"""
+Tail-based, size-aware sampling for tool call telemetry.
+
+The keep/drop decision is made after the tool returns, when the outcome,
+duration and output size are known:
+- errors (raised or returned as {"error": ...}) are always kept
+- calls slower than slow_ms are always kept
+- everything else is kept at rate; optionally scaled down for outputs larger
+  than sample_bytes so the exported payload volume stays bounded
+
+Only the span payloads are sampled: spans of dropped calls still carry the
+cheap attributes (name, client, duration, size, decision) but no tool.input /
+tool.output, while the [TELEMETRY] output log line is written for every call.
+
+Defaults keep every call, so behaviour is unchanged until configured:
+- MOSPI_TELEMETRY_SAMPLE_RATE: fraction of normal calls kept (default 1.0)
+- MOSPI_TELEMETRY_SLOW_MS: calls at least this slow are always kept (default 2000)
+- MOSPI_TELEMETRY_SAMPLE_BYTES: outputs above this size are kept at rate * sample_bytes / size
+  (default 0: size does not affect sampling)
+- MOSPI_TELEMETRY_TOOL_RATES: per-tool rate overrides, e.g. "4_get_data=0.1,1_know_about_mospi_api=0"
+- MOSPI_TELEMETRY_TOOL_SLOW_MS: per-tool slow thresholds, e.g. "get_long_series=10000"
+"""
+
+import os
+import random
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from observability.config import parse_tool_values
+
+KEEP_ERROR = "error"
+KEEP_SLOW = "slow"
+KEEP_SAMPLED = "sampled"
+DROP_SAMPLED = "dropped"
+
+
+class SamplingPolicy:
+    """Keep/drop decisions for tool call telemetry, with per-tool overrides changeable at runtime."""
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        slow_ms: float = 2000.0,
+        sample_bytes: int = 0,
+        tool_overrides: Optional[Dict[str, Dict[str, float]]] = None,
+    ):
+        self.rate = rate
+        self.slow_ms = slow_ms
+        self.sample_bytes = sample_bytes
+        self._lock = threading.Lock()
+        self._overrides: Dict[str, Dict[str, float]] = dict(tool_overrides or {})
+
+    @classmethod
+    def from_env(cls) -> "SamplingPolicy":
+        overrides: Dict[str, Dict[str, float]] = {}
+        for setting, variable in (("rate", "MOSPI_TELEMETRY_TOOL_RATES"), ("slow_ms", "MOSPI_TELEMETRY_TOOL_SLOW_MS")):
+            for tool, value in parse_tool_values(os.environ.get(variable, "")).items():
+                overrides.setdefault(tool, {})[setting] = value
+        return cls(
+            rate=float(os.environ.get("MOSPI_TELEMETRY_SAMPLE_RATE", "1.0")),
+            slow_ms=float(os.environ.get("MOSPI_TELEMETRY_SLOW_MS", "2000")),
+            sample_bytes=int(os.environ.get("MOSPI_TELEMETRY_SAMPLE_BYTES", "0")),
+            tool_overrides=overrides,
+        )
+
+    def set_override(self, tool: str, rate: Optional[float] = None, slow_ms: Optional[float] = None) -> None:
+        """Override the rate and/or slow threshold for one tool."""
+        with self._lock:
+            override = dict(self._overrides.get(tool, {}))
+            if rate is not None:
+                override["rate"] = rate
+            if slow_ms is not None:
+                override["slow_ms"] = slow_ms
+            self._overrides[tool] = override
+
+    def clear_override(self, tool: Optional[str] = None) -> None:
+        """Remove one tool's override, or all overrides if tool is None."""
+        with self._lock:
+            if tool is None:
+                self._overrides.clear()
+            else:
+                self._overrides.pop(tool, None)
+
+    def overrides(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {tool: dict(override) for tool, override in self._overrides.items()}
+
+    def settings_for(self, tool: str) -> Tuple[float, float]:
+        """(rate, slow_ms) in effect for a tool."""
+        override = self._overrides.get(tool, {})
+        return override.get("rate", self.rate), override.get("slow_ms", self.slow_ms)
+
+    def decide(self, tool: str, error: bool, duration_ms: float, output_size: int) -> Tuple[bool, str]:
+        """Return (keep, reason) for a finished call."""
+        rate, slow_ms = self.settings_for(tool)
+        if error:
+            return True, KEEP_ERROR
+        if duration_ms >= slow_ms:
+            return True, KEEP_SLOW
+        if output_size > self.sample_bytes > 0:
+            rate *= self.sample_bytes / output_size
+        if rate >= 1.0 or random.random() < rate:
+            return True, KEEP_SAMPLED
+        return False, DROP_SAMPLED
+
+
+def is_error_result(result: Any) -> bool:
+    """True for a ToolResult whose structured content is a {"error": ...} dict."""
+    structured = getattr(result, "structured_content", None)
+    return isinstance(structured, dict) and "error" in structured
+
+
+# Global instance
+telemetry_sampling = SamplingPolicy.from_env()
@@ -4,40 +4,63 @@ Telemetry middleware for MoSPI MCP Server.
 Uses FastMCP's tracer to create child spans with custom attributes:
 - Client IP address (from X-Forwarded-For or direct connection)
 - User-Agent header
-- Tool inputs and outputs
+- Tool inputs and outputs (for calls kept by the sampling policy)
 
 All data is visible in Jaeger for analysis.
 """
 
 import json
-from typing import Any
+import time
+from typing import Any, Optional
 
 from fastmcp.server.middleware import Middleware, MiddlewareContext
 from fastmcp.telemetry import get_tracer
 
+from observability.log_sink import telemetry_log_sink
+from observability.metrics import response_size
+from observability.sampling import KEEP_ERROR, SamplingPolicy, is_error_result, telemetry_sampling
+
 # Constants
 MAX_ATTRIBUTE_SIZE = 4096  # 4KB limit for span attributes
 
 
-def truncate_json(value: Any, max_size: int = MAX_ATTRIBUTE_SIZE) -> tuple[str, int]:
+def serialize_json(value: Any) -> bytes:
     """
-    Serialize value to JSON and truncate if necessary.
+    Serialize value to UTF-8 JSON bytes once per call.
 
-    Returns:
-        Tuple of (truncated_string, original_size_bytes)
+    json.dumps builds the full text first, which is dropped as soon as it is
+    encoded. The output size, the span attribute preview and the log sink then
+    share the returned bytes instead of serializing again. The result's content
+    blocks are a separate rendering, measured by response_size.
     """
     try:
         serialized = json.dumps(value, default=str, ensure_ascii=False)
     except (TypeError, ValueError):
         serialized = str(value)
+    return serialized.encode('utf-8')
+
+
+def preview_json(data: bytes, max_size: int = MAX_ATTRIBUTE_SIZE) -> str:
+    """
+    Return data as a string of at most ~max_size bytes for a span attribute.
+
+    Only the kept prefix is decoded; a multi-byte character cut at the boundary is dropped.
+    """
+    if len(data) <= max_size:
+        return data.decode('utf-8')
+    head = data[:max_size - 50].decode('utf-8', errors='ignore')
+    return head + f"... [truncated, full size: {len(data)} bytes]"
 
-    original_size = len(serialized.encode('utf-8'))
 
-    if original_size > max_size:
-        truncated = serialized[:max_size - 50] + f"... [truncated, full size: {original_size} bytes]"
-        return truncated, original_size
+def truncate_json(value: Any, max_size: int = MAX_ATTRIBUTE_SIZE) -> tuple[str, int]:
+    """
+    Serialize value to JSON and truncate if necessary.
 
-    return serialized, original_size
+    Returns:
+        Tuple of (truncated_string, original_size_bytes)
+    """
+    data = serialize_json(value)
+    return preview_json(data, max_size), len(data)
 
 
 def extract_client_ip(headers: dict) -> str:
@@ -69,11 +92,17 @@ class TelemetryMiddleware(Middleware):
     - tool.input: JSON-serialized input arguments (truncated to 4KB)
     - tool.output: JSON-serialized return value (truncated to 4KB)
     - tool.output_size: Original size of output in bytes
+    - tool.duration_ms, telemetry.sampled, telemetry.sample_reason: tail sampling outcome
+
+    tool.input and tool.output are only set for calls the sampling policy keeps
+    (see observability/sampling.py); the [TELEMETRY] log line is written for every call.
     """
 
-    def __init__(self):
+    def __init__(self, sampling: Optional[SamplingPolicy] = None):
         super().__init__()
         self._tracer = get_tracer()
+        self._log_sink = telemetry_log_sink
+        self._sampling = sampling or telemetry_sampling
 
     async def on_call_tool(self, context: MiddlewareContext, call_next):
         """Hook that intercepts all tool calls."""
@@ -86,31 +115,59 @@ class TelemetryMiddleware(Middleware):
             # Add pre-execution attributes
             span.set_attribute("tool.name", tool_name)
 
-            if tool_args is not None:
-                input_str, _ = truncate_json(tool_args)
-                span.set_attribute("tool.input", input_str)
-
             # Extract client info from request context
             self._add_client_info_to_span(context, span)
 
             # Execute the tool
-            result = await call_next(context)
+            start = time.perf_counter()
+            try:
+                result = await call_next(context)
+            except Exception:
+                # Errors are always kept; the span records the exception itself
+                self._record_sampling(span, True, KEEP_ERROR, time.perf_counter() - start)
+                self._set_input(span, tool_args)
+                raise
+            duration_ms = (time.perf_counter() - start) * 1000
+            rendered_size = response_size(result)
+
+            # Tail decision: made now that outcome, duration and (pre-rendered) size are known.
+            # It only decides the span payloads; the log line below is written either way.
+            keep, reason = self._sampling.decide(
+                tool_name, is_error_result(result), duration_ms, rendered_size
+            )
+            self._record_sampling(span, keep, reason, duration_ms / 1000)
+            if keep:
+                self._set_input(span, tool_args)
+            else:
+                span.set_attribute("tool.output_size", rendered_size)
 
             # Add post-execution attributes
             output_data = getattr(result, 'structured_content', result)
             if output_data is not None:
-                output_str, output_size = truncate_json(output_data)
-                span.set_attribute("tool.output", output_str)
-                span.set_attribute("tool.output_size", output_size)
-                # Log full output (not truncated) for benchmark parsing
-                try:
-                    full_output = json.dumps(output_data, default=str, ensure_ascii=False)
-                except (TypeError, ValueError):
-                    full_output = str(output_data)
-                print(f"[TELEMETRY] Output ({output_size} bytes): {full_output}", file=sys.stderr)
+                # Serialize once; the same bytes feed the size, the span preview and the log
+                output_bytes = serialize_json(output_data)
+                output_size = len(output_bytes)
+                if keep:
+                    span.set_attribute("tool.output", preview_json(output_bytes))
+                    span.set_attribute("tool.output_size", output_size)
+                # Log full output (not truncated) for benchmark parsing.
+                # Queued for a background writer so a slow log consumer never delays the response.
+                self._log_sink.submit(f"[TELEMETRY] Output ({output_size} bytes): ", output_bytes)
 
         return result
 
+    @staticmethod
+    def _set_input(span, tool_args) -> None:
+        if tool_args is not None:
+            input_str, _ = truncate_json(tool_args)
+            span.set_attribute("tool.input", input_str)
+
+    @staticmethod
+    def _record_sampling(span, keep: bool, reason: str, duration: float) -> None:
+        span.set_attribute("tool.duration_ms", round(duration * 1000, 3))
+        span.set_attribute("telemetry.sampled", keep)
+        span.set_attribute("telemetry.sample_reason", reason)
+
     def _add_client_info_to_span(self, context: MiddlewareContext, span) -> None:
         """Extract and add client IP and User-Agent to the span."""
         try:
@@ -0,0 +1,97 @@
+"""
+Phase-level tracing for MoSPI MCP Server.
+
+Child spans under the tool.{name} span for the parts of a tool call that can
+be slow: upstream HTTP requests split into request (connect, TLS and time to
+first byte), body download and JSON decode, plus swagger loading and filter
+validation. Each span carries byte counts.
+
+Detail is set by MOSPI_TRACE_DETAIL:
+- off (0): no spans; phase() returns a shared no-op object
+- calls (1): one span per upstream request and per server helper
+- phases (2): additionally request/download/decode child spans per upstream request
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from fastmcp.telemetry import get_tracer
+
+TRACE_OFF = 0
+TRACE_CALLS = 1
+TRACE_PHASES = 2
+
+_LEVEL_NAMES = {"off": TRACE_OFF, "calls": TRACE_CALLS, "phases": TRACE_PHASES}
+
+
+def parse_detail(value: str) -> int:
+    """'off' / 'calls' / 'phases' or 0-2 to a detail level; unknown values disable tracing."""
+    value = str(value).strip().lower()
+    if value.isdigit():
+        return max(TRACE_OFF, min(TRACE_PHASES, int(value)))
+    return _LEVEL_NAMES.get(value, TRACE_OFF)
+
+
+TRACE_DETAIL = parse_detail(os.environ.get("MOSPI_TRACE_DETAIL", "off"))
+
+_tracer = get_tracer()
+
+
+def set_trace_detail(level: Any) -> None:
+    """Change the detail level at runtime."""
+    global TRACE_DETAIL
+    TRACE_DETAIL = parse_detail(level)
+
+
+def enabled(level: int = TRACE_CALLS) -> bool:
+    return TRACE_DETAIL >= level
+
+
+class _NullPhase:
+    """Returned by phase() when the level is disabled: a context manager that records nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullPhase":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class Phase:
+    """Handle yielded by an enabled phase() for attributes known only at the end (sizes, counts)."""
+
+    __slots__ = ("span",)
+
+    def __init__(self, span):
+        self.span = span
+
+    def set(self, key: str, value: Any) -> None:
+        self.span.set_attribute(key, value)
+
+
+@contextmanager
+def _span(name: str, attributes: dict) -> Iterator[Phase]:
+    with _tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield Phase(span)
+
+
+def phase(name: str, level: int = TRACE_CALLS, **attributes: Any):
+    """
+    Context manager for a child span named name, recorded only at detail >= level.
+
+        with phase("mospi.http.download", TRACE_PHASES) as p:
+            body = response.content
+            p.set("http.response_body_size", len(body))
+    """
+    if TRACE_DETAIL < level:
+        return _NULL_PHASE
+    return _span(name, attributes)
@@ -0,0 +1,80 @@
+"""
+Compare cache hit ratios with raw and canonical request keys on captured traffic.
+
+Walks a capture written with MOSPI_CAPTURE_PATH and, per tool with a result
+cache TTL, counts how many calls would have been cache hits if every earlier
+call's result were still cached (TTL honoured), once keyed by the raw
+arguments and once by the canonical key the server now uses.
+
+Usage:
+    python scripts/cache_keys.py capture.jsonl
+    python scripts/cache_keys.py capture.jsonl --tool 4_get_data
+"""
+
+import argparse
+import os
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mospi_server import request_keys  # noqa: E402  (configures dataset aliases and swagger defaults)
+from mospi.cache import TOOL_TTLS, canonical_key  # noqa: E402
+from replay import load_capture  # noqa: E402
+
+
+def simulate(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """Per tool: calls, raw-key hits and canonical-key hits."""
+    stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"calls": 0, "raw_hits": 0, "canonical_hits": 0})
+    raw_seen: Dict[str, float] = {}
+    canonical_seen: Dict[str, float] = {}
+    for record in records:
+        tool = record["tool"]
+        ttl = TOOL_TTLS.get(tool)
+        if not ttl:
+            continue
+        t = float(record.get("t", 0))
+        arguments = record.get("arguments") or {}
+        raw = canonical_key(tool, arguments)
+        canonical = canonical_key(tool, request_keys.arguments(tool, arguments))
+        entry = stats[tool]
+        entry["calls"] += 1
+        for key, seen, counter in ((raw, raw_seen, "raw_hits"), (canonical, canonical_seen, "canonical_hits")):
+            if key in seen and t - seen[key] < ttl:
+                entry[counter] += 1
+            else:
+                seen[key] = t
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Hit ratio with raw vs canonical cache keys")
+    parser.add_argument("capture", help="JSONL file written with MOSPI_CAPTURE_PATH")
+    parser.add_argument("--tool", action="append", help="Only this tool (repeatable)")
+    args = parser.parse_args()
+
+    stats = simulate(load_capture(args.capture, args.tool))
+    if not stats:
+        print("No cacheable calls in capture")
+        return 1
+
+    print(f"{'tool':<26}{'calls':>8}{'raw':>10}{'canonical':>12}{'gain':>9}")
+    totals = {"calls": 0, "raw_hits": 0, "canonical_hits": 0}
+    for tool, entry in sorted(stats.items()):
+        for name in totals:
+            totals[name] += entry[name]
+        _print_row(tool, entry)
+    _print_row("total", totals)
+    return 0
+
+
+def _print_row(name: str, entry: Dict[str, int]) -> None:
+    calls = entry["calls"] or 1
+    raw = entry["raw_hits"] / calls
+    canonical = entry["canonical_hits"] / calls
+    print(f"{name:<26}{entry['calls']:>8}{raw:>10.1%}{canonical:>12.1%}{canonical - raw:>+9.1%}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
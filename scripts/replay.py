@@ -0,0 +1,164 @@
+"""
+Replay captured tool-call traffic against a MoSPI MCP server.
+
+Reads a capture written with MOSPI_CAPTURE_PATH and re-issues every call,
+one MCP client per captured session, at the captured arrival times.
+
+Usage:
+    python scripts/replay.py capture.jsonl
+    python scripts/replay.py capture.jsonl --speed 4         # 4x faster than captured
+    python scripts/replay.py capture.jsonl --speed max --concurrency 16
+    python scripts/replay.py capture.jsonl --url http://localhost:8000/mcp --out results.jsonl
+
+For repeatable numbers, start the server with MOSPI_BASE_URL pointing at a
+local upstream stand-in instead of api.mospi.gov.in.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from fastmcp import Client
+
+
+def load_capture(path: str, tools: Optional[List[str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Captured records sorted by arrival time, optionally filtered by tool and truncated."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "tool" not in record or (tools and record["tool"] not in tools):
+                continue
+            records.append(record)
+    records.sort(key=lambda r: r.get("t", 0))
+    return records[:limit] if limit else records
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def replay(
+    records: List[Dict[str, Any]],
+    url: str,
+    speed: Optional[float],
+    concurrency: int,
+) -> List[Dict[str, Any]]:
+    """
+    Re-issue records. speed=None replays at maximum speed (only bounded by concurrency),
+    otherwise call i starts at t_i / speed seconds after the replay starts.
+    """
+    by_session: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for record in records:
+        by_session[record.get("session", "default")].append(record)
+
+    limiter = asyncio.Semaphore(concurrency)
+    origin = records[0].get("t", 0) if records else 0
+    start = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+
+    async def run_session(session_records: List[Dict[str, Any]]) -> None:
+        async with Client(url) as client:
+            for record in session_records:
+                if speed is not None:
+                    delay = (record.get("t", 0) - origin) / speed - (time.perf_counter() - start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                async with limiter:
+                    call_start = time.perf_counter()
+                    status, output_size = "ok", 0
+                    try:
+                        result = await client.call_tool(record["tool"], record.get("arguments") or {}, raise_on_error=False)
+                        structured = result.structured_content
+                        if result.is_error or (isinstance(structured, dict) and "error" in structured):
+                            status = "error"
+                        output_size = sum(len(getattr(b, "text", "") or "") for b in result.content or [])
+                    except Exception as e:
+                        status = f"exception: {type(e).__name__}"
+                    results.append({
+                        "tool": record["tool"],
+                        "scheduled": round((record.get("t", 0) - origin) / speed, 3) if speed else None,
+                        "started": round(call_start - start, 3),
+                        "duration_ms": round((time.perf_counter() - call_start) * 1000, 3),
+                        "captured_ms": record.get("duration_ms"),
+                        "status": status,
+                        "output_size": output_size,
+                    })
+
+    await asyncio.gather(*(run_session(session_records) for session_records in by_session.values()))
+    return results
+
+
+def summarize(results: List[Dict[str, Any]], wall_time: float) -> str:
+    lines = [f"{'tool':<28}{'calls':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'captured p50':>14}"]
+    by_tool: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for result in results:
+        by_tool[result["tool"]].append(result)
+    for tool in sorted(by_tool) + ["ALL"]:
+        rows = results if tool == "ALL" else by_tool[tool]
+        durations = [r["duration_ms"] for r in rows]
+        captured = [r["captured_ms"] for r in rows if r.get("captured_ms") is not None]
+        errors = sum(1 for r in rows if r["status"] != "ok")
+        lines.append(
+            f"{tool:<28}{len(rows):>7}{errors:>8}{percentile(durations, 50):>10.1f}"
+            f"{percentile(durations, 95):>10.1f}{percentile(durations, 99):>10.1f}{percentile(captured, 50):>14.1f}"
+        )
+    lines.append(f"\nwall time: {wall_time:.2f}s, throughput: {len(results) / wall_time if wall_time else 0:.2f} calls/s")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay captured MoSPI MCP tool calls")
+    parser.add_argument("capture", help="JSONL file written with MOSPI_CAPTURE_PATH")
+    parser.add_argument("--url", default="http://localhost:8000/mcp", help="MCP endpoint to replay against")
+    parser.add_argument("--speed", default="original",
+                        help="'original' (captured timing), 'max' (no pacing) or a factor like 2 or 0.5")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max calls in flight")
+    parser.add_argument("--tool", action="append", help="Only replay this tool (repeatable)")
+    parser.add_argument("--limit", type=int, help="Only replay the first N calls")
+    parser.add_argument("--out", help="Write per-call results to this JSONL file")
+    args = parser.parse_args()
+
+    if args.speed == "max":
+        speed = None
+    elif args.speed == "original":
+        speed = 1.0
+    else:
+        speed = float(args.speed)
+        if speed <= 0:
+            parser.error("--speed must be positive")
+
+    records = load_capture(args.capture, args.tool, args.limit)
+    if not records:
+        print(f"No tool calls found in {args.capture}", file=sys.stderr)
+        return 1
+
+    print(f"Replaying {len(records)} calls against {args.url} at speed={args.speed}", file=sys.stderr)
+    start = time.perf_counter()
+    results = asyncio.run(replay(records, args.url, speed, max(1, args.concurrency)))
+    wall_time = time.perf_counter() - start
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+    print(summarize(results, wall_time))
+    return 0 if all(r["status"] == "ok" for r in results) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Admission Control Tests
+Tests load signals and per-class shedding in mospi.admission. Runs without
+a server.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from mospi import admission
+from mospi.admission import AdmissionController, AdmissionMiddleware, LatencyWindow
+from mospi.scheduler import BULK, DATA, INTERACTIVE
+
+
+def _controller(**kwargs):
+    settings = {"max_inflight": 10, "max_queued": 0, "target_latency": 0, "shed_data_at": 1.5, "queued": lambda: 0}
+    return AdmissionController(**{**settings, **kwargs})
+
+
+# ============================================================================
+# SHEDDING TESTS
+# ============================================================================
+
+def test_bulk_shed_first():
+    """Test bulk calls are shed at load 1 while data calls still pass"""
+    controller = _controller()
+    controller.inflight = 10
+
+    assert controller.admit(BULK) == (False, "inflight")
+    assert controller.admit(DATA)[0]
+    assert controller.admit(INTERACTIVE)[0]
+
+
+def test_data_shed_at_threshold():
+    """Test data calls are shed from shed_data_at, interactive calls never"""
+    controller = _controller()
+    controller.inflight = 15
+
+    assert not controller.admit(DATA)[0]
+    assert controller.admit(INTERACTIVE) == (True, "none")
+
+
+def test_highest_signal_sets_load():
+    """Test load is the highest ratio and a limit of 0 disables its signal"""
+    controller = _controller(max_inflight=0, max_queued=4, queued=lambda: 6)
+
+    assert controller.load() == (1.5, "queued")
+    assert _controller(max_inflight=0).load() == (0.0, "none")
+
+
+# ============================================================================
+# LATENCY WINDOW TESTS
+# ============================================================================
+
+def test_latency_window_forgets_old_samples(monkeypatch):
+    """Test samples older than the window stop counting"""
+    window = LatencyWindow(window=30)
+    for seconds in (1.0, 2.0, 10.0):
+        window.add(seconds)
+
+    assert window.percentile(0.9) == 10.0
+    now = time.monotonic()
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now + 31)
+    assert window.percentile(0.9) == 0.0
+
+
+# ============================================================================
+# MIDDLEWARE TESTS
+# ============================================================================
+
+def test_middleware_returns_retryable_rejection():
+    """Test a shed call gets the retryable overloaded result without running the tool"""
+    controller = _controller()
+    controller.inflight = 20
+    middleware = AdmissionMiddleware(controller)
+    context = SimpleNamespace(message=SimpleNamespace(name="4_get_data", arguments={}))
+    called = []
+
+    async def call_next(context):
+        called.append(context)
+
+    result = asyncio.run(middleware.on_call_tool(context, call_next))
+
+    assert called == []
+    assert result.structured_content["reason"] == "overloaded"
+    assert result.structured_content["retryable"] is True
+    assert controller.inflight == 20
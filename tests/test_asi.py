@@ -308,11 +308,33 @@ async def test_asi_data_combined_filters(client):
     assert "data" in result
 
 
+# ============================================================================
+# ASI CLASSIFICATION-YEAR ROUTING TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_asi_multi_era_series(client):
+    """Test years spanning several classification years are routed and merged"""
+    result = await call_tool(client, "4_get_data",
+                            dataset="ASI",
+                            filters={"year": "1995-96..2010-11", "sector_code": "Combined",
+                                     "nic_type": "All", "indicator_code": "1", "state_code": "99"})
+
+    assert_valid_api_response(result)
+    eras = [era["classification_year"] for era in result["eras"]]
+    assert eras == ["1987", "1998", "2004", "2008"], f"Should route to 4 eras, got {eras}"
+
+    years = [record["year"] for record in result["data"]]
+    assert years == sorted(years), "Records should be year-ordered"
+    assert all("_classification_year" in record for record in result["data"])
+
+
 # ============================================================================
 # SUMMARY
 # ============================================================================
-# Total: 25 tests covering:
+# Total: 26 tests covering:
 # - Classification years endpoint
 # - Metadata endpoint (different classification years)
 # - Data endpoint (all filter parameters)
 # - Pagination and format options
+# - Multi-era routing and merge
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+ASI Era Routing Tests
+Tests how mospi.asi splits a multi-era year list and stitches the per-era
+responses, and the page size get_data uses for each era. Runs without a server.
+"""
+
+import mospi_server
+from mospi import asi
+
+
+def _response(records, total=None):
+    response = {"data": records, "statusCode": True}
+    if total is not None:
+        response["meta_data"] = {"totalRecords": total}
+    return response
+
+
+# ============================================================================
+# ROUTER TESTS
+# ============================================================================
+
+def test_years_routed_by_era():
+    """Test a year range spanning two eras becomes one request per classification year"""
+    plans, unroutable = asi.plan_requests({"year": "2006-07..2009-10", "limit": "1000"})
+
+    assert unroutable == []
+    assert [(p["classification_year"], p["year"], p["limit"]) for p in plans] == [
+        ("2004", "2006-07,2007-08", "1000"), ("2008", "2008-09,2009-10", "1000")]
+
+
+def test_merge_reports_truncated_era():
+    """Test an era whose totalRecords exceed its page is listed under truncated"""
+    plans = [{"classification_year": "2004", "year": "2006-07", "limit": "2"},
+             {"classification_year": "2008", "year": "2008-09", "limit": "2"}]
+    result = asi.merge_responses(plans, [
+        _response([{"year": "2006-07"}], total=1),
+        _response([{"year": "2008-09"}, {"year": "2008-09"}], total=5),
+    ])
+
+    assert len(result["data"]) == 3
+    assert result["truncated"] == [
+        {"classification_year": "2008", "years": ["2008-09"], "records": 2, "total_records": 5, "next_page": 2}]
+
+
+def test_merge_complete_has_no_truncated():
+    """Test eras that returned all their records are not reported"""
+    plans = [{"classification_year": "2008", "year": "2008-09", "limit": "10", "page": "2"}]
+    result = asi.merge_responses(plans, [_response([{"year": "2008-09"}] * 3, total=13)])
+
+    assert "truncated" not in result
+
+
+# ============================================================================
+# SERVER TESTS
+# ============================================================================
+
+def test_eras_fetched_with_stitch_limit(monkeypatch):
+    """Test each era asks for STITCH_LIMIT records unless the caller set a limit"""
+    sent = []
+
+    def get_data_many(calls):
+        sent.extend(filters for _, filters in calls)
+        return [_response([{"year": filters["year"]}], total=1) for _, filters in calls]
+
+    monkeypatch.setattr(mospi_server.mospi, "get_data_many", get_data_many)
+    mospi_server.get_asi_across_eras({"year": "2007-08,2008-09", "sector_code": "1", "nic_type": "All"})
+    mospi_server.get_asi_across_eras({"year": "2008-09", "sector_code": "1", "nic_type": "All", "limit": "50"})
+
+    assert [f["limit"] for f in sent] == [mospi_server.STITCH_LIMIT] * 2 + ["50"]
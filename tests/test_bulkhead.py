@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Bulkhead Tests
+Tests slot limits, queue rejection, deadlines, cancellation and priority
+handoff of the per-dataset pools in mospi.bulkhead. Runs without a server.
+"""
+
+import threading
+import time
+
+import pytest
+
+from mospi import scheduler
+from mospi.bulkhead import Bulkhead, BulkheadFull, BulkheadRegistry
+from mospi.deadline import Deadline, DeadlineExceeded, RequestCancelled, use_deadline
+
+
+def _wait_for(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "condition not reached"
+        time.sleep(0.005)
+
+
+def _acquire_in_thread(pool, priority_class=scheduler.DATA, deadline=None):
+    """Start a thread that takes a slot and holds it until released; returns (thread, outcome, release)."""
+    outcome = {}
+    release = threading.Event()
+
+    def run():
+        token = scheduler._current.set(priority_class)
+        try:
+            with use_deadline(deadline or Deadline(10)):
+                with pool.slot():
+                    outcome["acquired"] = time.monotonic()
+                    release.wait(5)
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            scheduler._current.reset(token)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome, release
+
+
+# ============================================================================
+# POOL TESTS
+# ============================================================================
+
+def test_pools_by_dataset_path():
+    """Test API paths map to their dataset family and everything else to the shared pool"""
+    assert BulkheadRegistry.pool_for("/api/asi/getASIData") == "ASI"
+    assert BulkheadRegistry.pool_for("/api/cpi/getCPIIndex") == "CPI"
+    assert BulkheadRegistry.pool_for("/health") == "OTHER"
+
+
+def test_full_queue_rejects_at_once():
+    """Test a request is rejected without waiting when the pool's queue is full"""
+    pool = Bulkhead("T", limit=1, max_queue=0)
+    holder, _, release = _acquire_in_thread(pool)
+    _wait_for(lambda: pool.active == 1)
+
+    start = time.monotonic()
+    with pytest.raises(BulkheadFull):
+        with pool.slot():
+            pass
+    assert time.monotonic() - start < 0.1
+
+    release.set()
+    holder.join()
+    assert pool.active == 0
+
+
+def test_deadline_passes_while_queued():
+    """Test a waiter whose deadline runs out leaves the queue with DeadlineExceeded"""
+    pool = Bulkhead("T", limit=1, max_queue=1)
+    holder, _, release = _acquire_in_thread(pool)
+    _wait_for(lambda: pool.active == 1)
+
+    waiter, outcome, _ = _acquire_in_thread(pool, deadline=Deadline(0.05))
+    waiter.join(2)
+
+    assert isinstance(outcome["error"], DeadlineExceeded)
+    assert pool.queued == 0
+    release.set()
+    holder.join()
+    assert pool.active == 0
+
+
+def test_cancelled_waiter_leaves_queue():
+    """Test cancelling a queued request's deadline removes it and leaves the slot count intact"""
+    pool = Bulkhead("T", limit=1, max_queue=1)
+    holder, _, release = _acquire_in_thread(pool)
+    _wait_for(lambda: pool.active == 1)
+
+    deadline = Deadline(10)
+    waiter, outcome, _ = _acquire_in_thread(pool, deadline=deadline)
+    _wait_for(lambda: pool.queued == 1)
+    deadline.cancel()
+    waiter.join(2)
+
+    assert isinstance(outcome["error"], RequestCancelled)
+    assert pool.queued == 0
+    release.set()
+    holder.join()
+    assert pool.active == 0
+
+
+def test_slot_released_when_holder_fails():
+    """Test a slot is freed when the block holding it raises"""
+    pool = Bulkhead("T", limit=1, max_queue=0)
+    with pytest.raises(RuntimeError):
+        with pool.slot():
+            raise RuntimeError("upstream failed")
+
+    assert pool.active == 0
+
+
+# ============================================================================
+# PRIORITY TESTS
+# ============================================================================
+
+def test_freed_slot_goes_to_best_priority():
+    """Test a released slot is handed to the interactive waiter before an earlier bulk one"""
+    pool = Bulkhead("T", limit=1, max_queue=2)
+    holder, _, release = _acquire_in_thread(pool)
+    _wait_for(lambda: pool.active == 1)
+
+    bulk, bulk_outcome, bulk_release = _acquire_in_thread(pool, scheduler.BULK)
+    _wait_for(lambda: pool.queued == 1)
+    interactive, interactive_outcome, interactive_release = _acquire_in_thread(pool, scheduler.INTERACTIVE)
+    _wait_for(lambda: pool.queued == 2)
+
+    release.set()
+    _wait_for(lambda: "acquired" in interactive_outcome)
+    assert "acquired" not in bulk_outcome
+    assert pool.active == 1
+
+    interactive_release.set()
+    _wait_for(lambda: "acquired" in bulk_outcome)
+    bulk_release.set()
+    for thread in (holder, bulk, interactive):
+        thread.join()
+    assert pool.active == 0
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Result Cache Tests
+Tests the LRU/TTL store, key canonicalization and which results
+ResultCacheMiddleware keeps, in mospi.cache. Runs without a server.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from fastmcp.tools.tool import ToolResult
+
+from mospi import cache
+from mospi.cache import ResultCache, ResultCacheMiddleware, canonical_key, is_cacheable
+from mospi.canonical import RequestCanonicalizer
+
+
+def _result(structured):
+    return ToolResult(content=str(structured), structured_content=structured)
+
+
+def _call(tool, arguments):
+    return SimpleNamespace(message=SimpleNamespace(name=tool, arguments=arguments))
+
+
+# ============================================================================
+# STORE TESTS
+# ============================================================================
+
+def test_lru_eviction_within_budget():
+    """Test the least recently used entry is evicted when the budget is exceeded"""
+    store = ResultCache(max_bytes=400)
+    store.put("a", "A", 100, ttl=60)
+    store.put("b", "B", 100, ttl=60)
+    store.put("c", "C", 100, ttl=60)
+    store.get("a")
+    store.put("d", "D", 100, ttl=60)
+    store.put("e", "E", 100, ttl=60)
+
+    assert store.get("b") is None
+    assert store.get("a") == "A"
+    assert store.bytes == 400
+
+
+def test_oversized_entry_rejected():
+    """Test a result above the per-entry share of the budget is not stored"""
+    store = ResultCache(max_bytes=400)
+
+    assert store.put("a", "A", 101, ttl=60) is False
+    assert len(store) == 0
+
+
+def test_expired_entry_dropped(monkeypatch):
+    """Test an entry past its TTL is a miss and frees its bytes"""
+    store = ResultCache(max_bytes=400)
+    store.put("a", "A", 50, ttl=10)
+    now = time.monotonic()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + 11)
+
+    assert store.get("a") is None
+    assert store.bytes == 0
+
+
+def test_invalidate_one_tool():
+    """Test invalidate(tool) keeps the entries of other tools"""
+    store = ResultCache(max_bytes=1000)
+    store.put("4_get_data:{}", 1, 10, ttl=60)
+    store.put("3_get_metadata:{}", 2, 10, ttl=60)
+    store.invalidate("4_get_data")
+
+    assert store.get("4_get_data:{}") is None
+    assert store.get("3_get_metadata:{}") == 2
+
+
+# ============================================================================
+# KEY TESTS
+# ============================================================================
+
+def test_canonical_key_ignores_order_and_none():
+    """Test argument order and None values do not change the key"""
+    assert canonical_key("t", {"a": 1, "b": None, "c": "x"}) == canonical_key("t", {"c": "x", "a": 1})
+    assert canonical_key("t", {"a": 1}) != canonical_key("u", {"a": 1})
+
+
+# ============================================================================
+# MIDDLEWARE TESTS
+# ============================================================================
+
+def test_partial_errors_not_cacheable():
+    """Test results with a top-level error or a non-empty errors list are not cacheable"""
+    assert is_cacheable(_result({"data": [1]}))
+    assert is_cacheable(_result({"data": [1], "errors": []}))
+    assert not is_cacheable(_result({"error": "No Data Found"}))
+    assert not is_cacheable(_result({"data": [1], "errors": [{"base_year": "2004-05", "error": "timeout"}]}))
+
+
+def test_middleware_skips_partial_results():
+    """Test a partial result is recomputed on the next call while a complete one is served from cache"""
+    middleware = ResultCacheMiddleware(cache=ResultCache(max_bytes=1 << 20), ttls={"get_long_series": 60})
+    responses = iter([
+        _result({"data": [1], "errors": [{"error": "timeout"}]}),
+        _result({"data": [1, 2]}),
+        _result({"data": [3]}),
+    ])
+    calls = []
+
+    async def call_next(context):
+        calls.append(context)
+        return next(responses)
+
+    async def run():
+        context = _call("get_long_series", {"dataset": "CPI"})
+        return [await middleware.on_call_tool(context, call_next) for _ in range(3)]
+
+    first, second, third = asyncio.run(run())
+
+    assert len(calls) == 2
+    assert first.structured_content["errors"]
+    assert second.structured_content == third.structured_content == {"data": [1, 2]}
+
+
+def test_planned_limit_not_served_for_explicit_limit(monkeypatch):
+    """Test an unlimited get_data call and one with limit=10 are cached apart while limits are planned"""
+    keys = RequestCanonicalizer()
+    keys.configure(lambda dataset, filters: dataset.upper(), {"CPI_GROUP": "CPI_Group"}, lambda key: [],
+                   planned_paging=True)
+    monkeypatch.setattr(cache, "request_keys", keys)
+    middleware = ResultCacheMiddleware(cache=ResultCache(max_bytes=1 << 20), ttls={"4_get_data": 60})
+
+    async def call_next(context):
+        limit = int(context.message.arguments["filters"].get("limit", 12))
+        return _result({"data": list(range(limit))})
+
+    async def run():
+        planned = await middleware.on_call_tool(
+            _call("4_get_data", {"dataset": "CPI_GROUP", "filters": {"base_year": "2012"}}), call_next)
+        explicit = await middleware.on_call_tool(
+            _call("4_get_data", {"dataset": "CPI_GROUP", "filters": {"base_year": "2012", "limit": "10"}}), call_next)
+        return planned, explicit
+
+    planned, explicit = asyncio.run(run())
+
+    assert len(planned.structured_content["data"]) == 12
+    assert len(explicit.structured_content["data"]) == 10
+
+
+def test_local_tools_not_cached():
+    """Test the overview tool has no TTL, so every call runs the tool"""
+    assert "1_know_about_mospi_api" not in cache.TOOL_TTLS
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Canonical Request Key Tests
+Tests the normal form of filters and tool arguments in mospi.canonical.
+Runs without a server.
+"""
+
+import pytest
+
+from mospi.canonical import RequestCanonicalizer, canonical_filters, canonical_value
+
+DATASET_MAP = {"CPI_GROUP": "CPI_Group", "CPI_ITEM": "CPI_Item", "PLFS": "PLFS"}
+
+PARAM_DEFS = {
+    "CPI_GROUP": [
+        {"name": "base_year", "required": True, "schema": {"default": "2012"}},
+        {"name": "series", "schema": {"default": "Current"}},
+        {"name": "state_code"},
+    ],
+}
+
+
+def _resolve(dataset, filters):
+    dataset = dataset.upper()
+    if dataset == "CPI":
+        return "CPI_ITEM" if "item_code" in filters else "CPI_GROUP"
+    return dataset
+
+
+@pytest.fixture
+def keys():
+    keys = RequestCanonicalizer()
+    keys.configure(_resolve, DATASET_MAP, lambda key: PARAM_DEFS.get(key, []))
+    return keys
+
+
+# ============================================================================
+# VALUE TESTS
+# ============================================================================
+
+def test_lists_sorted_and_deduplicated():
+    """Test comma lists sort numeric codes numerically and drop repeats"""
+    assert canonical_value("10, 2,1,2") == "1,2,10"
+    assert canonical_value(" 2023 ") == "2023"
+
+
+def test_leading_zero_codes_stay_distinct():
+    """Test '01' and '1' are not merged"""
+    assert canonical_value("1,01") == "01,1"
+    assert canonical_filters({"state_code": "01"}) != canonical_filters({"state_code": "1"})
+
+
+def test_implicit_defaults_dropped():
+    """Test Format=JSON, page=1, limit=10 and None values do not change the key"""
+    assert canonical_filters({"year": 2023, "Format": "JSON", "page": "1", "limit": 10, "month": None}) == {"year": "2023"}
+    assert canonical_filters({"year": "2023", "limit": "50"}) == {"limit": "50", "year": "2023"}
+
+
+# ============================================================================
+# CANONICALIZER TESTS
+# ============================================================================
+
+def test_swagger_defaults_of_optional_params_dropped(keys):
+    """Test an optional param at its swagger default is dropped while a required one is kept"""
+    assert keys.filters("CPI", {"base_year": "2012", "series": "Current", "state_code": "3,1"}) == {
+        "base_year": "2012", "state_code": "1,3"}
+
+
+def test_routed_dataset_aliases_resolved(keys):
+    """Test get_data dataset aliases map to the API dataset they are routed to"""
+    spelled = keys.arguments("4_get_data", {"dataset": "cpi", "filters": {"state_code": "3,1"}})
+    direct = keys.arguments("4_get_data", {"dataset": "CPI_GROUP", "filters": {"state_code": "1,3", "page": 1}})
+
+    assert spelled == direct
+    assert spelled["dataset"] == "CPI_Group"
+    assert keys.arguments("4_get_data", {"dataset": "CPI", "filters": {"item_code": "1"}})["dataset"] == "CPI_Item"
+
+
+def test_other_tools_only_uppercase_dataset(keys):
+    """Test tools that do not route datasets keep their own names, upper-cased, and list order"""
+    arguments = keys.arguments("get_wpi_subtree", {"nodes": ["b", "a"], "dataset": "wpi", "limit": 5})
+
+    assert arguments == {"nodes": ["b", "a"], "dataset": "WPI", "limit": "5"}
+
+
+def test_planned_paging_kept_in_arguments(keys):
+    """Test limit=10 stays in get_data argument keys, but not upstream filters, while limits are planned"""
+    keys.configure(_resolve, DATASET_MAP, lambda key: PARAM_DEFS.get(key, []), planned_paging=True)
+    explicit = keys.arguments("4_get_data", {"dataset": "CPI", "filters": {"base_year": "2012", "limit": "10"}})
+    omitted = keys.arguments("4_get_data", {"dataset": "CPI", "filters": {"base_year": "2012"}})
+
+    assert explicit != omitted
+    assert explicit["filters"]["limit"] == "10"
+    assert keys.filters("CPI", {"base_year": "2012", "limit": "10"}) == {"base_year": "2012"}
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Traffic Capture Tests
+Tests argument anonymization in observability.capture, and that a captured
+call replays to the same result. Runs without a server.
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import mospi_server
+from mospi.wpi import WpiHierarchy
+from observability.capture import CaptureMiddleware, anonymize_arguments
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from replay import load_capture  # noqa: E402
+
+VOCABULARY = {"cereals", "rural", "inflation"}
+
+
+def keep(word):
+    return word.lower() in VOCABULARY
+
+
+# ============================================================================
+# ANONYMIZATION TESTS
+# ============================================================================
+
+def test_free_text_arguments_anonymized():
+    """Test user-written search terms and node names keep only known words"""
+    arguments = anonymize_arguments({
+        "user_query": "Ravi's rural inflation",
+        "search_term": "Cereals near 12 Park St",
+        "node": "Cereals Sharma",
+        "dataset": "CPI",
+    }, keep)
+
+    assert arguments == {"user_query": "rural inflation", "search_term": "Cereals", "node": "Cereals", "dataset": "CPI"}
+
+
+def test_node_lists_anonymized_per_element():
+    """Test get_wpi_subtree node lists stay lists with each name anonymized"""
+    arguments = anonymize_arguments({"nodes": ["Cereals", "Mr Rao"], "filters": {"year": "2023"}}, keep)
+
+    assert arguments == {"nodes": ["Cereals", ""], "filters": {"year": "2023"}}
+
+
+def test_everything_dropped_without_vocabulary():
+    """Test free text is emptied when no vocabulary is configured"""
+    assert anonymize_arguments({"search_term": "rajasthan"}) == {"search_term": ""}
+
+
+def test_codes_kept_verbatim():
+    """Test free-text values that are codes as a whole survive, inside lists too"""
+    arguments = anonymize_arguments({"node": "1000000000", "nodes": ["1010000000", "Mr Rao"], "search_term": "10.1"})
+
+    assert arguments == {"node": "1000000000", "nodes": ["1010000000", ""], "search_term": "10.1"}
+
+
+# ============================================================================
+# REPLAY TESTS
+# ============================================================================
+
+def test_captured_wpi_call_replays(tmp_path, monkeypatch):
+    """Test a captured get_wpi_subtree call by code resolves the same node when replayed"""
+    tree = WpiHierarchy()
+    tree.build({"major_group": [{"major_group_code": "1000000000", "major_group_name": "Primary articles"}]})
+    monkeypatch.setattr(mospi_server, "wpi_hierarchy", tree)
+    monkeypatch.setattr(mospi_server.catalogue, "ensure", lambda *args, **kwargs: None)
+    monkeypatch.setattr(mospi_server.mospi, "get_data_many",
+                        lambda calls: [{"data": [{"year": "2023"}], "statusCode": True} for _ in calls])
+    subtree = getattr(mospi_server.get_wpi_subtree, "fn", mospi_server.get_wpi_subtree)
+
+    path = str(tmp_path / "capture.jsonl")
+    middleware = CaptureMiddleware(path=path, keep_word=keep)
+    context = SimpleNamespace(
+        message=SimpleNamespace(name="get_wpi_subtree", arguments={"nodes": ["1000000000"], "filters": {"year": "2023"}}),
+        fastmcp_context=None)
+
+    async def call_next(context):
+        return subtree(**context.message.arguments)
+
+    asyncio.run(middleware.on_call_tool(context, call_next))
+    middleware._sink.flush()
+
+    record, = load_capture(path)
+    replayed = subtree(**record["arguments"])
+
+    assert record["arguments"]["nodes"] == ["1000000000"]
+    assert "error" not in replayed
+    assert replayed["requests"] == [{"year": "2023", "major_group_code": "1000000000"}]
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Result Size Estimation Tests
+Tests mospi.cardinality estimates and limit/page plans, and how mospi.scheduler
+classes unlimited 4_get_data calls. Runs without a server.
+"""
+
+import pytest
+
+from mospi import cardinality, scheduler
+from mospi.cardinality import CardinalityEstimator
+
+CPI_PARAMS = [
+    {"name": "base_year", "required": True, "schema": {"default": "2012"}},
+    {"name": "series", "required": True, "schema": {"default": "Current"}},
+    {"name": "year"},
+    {"name": "month_code"},
+    {"name": "state_code"},
+    {"name": "group_code"},
+    {"name": "subgroup_code"},
+    {"name": "sector_code"},
+    {"name": "limit"},
+    {"name": "page"},
+    {"name": "Format", "required": True, "schema": {"default": "JSON"}},
+]
+
+CPI_SIZES = {"state": 36, "group": 6, "sector": 3}
+
+
+@pytest.fixture
+def estimator(monkeypatch):
+    monkeypatch.setattr(cardinality, "AUTO_LIMIT", True)
+    monkeypatch.setattr(cardinality, "AUTO_LIMIT_MAX", 100)
+    monkeypatch.setattr(cardinality, "AUTO_MAX_RECORDS", 300)
+    e = CardinalityEstimator(lambda dataset: CPI_SIZES if dataset == "CPI" else {})
+    e.configure(lambda swagger_key: CPI_PARAMS)
+    return e
+
+
+# ============================================================================
+# ESTIMATE TESTS
+# ============================================================================
+
+def test_estimate_product_of_dimensions(estimator):
+    """Test requested lists and omitted code sets multiply; defaulted params count once"""
+    estimate = estimator.estimate("CPI_GROUP", "CPI_Group", {"year": "2023", "group_code": "1", "sector_code": "1,2"})
+
+    assert estimate.dimensions["sector_code"] == 2
+    assert estimate.dimensions["state_code"] == 36
+    assert estimate.dimensions["month_code"] == 12
+    assert "base_year" not in estimate.dimensions
+    assert estimate.records == 2 * 36 * 12
+    assert estimate.unknown == ["subgroup_code"]
+    assert estimate.describe()["lower_bound"] is True
+
+
+def test_estimate_bytes_learned_from_responses(estimator):
+    """Test estimated bytes use the record size seen in responses"""
+    filters = {"year": "2023", "group_code": "1", "sector_code": "1", "state_code": "1", "month_code": "1"}
+    before = estimator.estimate("CPI_GROUP", "CPI_Group", filters)
+    assert before.bytes == cardinality.DEFAULT_RECORD_BYTES
+
+    estimator.observe("CPI_Group", before, {"data": [{"index": "1" * 100}]})
+    after = estimator.estimate("CPI_GROUP", "CPI_Group", filters)
+    assert after.bytes > 100
+
+
+def test_estimate_calibrated_by_total_records(estimator):
+    """Test totalRecords scales later estimates for the same omitted params"""
+    filters = {"year": "2023", "sector_code": "1"}
+    first = estimator.estimate("CPI_GROUP", "CPI_Group", filters)
+    estimator.observe("CPI_Group", first, {"data": [{"index": "1"}], "meta_data": {"totalRecords": first.product // 4}})
+
+    second = estimator.estimate("CPI_GROUP", "CPI_Group", {"year": "2024", "sector_code": "2"})
+    assert second.records == first.product // 4
+    assert second.describe()["calibrated"] is True
+
+
+# ============================================================================
+# PLAN TESTS
+# ============================================================================
+
+def test_plan_small_result(estimator):
+    """Test small results keep MoSPI's default page"""
+    estimate = estimator.estimate("CPI_GROUP", "CPI_Group", {
+        "year": "2023", "month_code": "1", "state_code": "1", "group_code": "1", "sector_code": "1"})
+    plan = estimator.plan(estimate, {})
+
+    assert (plan.limit, plan.pages, plan.automatic) == (10, 1, True)
+
+
+def test_plan_caps_page_size_and_total(estimator):
+    """Test large results are capped per page and in total"""
+    estimate = estimator.estimate("CPI_GROUP", "CPI_Group", {"year": "2023"})
+    plan = estimator.plan(estimate, {})
+
+    assert plan.limit == 100
+    assert plan.pages == 3
+
+
+def test_plan_keeps_explicit_limit(estimator):
+    """Test an explicit limit is reported, not replaced"""
+    estimate = estimator.estimate("CPI_GROUP", "CPI_Group", {"year": "2023", "limit": "50"})
+    plan = estimator.plan(estimate, {"limit": "50"})
+
+    assert (plan.limit, plan.automatic) == (50, False)
+
+
+def test_plan_disabled(estimator, monkeypatch):
+    """Test MOSPI_AUTO_LIMIT=0 keeps MoSPI's default page"""
+    monkeypatch.setattr(cardinality, "AUTO_LIMIT", False)
+    estimate = estimator.estimate("CPI_GROUP", "CPI_Group", {"year": "2023"})
+
+    assert estimator.plan(estimate, {}).limit == 10
+
+
+# ============================================================================
+# CLASSIFICATION TESTS
+# ============================================================================
+
+def test_planned_records_ignores_explicit_limit(estimator):
+    """Test calls with limit/page are not planned"""
+    assert estimator.planned_records("CPI", {"limit": "20"}) is None
+    assert estimator.planned_records("CPI", {"page": "2"}) is None
+
+
+def test_classify_uses_planned_records(monkeypatch):
+    """Test unlimited get_data calls are classed by the records they will fetch"""
+    monkeypatch.setattr(scheduler, "_limit_planner", lambda dataset, filters: 5000 if dataset == "CPI" else 10)
+
+    assert scheduler.classify("4_get_data", {"dataset": "CPI", "filters": {}}) == scheduler.BULK
+    assert scheduler.classify("4_get_data", {"dataset": "PLFS", "filters": {}}) == scheduler.DATA
+    assert scheduler.classify("4_get_data", {"dataset": "CPI", "filters": {"limit": "20"}}) == scheduler.DATA
+
+
+def test_classify_survives_planner_errors(monkeypatch):
+    """Test a failing planner falls back to MoSPI's default page"""
+    def broken(dataset, filters):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(scheduler, "_limit_planner", broken)
+
+    assert scheduler.classify("4_get_data", {"dataset": "CPI", "filters": {}}) == scheduler.DATA
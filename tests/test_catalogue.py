@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Catalogue Cache Tests
+Tests that cached payloads are isolated from the callers that store them and
+that background refreshes only run when a source is stale, in mospi.catalogue.
+Runs without a server.
+"""
+
+import time
+
+from mospi import catalogue as catalogue_module
+from mospi.catalogue import Catalogue
+
+
+def _indicators():
+    return {"data": [{"indicator_code": "1", "description": "Unemployment rate"}]}
+
+
+# ============================================================================
+# STORAGE TESTS
+# ============================================================================
+
+def test_put_stores_a_copy():
+    """Test decorating a payload after put does not change the cached one"""
+    catalogue = Catalogue()
+    result = _indicators()
+    catalogue.put("PLFS", "indicators", result)
+    result["_user_query"] = "jobs"
+    result["data"][0]["description"] = "changed"
+
+    cached = catalogue.get("PLFS", "indicators")
+    assert "_user_query" not in cached
+    assert cached["data"][0]["description"] == "Unemployment rate"
+
+
+def test_listeners_see_changes_only():
+    """Test listeners are notified for new or changed payloads, not for repeats"""
+    catalogue = Catalogue()
+    seen = []
+    catalogue.subscribe(lambda dataset, key, payload: seen.append((dataset, key)))
+
+    assert catalogue.put("PLFS", "indicators", _indicators())
+    assert not catalogue.put("PLFS", "indicators", _indicators())
+    assert not catalogue.put("PLFS", "indicators", {"error": "timeout"})
+    assert seen == [("PLFS", "indicators")]
+
+
+# ============================================================================
+# REFRESH TESTS
+# ============================================================================
+
+def test_needs_refresh_only_when_stale():
+    """Test a fresh catalogue does not ask for a background refresh"""
+    catalogue = Catalogue(ttl=60)
+    catalogue.register_source("PLFS", "indicators", _indicators)
+
+    assert catalogue.needs_refresh()
+    catalogue.refresh()
+    assert not catalogue.needs_refresh()
+
+
+def test_failed_source_waits_before_retry(monkeypatch):
+    """Test a source whose fetch failed is retried only after REFRESH_RETRY_AFTER"""
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise TimeoutError
+
+    catalogue = Catalogue(ttl=60)
+    catalogue.register_source("NAS", "indicators", failing)
+    catalogue.refresh()
+
+    assert len(calls) == 1
+    assert not catalogue.needs_refresh()
+    now = time.monotonic()
+    monkeypatch.setattr(catalogue_module.time, "monotonic", lambda: now + catalogue_module.REFRESH_RETRY_AFTER + 1)
+    assert catalogue.needs_refresh()
+
+
+def test_background_refresh_skipped_when_fresh(monkeypatch):
+    """Test refresh_in_background starts no thread while every source is fresh"""
+    catalogue = Catalogue(ttl=60)
+    catalogue.register_source("PLFS", "indicators", _indicators)
+    catalogue.refresh()
+    started = []
+    monkeypatch.setattr(catalogue_module.threading.Thread, "start", lambda thread: started.append(thread))
+
+    catalogue.refresh_in_background()
+    assert started == []
+    catalogue.refresh_in_background(force=True)
+    assert len(started) == 1
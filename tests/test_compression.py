@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Response Compression Tests
+Tests Accept-Encoding negotiation and the ASGI middleware in mospi.compression
+against small in-process ASGI apps. Runs without a server.
+"""
+
+import asyncio
+import zlib
+
+from mospi.compression import CompressionMiddleware, negotiate
+
+ALL = ["zstd", "br", "gzip"]
+
+
+def _app(messages):
+    """ASGI app that sends the given response messages."""
+    async def app(scope, receive, send):
+        for message in messages:
+            await send(message)
+    return app
+
+
+def _start(status=200, content_type="application/json", length=None):
+    headers = [(b"content-type", content_type.encode())]
+    if length is not None:
+        headers.append((b"content-length", str(length).encode()))
+    return {"type": "http.response.start", "status": status, "headers": headers}
+
+
+def _body(body, more_body=False):
+    return {"type": "http.response.body", "body": body, "more_body": more_body}
+
+
+def _run(messages, accept="gzip", minimum_size=100):
+    """Messages sent by the middleware, and its response headers as a dict."""
+    sent = []
+    middleware = CompressionMiddleware(_app(messages), minimum_size=minimum_size, encodings=["gzip"])
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept.encode())]}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, None, send))
+    headers = {k.decode(): v.decode() for k, v in sent[0]["headers"]}
+    return sent, headers
+
+
+# ============================================================================
+# NEGOTIATION TESTS
+# ============================================================================
+
+def test_preference_on_equal_weights():
+    """Test zstd beats brotli beats gzip when the client accepts all equally"""
+    assert negotiate("gzip, br, zstd", ALL) == "zstd"
+    assert negotiate("gzip, br", ALL) == "br"
+    assert negotiate("gzip, br", ["gzip"]) == "gzip"
+
+
+def test_q_values_respected():
+    """Test a higher q-value wins over preference and q=0 excludes an encoding"""
+    assert negotiate("zstd;q=0.5, gzip;q=0.9", ALL) == "gzip"
+    assert negotiate("gzip;q=0", ALL) is None
+    assert negotiate("*;q=0.1, zstd;q=0", ALL) == "br"
+
+
+def test_identity_only_not_compressed():
+    """Test identity or an empty header selects no encoding"""
+    assert negotiate("identity", ALL) is None
+    assert negotiate("", ALL) is None
+
+
+# ============================================================================
+# MIDDLEWARE TESTS
+# ============================================================================
+
+def test_large_body_compressed():
+    """Test a body above the threshold is gzipped, loses content-length and gains Vary"""
+    body = b'{"data": "' + b"x" * 500 + b'"}'
+    sent, headers = _run([_start(length=len(body)), _body(body)])
+
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert zlib.decompress(sent[1]["body"], 31) == body
+
+
+def test_small_body_passed_through():
+    """Test a body under the threshold is sent unchanged with its headers"""
+    sent, headers = _run([_start(length=2), _body(b"{}")])
+
+    assert "content-encoding" not in headers
+    assert headers["content-length"] == "2"
+    assert sent[1]["body"] == b"{}"
+
+
+def test_no_content_passed_through():
+    """Test a 204 response with an empty body is not compressed"""
+    sent, headers = _run([_start(status=204), _body(b"")])
+
+    assert sent[0]["status"] == 204
+    assert "content-encoding" not in headers
+    assert sent[1]["body"] == b""
+
+
+def test_identity_request_passed_through():
+    """Test a client that only accepts identity gets the body as is"""
+    body = b"x" * 500
+    sent, headers = _run([_start(), _body(body)], accept="identity")
+
+    assert "content-encoding" not in headers
+    assert sent[1]["body"] == body
+
+
+def test_event_stream_flushed_per_chunk():
+    """Test each streamed chunk is decodable on arrival, before the stream ends"""
+    events = [b"event: message\ndata: 1\n\n", b"event: message\ndata: 2\n\n"]
+    sent, headers = _run([_start(content_type="text/event-stream"),
+                          _body(events[0], more_body=True), _body(events[1], more_body=True), _body(b"")])
+
+    assert headers["content-encoding"] == "gzip"
+    decoder = zlib.decompressobj(31)
+    assert decoder.decompress(sent[1]["body"]) == events[0]
+    assert decoder.decompress(sent[2]["body"]) == events[1]
+    assert [m["more_body"] for m in sent[1:]] == [True, True, False]
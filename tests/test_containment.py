@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Containment Cache Tests
+Tests storing complete get_data results and answering narrower requests
+from them, in mospi.containment. Runs without a server.
+"""
+
+import pytest
+
+from mospi.containment import ContainmentCache, record_fields
+
+STATES = {"1": "Jammu and Kashmir", "8": "Rajasthan", "27": "Maharashtra"}
+
+
+def _records(field="state_code", labels=False):
+    return [
+        {field: STATES[code] if labels else code, "year": year, "value": f"{code}.{year}"}
+        for code in STATES for year in ("2022", "2023")
+    ]
+
+
+def _result(records, total=None):
+    result = {"data": records, "msg": "Data fetched successfully", "statusCode": True}
+    if total is not None:
+        result["meta_data"] = {"page": 1, "totalRecords": total}
+    return result
+
+
+@pytest.fixture
+def cache():
+    cache = ContainmentCache(max_entries=8)
+    cache.configure(lambda dataset, param, code: STATES.get(code) if dataset == "PLFS" and param == "state_code" else None)
+    return cache
+
+
+# ============================================================================
+# STORE TESTS
+# ============================================================================
+
+def test_truncated_result_not_stored(cache):
+    """Test a result that fills its page is not kept as a superset"""
+    filters = {"state_code": "1,8,27", "limit": "6"}
+
+    assert not cache.store("PLFS", filters, _result(_records()))
+    assert cache.store("PLFS", {**filters, "limit": "100"}, _result(_records()))
+
+
+def test_later_pages_and_errors_not_stored(cache):
+    """Test page 2 and error responses are not kept"""
+    assert not cache.store("PLFS", {"state_code": "1,8,27", "limit": "100", "page": "2"}, _result(_records()))
+    assert not cache.store("PLFS", {"state_code": "1,8,27", "limit": "100"}, {"error": "timeout"})
+    assert len(cache) == 0
+
+
+def test_record_fields_for_code_params():
+    """Test a code param may come back under its code, stem or name field"""
+    assert record_fields("state_code") == ("state_code", "state", "state_name")
+    assert record_fields("year") == ("year",)
+
+
+# ============================================================================
+# LOOKUP TESTS
+# ============================================================================
+
+def test_subset_answered_from_superset(cache):
+    """Test a narrower request is answered by filtering the cached records"""
+    cache.store("PLFS", {"state_code": "1,8,27", "limit": "100"}, _result(_records(), total=6))
+    answer = cache.lookup("PLFS", {"state_code": "8", "limit": "100"})
+
+    assert [r["state_code"] for r in answer["data"]] == ["8", "8"]
+    assert answer["meta_data"]["totalRecords"] == 2
+
+
+def test_disjoint_request_misses(cache):
+    """Test a request with values outside the cached superset is not answered"""
+    cache.store("PLFS", {"state_code": "1,8", "limit": "100"}, _result(_records()[:4]))
+
+    assert cache.lookup("PLFS", {"state_code": "27", "limit": "100"}) is None
+    assert cache.lookup("PLFS", {"state_code": "8", "year": "2023", "limit": "100"}) is None
+
+
+def test_labels_narrowed_through_code_lookup(cache):
+    """Test records carrying state labels are narrowed by a state_code request"""
+    cache.store("PLFS", {"state_code": "1,8,27", "limit": "100"}, _result(_records(field="state", labels=True)))
+    answer = cache.lookup("PLFS", {"state_code": "27,8", "limit": "100"})
+
+    assert sorted({r["state"] for r in answer["data"]}) == ["Maharashtra", "Rajasthan"]
+
+
+def test_unknown_labels_not_filterable(cache):
+    """Test labels that cannot be mapped to the requested codes are not narrowed"""
+    cache.store("CPI_Group", {"state_code": "1,8,27", "limit": "100"}, _result(_records(field="state", labels=True)))
+
+    assert cache.lookup("CPI_Group", {"state_code": "8", "limit": "100"}) is None
+
+
+def test_paging_applied_to_matches(cache):
+    """Test the request's own limit and page select from the matching records"""
+    cache.store("PLFS", {"state_code": "1,8,27", "limit": "100"}, _result(_records(), total=6))
+
+    first = cache.lookup("PLFS", {"state_code": "1,27", "limit": "3"})
+    second = cache.lookup("PLFS", {"state_code": "1,27", "limit": "3", "page": "2"})
+    beyond = cache.lookup("PLFS", {"state_code": "1,27", "limit": "3", "page": "3"})
+
+    assert len(first["data"]) == 3 and len(second["data"]) == 1
+    assert first["meta_data"]["totalRecords"] == 4
+    assert beyond["msg"] == "No Data Found" and "data" not in beyond
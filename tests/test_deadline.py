@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Deadline Tests
+Tests expiry, cancellation and context propagation of tool call deadlines
+in mospi.deadline, including DeadlineMiddleware's shielded task. Runs
+without a server.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from mospi import deadline as deadlines
+from mospi.deadline import (
+    Deadline, DeadlineExceeded, DeadlineMiddleware, RequestCancelled, check_deadline, current_deadline,
+    upstream_timeout,
+)
+
+
+def _context(tool="4_get_data"):
+    return SimpleNamespace(message=SimpleNamespace(name=tool, arguments={}))
+
+
+# ============================================================================
+# DEADLINE TESTS
+# ============================================================================
+
+def test_expired_deadline_raises():
+    """Test a deadline with no time left raises DeadlineExceeded on check and timeout"""
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+
+    with pytest.raises(DeadlineExceeded):
+        deadline.check()
+    with pytest.raises(DeadlineExceeded):
+        deadline.timeout(30)
+
+
+def test_timeout_capped_by_time_left():
+    """Test upstream timeouts never exceed the time left, and are unchanged outside a call"""
+    assert upstream_timeout(30) == 30
+    assert Deadline(5).timeout(30) <= 5
+    assert Deadline(60).timeout(30) == 30
+
+
+def test_child_cancelled_with_parent():
+    """Test a child deadline shares its parent's expiry and cancellation, but not the reverse"""
+    parent = Deadline(5)
+    child, sibling = Deadline(0, parent), Deadline(0, parent)
+    child.cancel()
+
+    assert child.expires_at == parent.expires_at
+    assert not parent.cancelled and not sibling.cancelled
+    parent.cancel()
+    with pytest.raises(RequestCancelled):
+        sibling.check()
+
+
+# ============================================================================
+# MIDDLEWARE TESTS
+# ============================================================================
+
+def test_deadline_visible_inside_the_tool():
+    """Test the tool sees the call's deadline, in its task and in a worker thread"""
+    seen = {}
+
+    async def call_next(context):
+        seen["task"] = current_deadline()
+        seen["thread"] = await asyncio.to_thread(current_deadline)
+        return "ok"
+
+    async def run():
+        return await DeadlineMiddleware().on_call_tool(_context(), call_next)
+
+    assert asyncio.run(run()) == "ok"
+    assert seen["task"] is not None and seen["thread"] is seen["task"]
+    assert current_deadline() is None
+
+
+def test_context_changes_do_not_leave_the_task():
+    """Test contextvars set below the middleware are not visible above it, so results carry such state"""
+    marker = contextvars.ContextVar("marker", default=None)
+
+    async def call_next(context):
+        marker.set("inner")
+        return marker.get()
+
+    async def run():
+        inner = await DeadlineMiddleware().on_call_tool(_context(), call_next)
+        return inner, marker.get()
+
+    assert asyncio.run(run()) == ("inner", None)
+
+
+def test_disconnect_cancels_upstream_work():
+    """Test cancelling the caller returns at once and flags the deadline the worker thread checks"""
+    started = threading.Event()
+    stopped = threading.Event()
+
+    def upstream():
+        started.set()
+        while True:
+            try:
+                check_deadline()
+            except RequestCancelled:
+                stopped.set()
+                return
+            time.sleep(0.01)
+
+    async def call_next(context):
+        await asyncio.to_thread(upstream)
+
+    async def run():
+        caller = asyncio.ensure_future(DeadlineMiddleware().on_call_tool(_context(), call_next))
+        await asyncio.to_thread(started.wait, 2)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        return await asyncio.to_thread(stopped.wait, 2)
+
+    assert asyncio.run(run())
+
+
+def test_requested_budget_applied(monkeypatch):
+    """Test X-MoSPI-Timeout shortens the tool's budget but never lengthens it"""
+    monkeypatch.setattr(deadlines, "get_http_headers", lambda include_all: {deadlines.TIMEOUT_HEADER: "2"})
+    assert deadlines.requested_budget(60) == 2
+    monkeypatch.setattr(deadlines, "get_http_headers", lambda include_all: {deadlines.TIMEOUT_HEADER: "600"})
+    assert deadlines.requested_budget(60) == 60
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Export Tests
+Tests paging and the Arrow/Parquet writer in mospi.export, including what
+conforming later pages to the first page's schema reports. Runs without a
+server; needs pyarrow.
+"""
+
+import io
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq  # noqa: E402
+
+from mospi.export import fetch_pages, page_batch, write_export  # noqa: E402
+
+
+def _page(values, **extra):
+    return [{"state": "Rajasthan", "year": "2023", "value": v, **extra} for v in values]
+
+
+# ============================================================================
+# PAGING TESTS
+# ============================================================================
+
+def test_fetch_pages_stops_at_short_page():
+    """Test paging stops after a page shorter than the page size"""
+    requested = []
+
+    def fetch(filters):
+        requested.append(filters["page"])
+        return {"data": [{"value": "1"}] * (2 if filters["page"] == "1" else 1)}
+
+    pages = list(fetch_pages(fetch, {"year": "2023"}, page_size=2))
+
+    assert [len(p) for p in pages] == [2, 1]
+    assert requested == ["1", "2"]
+
+
+def test_fetch_pages_raises_on_error():
+    """Test an upstream error on any page fails the export"""
+    with pytest.raises(RuntimeError, match="timeout"):
+        list(fetch_pages(lambda filters: {"error": "timeout"}, {}, page_size=2))
+
+
+# ============================================================================
+# SCHEMA TESTS
+# ============================================================================
+
+def test_first_page_types_columns():
+    """Test measures become float64 and dimensions dictionary strings"""
+    batch = page_batch(_page(["1.5", "2"]))
+
+    assert batch.schema.field("value").type == pa.float64()
+    assert pa.types.is_dictionary(batch.schema.field("state").type)
+    assert batch.column("_period").to_pylist() == ["2023", "2023"]
+
+
+def test_later_page_losses_reported():
+    """Test unparsable measures and unknown fields on later pages are counted in the description"""
+    pages = [_page(["1.5", "2"]), _page(["3", "n/a*", "4 Rural"], note="revised")]
+    export = write_export(iter(pages), "arrow")
+    described = export.describe()
+    table = pa.ipc.open_stream(export.data).read_all()
+
+    assert table.column("value").to_pylist() == [1.5, 2.0, 3.0, None, None]
+    assert described["coerced_to_null"] == {"value": 2}
+    assert described["dropped_fields"] == {"note": 3}
+    assert "_warning" in described
+
+
+def test_clean_export_has_no_warning():
+    """Test an export whose pages share one schema reports no losses"""
+    export = write_export(iter([_page(["1"]), _page(["2", "NA"])]), "parquet", truncated_at=3)
+    described = export.describe()
+
+    assert pq.read_table(io.BytesIO(export.data)).num_rows == 3
+    assert described["truncated"] is True
+    assert "coerced_to_null" not in described and "dropped_fields" not in described
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+No-Data Fallback Tests
+Tests the negative cache and relaxation planning in mospi.fallback, and that
+MoSPI.get_data_first stops the variants it no longer needs. Runs without a server.
+"""
+
+import threading
+import time
+
+from mospi import fallback
+from mospi.client import MoSPI
+from mospi.deadline import Deadline, RequestCancelled, check_deadline, use_deadline
+from mospi.fallback import NegativeCache, has_data, plan_relaxations
+
+PLFS_PARAMS = [
+    {"name": "indicator_code", "required": True},
+    {"name": "frequency_code", "required": True},
+    {"name": "year"},
+    {"name": "state_code"},
+    {"name": "nic_group_code"},
+    {"name": "broad_industry_work_code"},
+]
+
+
+# ============================================================================
+# RELAXATION TESTS
+# ============================================================================
+
+def test_alternate_params_dropped_first():
+    """Test alternate-code params are relaxed before other optional filters"""
+    filters = {"indicator_code": "3", "frequency_code": "1", "year": "2023", "state_code": "8",
+               "broad_industry_work_code": "2", "limit": "50"}
+    dropped = [name for name, _ in plan_relaxations(filters, PLFS_PARAMS)]
+
+    assert dropped == ["broad_industry_work_code", "year", "state_code"]
+
+
+def test_required_and_paging_params_kept():
+    """Test each variant keeps required and paging params and drops exactly one filter"""
+    filters = {"indicator_code": "3", "frequency_code": "1", "year": "2023", "limit": "50"}
+    variants = plan_relaxations(filters, PLFS_PARAMS)
+
+    assert variants == [("year", {"indicator_code": "3", "frequency_code": "1", "limit": "50"})]
+
+
+def test_variant_count_capped():
+    """Test no more than max_variants variants are planned"""
+    filters = {"indicator_code": "3", "frequency_code": "1", "year": "2023", "state_code": "8", "nic_group_code": "1"}
+
+    assert len(plan_relaxations(filters, PLFS_PARAMS, max_variants=2)) == 2
+
+
+# ============================================================================
+# NEGATIVE CACHE TESTS
+# ============================================================================
+
+def test_negative_entries_expire(monkeypatch):
+    """Test a remembered empty combination is forgotten after the TTL"""
+    cache = NegativeCache(ttl=10)
+    cache.add("PLFS", {"year": "2023", "state_code": "8"})
+
+    assert cache.contains("PLFS", {"state_code": "8", "year": "2023"})
+    assert not cache.contains("CPI_Group", {"state_code": "8", "year": "2023"})
+    now = time.monotonic()
+    monkeypatch.setattr(fallback.time, "monotonic", lambda: now + 11)
+    assert not cache.contains("PLFS", {"state_code": "8", "year": "2023"})
+    assert len(cache) == 0
+
+
+def test_negative_cache_bounded_and_disabled():
+    """Test the oldest entry is evicted past max_entries and a TTL of 0 stores nothing"""
+    cache = NegativeCache(ttl=60, max_entries=2)
+    for year in ("2021", "2022", "2023"):
+        cache.add("PLFS", {"year": year})
+
+    assert not cache.contains("PLFS", {"year": "2021"})
+    assert cache.contains("PLFS", {"year": "2023"})
+    disabled = NegativeCache(ttl=0)
+    disabled.add("PLFS", {"year": "2021"})
+    assert len(disabled) == 0
+
+
+# ============================================================================
+# FIRST-WITH-DATA TESTS
+# ============================================================================
+
+class SlowVariants(MoSPI):
+    """get_data answers the 'fast' variant at once; the others wait until cancelled."""
+
+    def __init__(self):
+        super().__init__(base_url="http://unused")
+        self.started = []
+        self.cancelled = []
+        self.lock = threading.Lock()
+
+    def get_data(self, dataset_name, params=None):
+        if params.get("variant") == "fast":
+            return {"data": [{"value": 1}]}
+        with self.lock:
+            self.started.append(params["variant"])
+        try:
+            for _ in range(200):
+                check_deadline()
+                time.sleep(0.01)
+        except RequestCancelled:
+            with self.lock:
+                self.cancelled.append(params["variant"])
+            return {"error": "cancelled"}
+        return {"msg": "No Data Found"}
+
+
+def test_first_with_data_cancels_stragglers():
+    """Test variants in flight are cancelled once one returns data and the rest never start"""
+    client = SlowVariants()
+    calls = [("PLFS", {"variant": "slow-1"}), ("PLFS", {"variant": "fast"}), ("PLFS", {"variant": "slow-2"})]
+
+    index, completed = client.get_data_first(calls, has_data)
+    time.sleep(0.2)
+
+    assert index == 1 and has_data(completed[1])
+    assert "slow-1" in client.started
+    assert sorted(client.cancelled) == sorted(client.started)
+
+
+def test_first_with_data_leaves_caller_deadline_alone():
+    """Test cancelling the variants does not cancel the tool call's own deadline"""
+    client = SlowVariants()
+    deadline = Deadline(60)
+
+    with use_deadline(deadline):
+        client.get_data_first([("PLFS", {"variant": "fast"}), ("PLFS", {"variant": "slow"})], has_data)
+
+    assert not deadline.cancelled
@@ -269,11 +269,32 @@ async def test_iip_monthly_csv_format(client):
     assert "data" in result
 
 
+# ============================================================================
+# IIP LONG SERIES TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_iip_long_series_across_base_years(client):
+    """Test stitching annual IIP across the 2004-05 and 2011-12 base years"""
+    result = await call_tool(client, "get_long_series",
+                            dataset="IIP",
+                            filters={"type": "All", "category_code": "01"},
+                            start_year=2008, end_year=2020)
+
+    assert "error" not in result, f"Stitching failed: {result.get('error')}"
+    assert result["reference"] == "2011-12"
+    assert len(result["links"]) >= 1, "Should link at least two base years"
+
+    sources = {record["_source"] for record in result["data"]}
+    assert "2011-12" in sources and "2004-05" in sources
+
+
 # ============================================================================
 # SUMMARY
 # ============================================================================
-# Total: 20 tests covering:
+# Total: 21 tests covering:
 # - Metadata endpoint (both frequencies)
 # - Annual data (all filter parameters)
 # - Monthly data (all filter parameters)
 # - Pagination and format options
+# - Cross-base-year stitching
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Log Sink Tests
+Tests the bounded queue, backpressure sampling, flush on shutdown and
+chunked writes of observability.log_sink. Runs without a server.
+"""
+
+import io
+import threading
+
+from observability import log_sink
+from observability.log_sink import AsyncLogSink, BoundedStreamWriter
+
+
+class BlockingStream(io.StringIO):
+    """Text stream whose writes wait until released, to hold records in the queue."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait(5)
+        return super().write(text)
+
+
+class BinaryStream(io.StringIO):
+    """Text stream with a binary buffer, like sys.stderr."""
+
+    def __init__(self):
+        super().__init__()
+        self.buffer = io.BytesIO()
+
+
+# ============================================================================
+# QUEUE TESTS
+# ============================================================================
+
+def test_records_written_in_order_after_flush():
+    """Test every submitted record reaches the stream, in order, once flush returns"""
+    stream = io.StringIO()
+    sink = AsyncLogSink(stream=stream)
+    for i in range(50):
+        assert sink.submit("[T] ", f'{{"i": {i}}}'.encode())
+
+    assert sink.flush(timeout=5)
+    assert stream.getvalue().splitlines() == [f'[T] {{"i": {i}}}' for i in range(50)]
+    assert sink.stats()["written"] == 50 and sink.stats()["queued_records"] == 0
+
+
+def test_full_queue_drops_and_counts():
+    """Test records beyond the queue bound are dropped at once and counted"""
+    stream = BlockingStream()
+    sink = AsyncLogSink(stream=stream, max_records=2, sample_bytes=1 << 20)
+    accepted = [sink.submit("", b"x") for _ in range(6)]
+
+    stats = sink.stats()
+    stream.release.set()
+    assert sink.flush(timeout=5)
+    # The writer may have taken one record off the queue before blocking
+    assert accepted[:2] == [True, True] and not accepted[-1]
+    assert stats["dropped_full"] >= 3
+    assert sink.stats()["written"] == accepted.count(True)
+
+
+def test_large_records_sampled_under_pressure(monkeypatch):
+    """Test large records are sampled out once the queue is half full while small ones are kept"""
+    monkeypatch.setattr(log_sink.random, "random", lambda: 0.99)
+    stream = BlockingStream()
+    sink = AsyncLogSink(stream=stream, max_records=10, max_bytes=1 << 20, sample_bytes=100, sample_rate=0.1)
+    for _ in range(6):
+        sink.submit("", b"s")
+
+    assert sink.submit("", b"L" * 200) is False
+    assert sink.submit("", b"s") is True
+    assert sink.stats()["dropped_sampled"] == 1
+    stream.release.set()
+    assert sink.flush(timeout=5)
+
+
+def test_write_errors_counted():
+    """Test a failing stream is counted and does not stop the writer"""
+    class Broken(io.StringIO):
+        def write(self, text):
+            raise OSError("closed")
+
+    sink = AsyncLogSink(stream=Broken())
+    sink.submit("", b"a")
+    sink.submit("", b"b")
+
+    assert sink.flush(timeout=5)
+    assert sink.stats()["write_errors"] == 2
+
+
+# ============================================================================
+# WRITER TESTS
+# ============================================================================
+
+def test_binary_stream_written_in_slices():
+    """Test payloads go to a binary buffer in chunk_size slices after the prefix"""
+    stream = BinaryStream()
+    writes = []
+    write = stream.buffer.write
+    stream.buffer.write = lambda data: writes.append(bytes(data)) or write(data)
+    BoundedStreamWriter(stream, chunk_size=4).write_record("[T] ", b"0123456789")
+
+    assert stream.buffer.getvalue() == b"[T] 0123456789\n"
+    assert writes[1:4] == [b"0123", b"4567", b"89"]
+
+
+def test_text_stream_decodes_split_characters():
+    """Test a multi-byte character split across slices is written whole to a text stream"""
+    stream = io.StringIO()
+    BoundedStreamWriter(stream, chunk_size=1).write_record("", "रुपये ₹".encode("utf-8"))
+
+    assert stream.getvalue() == "रुपये ₹\n"
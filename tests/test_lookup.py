@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Code Lookup and Indicator Search Tests
+Tests lookup_mospi_codes and the ranked matches returned by 2_get_indicators
+"""
+
+import pytest
+import pytest_asyncio
+from fastmcp import Client
+
+# Test Configuration - uses HTTP transport
+MCP_SERVER_URL = "http://localhost:8000/mcp"
+
+
+@pytest_asyncio.fixture
+async def client():
+    """Fixture for MCP client connection using HTTP transport"""
+    async with Client(MCP_SERVER_URL) as c:
+        yield c
+
+
+async def call_tool(client, tool_name, **params):
+    """Helper to call MCP tool and extract data"""
+    result = await client.call_tool(tool_name, params)
+    return result.data if hasattr(result, 'data') else result
+
+
+def assert_has_matches(response):
+    """Assert lookup response has at least one match"""
+    assert response is not None, "Response should not be None"
+    assert isinstance(response, dict), "Response should be a dict"
+    assert "error" not in response, f"Lookup returned error: {response.get('error')}"
+    assert len(response["matches"]) > 0, f"Should have matches: {response}"
+
+
+# ============================================================================
+# CODE LOOKUP TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_lookup_state_exact(client):
+    """Test looking up a PLFS state by name"""
+    result = await call_tool(client, "lookup_mospi_codes",
+                            dataset="PLFS", category="State", search_term="rajasthan")
+
+    assert_has_matches(result)
+    assert result["matches"][0]["label"].lower() == "rajasthan"
+
+
+@pytest.mark.asyncio
+async def test_lookup_state_typo(client):
+    """Test lookup tolerates typos"""
+    result = await call_tool(client, "lookup_mospi_codes",
+                            dataset="PLFS", category="State", search_term="rajsthan")
+
+    assert_has_matches(result)
+    assert result["matches"][0]["label"].lower() == "rajasthan"
+
+
+@pytest.mark.asyncio
+async def test_lookup_prefix(client):
+    """Test lookup by label prefix"""
+    result = await call_tool(client, "lookup_mospi_codes",
+                            dataset="CPI", category="state", search_term="kera")
+
+    assert_has_matches(result)
+    assert result["matches"][0]["match"] in ("prefix", "exact")
+
+
+@pytest.mark.asyncio
+async def test_lookup_list_category(client):
+    """Test listing every code in a category"""
+    result = await call_tool(client, "lookup_mospi_codes",
+                            dataset="PLFS", category="State")
+
+    assert_has_matches(result)
+    assert len(result["matches"]) >= 30, f"Should list 30+ states, got {len(result['matches'])}"
+
+
+@pytest.mark.asyncio
+async def test_lookup_unknown_dataset(client):
+    """Test lookup rejects unknown datasets"""
+    result = await call_tool(client, "lookup_mospi_codes",
+                            dataset="XYZ", search_term="rajasthan")
+
+    assert "error" in result
+    assert "valid_datasets" in result
+
+
+# ============================================================================
+# INDICATOR SEARCH TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_indicators_ranked_matches(client):
+    """Test 2_get_indicators ranks indicators against user_query"""
+    result = await call_tool(client, "2_get_indicators",
+                            dataset="PLFS", user_query="unemployment rate in Rajasthan")
+
+    assert "_ranked_matches" in result
+    matches = result["_ranked_matches"]
+    assert len(matches) > 0, "Should have ranked matches"
+    assert matches[0]["dataset"] == "PLFS"
+    assert "code" in matches[0]
+
+
+# ============================================================================
+# SUMMARY
+# ============================================================================
+# Total: 6 tests covering:
+# - Exact, prefix, typo and list lookups
+# - Unknown dataset handling
+# - Ranked indicator matches
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Metrics Tests
+Tests that a tool result is measured once by the server's middleware stack,
+in observability.metrics. Runs without a server.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from fastmcp.tools.tool import ToolResult
+
+from mospi.cache import ResultCache, ResultCacheMiddleware
+from mospi.deadline import DeadlineMiddleware
+from observability.metrics import MetricsMiddleware, response_size
+
+
+class CountingText(str):
+    encoded = 0
+
+    def encode(self, *args, **kwargs):
+        CountingText.encoded += 1
+        return super().encode(*args, **kwargs)
+
+
+def _result(text):
+    result = ToolResult(content="", structured_content={"data": []})
+    result.content = [SimpleNamespace(text=CountingText(text))]
+    return result
+
+
+# ============================================================================
+# RESPONSE SIZE TESTS
+# ============================================================================
+
+def test_size_measured_once_across_middlewares():
+    """Test metrics, deadline and cache middlewares in server order share one measurement"""
+    CountingText.encoded = 0
+    # Server order: Metrics > Deadline > ResultCache; Deadline runs the rest in its own task
+    stack = [MetricsMiddleware(), DeadlineMiddleware(),
+             ResultCacheMiddleware(cache=ResultCache(max_bytes=1 << 20), ttls={"4_get_data": 60})]
+    context = SimpleNamespace(message=SimpleNamespace(name="4_get_data", arguments={"dataset": "CPI"}))
+
+    async def tool(context):
+        return _result("x" * 100)
+
+    def chain(index):
+        if index == len(stack):
+            return tool
+        return lambda ctx: stack[index].on_call_tool(ctx, chain(index + 1))
+
+    result = asyncio.run(chain(0)(context))
+
+    assert CountingText.encoded == 1
+    assert response_size(result) == 100
+
+
+def test_new_result_is_measured():
+    """Test a different result is measured again"""
+    assert (response_size(_result("ab")), response_size(_result("abcd"))) == (2, 4)
+
+
+def test_replaced_content_is_measured():
+    """Test a result whose content was replaced after measuring is measured again"""
+    result = _result("abc")
+    response_size(result)
+    result.content = [SimpleNamespace(text="abcdef")]
+
+    assert response_size(result) == 6
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Record Normalization Tests
+Tests mospi.normalize on record shapes returned by the MoSPI getData endpoints.
+Runs without a server.
+"""
+
+import json
+
+import numpy as np
+
+from mospi.normalize import Table, normalize_result, parse_numbers
+
+
+def normalize(records):
+    return normalize_result({"statusCode": True, "data": records})
+
+
+# ============================================================================
+# NUMBER PARSING TESTS
+# ============================================================================
+
+def test_parse_numbers_formats():
+    """Test separators, units, status markers and placeholders"""
+    parsed = parse_numbers(np.array(["1,234.5", "12.3 (P)", "5.6%", "NA", "-", "Rs. 120 crore"], dtype=object))
+
+    assert parsed["number"][:3].tolist() == [1234.5, 12.3, 5.6]
+    assert parsed["status"][1] == "provisional"
+    assert parsed["unit"][2] == "%"
+    assert parsed["null"][3] and parsed["null"][4]
+    assert parsed["unit"][5] == "Rs. crore"
+    assert parsed["parsed"][[0, 1, 2, 5]].all()
+
+
+def test_parse_numbers_rejects_unknown_units():
+    """Test a trailing word that is not a unit does not parse"""
+    parsed = parse_numbers(np.array(["1 Rural", "2 Urban"], dtype=object))
+
+    assert not parsed["parsed"].any()
+
+
+def test_parse_numbers_rejects_leading_zeros():
+    """Test zero-padded codes stay text while zero and fractions parse"""
+    parsed = parse_numbers(np.array(["01", "007", "0", "0.5", "-0.25"], dtype=object))
+
+    assert parsed["parsed"].tolist() == [False, False, True, True, True]
+
+
+def test_parse_numbers_rejects_non_finite():
+    """Test overflowing values do not become inf"""
+    parsed = parse_numbers(np.array(["1e400", "-1e400"], dtype=object))
+
+    assert not parsed["parsed"].any()
+
+
+# ============================================================================
+# RECORD TESTS
+# ============================================================================
+
+def test_cpi_records():
+    """Test CPI index records get numeric measures and a monthly _period"""
+    result = normalize([
+        {"baseyear": "2012", "year": "2024", "month": "January", "state": "All India",
+         "sector": "Combined", "group": "General Index", "index": "190.2", "inflation": "5.1 (P)"},
+        {"baseyear": "2012", "year": "2024", "month": "February", "state": "All India",
+         "sector": "Combined", "group": "General Index", "index": "191.0", "inflation": "NA"},
+    ])
+
+    first, second = result["data"]
+    assert first["index"] == 190.2 and second["index"] == 191.0
+    assert first["inflation"] == 5.1 and first["inflation_status"] == "provisional"
+    assert second["inflation"] is None
+    assert first["baseyear"] == "2012"
+    assert first["_period"] == "2024-01"
+    assert result["_schema"]["inflation"]["nulls"] == 1
+
+
+def test_plfs_records_keep_categories():
+    """Test code-prefixed category labels in PLFS records are not parsed as numbers"""
+    result = normalize([
+        {"year": "2022-23", "state": "All India", "sector": "1 Rural", "gender": "1 male", "value": "55.4", "unit": "%"},
+        {"year": "2022-23", "state": "All India", "sector": "2 Urban", "gender": "1 male", "value": "50.1", "unit": "%"},
+    ])
+
+    first, second = result["data"]
+    assert first["sector"] == "1 Rural" and second["sector"] == "2 Urban"
+    assert "sector_unit" not in first
+    assert first["value"] == 55.4
+    assert first["_period"] == "2022-23"
+    assert set(result["_schema"]) == {"value"}
+
+
+def test_asi_records_keep_nic_codes():
+    """Test zero-padded NIC codes in ASI records keep their leading zeros"""
+    result = normalize([
+        {"year": "2019-20", "nic_2digit": "01", "nic_description": "Crop and animal production",
+         "indicator": "Number of Factories", "value": "1,234"},
+        {"year": "2019-20", "nic_2digit": "10", "nic_description": "Food products",
+         "indicator": "Number of Factories", "value": "38,012"},
+    ])
+
+    first, second = result["data"]
+    assert first["nic_2digit"] == "01" and second["nic_2digit"] == "10"
+    assert first["value"] == 1234 and result["_schema"]["value"]["type"] == "integer"
+
+
+def test_zero_padded_column_stays_text():
+    """Test a code column under an unrecognized name keeps its strings"""
+    records, schema = Table([{"item": "01"}, {"item": "02"}, {"item": "11"}]).to_records()
+
+    assert [r["item"] for r in records] == ["01", "02", "11"]
+    assert "item" not in schema
+
+
+def test_output_is_valid_json():
+    """Test overflowing values keep the response serializable as strict JSON"""
+    result = normalize([{"year": "2023", "value": "1e400"}, {"year": "2023", "value": "2"}])
+
+    json.dumps(result, allow_nan=False)
+    assert result["data"][0]["value"] == "1e400"
+
+
+def test_mixed_units_per_record():
+    """Test differing units stay on each record"""
+    result = normalize([{"year": "2023", "value": "12 crore"}, {"year": "2023", "value": "4 lakh"}])
+
+    assert [r["value_unit"] for r in result["data"]] == ["crore", "lakh"]
+    assert result["_schema"]["value"]["units"] == ["crore", "lakh"]
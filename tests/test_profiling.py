@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Profiling Tests
+Tests the sampling profiler, the profile store and the opt-in middleware in
+observability.profiling. Runs without a server.
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from observability import profiling
+from observability.profiling import PROFILE_ARGUMENT, ProfileStore, ProfilingMiddleware, SamplingProfiler
+
+
+def busy_tool(stop: threading.Event) -> None:
+    """Spins until stop is set, so the profiler has a stack to sample."""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def _context(arguments):
+    tool = SimpleNamespace(fn=busy_tool)
+    fastmcp = SimpleNamespace(get_tool=lambda name: asyncio.sleep(0, result=tool))
+    return SimpleNamespace(message=SimpleNamespace(name="busy", arguments=arguments),
+                           fastmcp_context=SimpleNamespace(fastmcp=fastmcp))
+
+
+# ============================================================================
+# PROFILER TESTS
+# ============================================================================
+
+def test_samples_only_target_threads():
+    """Test stacks running the target code are sampled and summarized, other threads are not"""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_tool, args=(stop,))
+    idle = threading.Thread(target=stop.wait)
+    worker.start()
+    idle.start()
+    profiler = SamplingProfiler({busy_tool.__code__}, interval=0.002)
+    profiler.start()
+    time.sleep(0.1)
+    profile = profiler.stop()
+    stop.set()
+    worker.join()
+    idle.join()
+
+    assert profile["samples"] > 0
+    assert all("busy_tool" in line for line in profile["collapsed"])
+    assert any("busy_tool" in entry["frame"] for entry in profile["top_cumulative"])
+    assert profile["collapsed"][0].rsplit(" ", 1)[1].isdigit()
+
+
+def test_stop_ends_sampling():
+    """Test no samples are added after stop() returns"""
+    profiler = SamplingProfiler({busy_tool.__code__}, interval=0.001)
+    profiler.start()
+    profile = profiler.stop()
+
+    assert not profiler._thread.is_alive()
+    assert profiler._samples == profile["samples"]
+
+
+# ============================================================================
+# STORE TESTS
+# ============================================================================
+
+def test_store_rotates_and_lists_newest_first():
+    """Test the store keeps the most recent profiles and lists them newest first"""
+    store = ProfileStore(size=2)
+    for i in range(3):
+        store.add({"id": str(i), "tool": "t", "started_at": i, "duration_ms": 1, "samples": 0, "collapsed": []})
+
+    assert [p["id"] for p in store.list()] == ["2", "1"]
+    assert store.get("0") is None
+    assert store.get("2")["collapsed"] == []
+
+
+# ============================================================================
+# MIDDLEWARE TESTS
+# ============================================================================
+
+def test_opted_in_call_profiled(monkeypatch):
+    """Test a call with _profile runs under the profiler, stores a profile and strips the argument"""
+    monkeypatch.setattr(profiling, "get_http_headers", lambda include_all: {})
+    store = ProfileStore()
+    middleware = ProfilingMiddleware(store=store, enabled=True)
+    arguments = {"dataset": "CPI", PROFILE_ARGUMENT: True}
+
+    async def call_next(context):
+        stop = threading.Event()
+        threading.Timer(0.05, stop.set).start()
+        await asyncio.to_thread(busy_tool, stop)
+        return "ok"
+
+    assert asyncio.run(middleware.on_call_tool(_context(arguments), call_next)) == "ok"
+    assert arguments == {"dataset": "CPI"}
+    profile, = store.list()
+    assert profile["tool"] == "busy" and profile["samples"] > 0
+
+
+def test_disabled_or_not_requested_not_profiled(monkeypatch):
+    """Test nothing is profiled when profiling is off or the call did not opt in"""
+    monkeypatch.setattr(profiling, "get_http_headers", lambda include_all: {})
+    store = ProfileStore()
+
+    async def call_next(context):
+        return "ok"
+
+    async def run():
+        await ProfilingMiddleware(store=store, enabled=False).on_call_tool(_context({PROFILE_ARGUMENT: True}), call_next)
+        await ProfilingMiddleware(store=store, enabled=True).on_call_tool(_context({}), call_next)
+
+    asyncio.run(run())
+    assert store.list() == []
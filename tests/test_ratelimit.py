@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Tests
+Tests the token buckets, the weighted fair queue and the per-dataset queue
+split in mospi.ratelimit. Runs without a server.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from mospi import scheduler
+from mospi import ratelimit
+from mospi.ratelimit import (
+    BucketTable, FairQueue, RateLimitMiddleware, TokenBucket, client_ip, parse_networks, queue_name,
+)
+from mospi.scheduler import BULK, INTERACTIVE
+
+
+# ============================================================================
+# TOKEN BUCKET TESTS
+# ============================================================================
+
+def test_token_bucket_refills():
+    """Test an empty bucket reports the wait until enough tokens exist"""
+    bucket = TokenBucket(rate=2.0, burst=4.0)
+
+    assert bucket.acquire(4.0, now=bucket.updated) == 0.0
+    assert bucket.acquire(1.0, now=bucket.updated) == 0.5
+    assert bucket.acquire(1.0, now=bucket.updated + 0.5) == 0.0
+
+
+def test_bucket_table_per_client():
+    """Test clients have separate buckets"""
+    table = BucketTable(rate=1.0, burst=2.0)
+
+    assert table.acquire("a", 2.0) == 0.0
+    assert table.acquire("a", 1.0) > 0
+    assert table.acquire("b", 2.0) == 0.0
+
+
+def test_bucket_table_disabled():
+    """Test a rate of 0 never limits"""
+    table = BucketTable(rate=0, burst=1)
+
+    assert all(table.acquire("client", 10.0) == 0.0 for _ in range(100))
+
+
+def test_anonymous_clients_skip_ip_bucket():
+    """Test calls without a client address or session are not limited by a shared bucket"""
+    middleware = RateLimitMiddleware(ip_buckets=BucketTable(rate=1.0, burst=1.0))
+    context = SimpleNamespace(message=SimpleNamespace(name="estimate_data", arguments={}), fastmcp_context=None)
+
+    async def call_next(context):
+        return "ok"
+
+    async def run():
+        return [await middleware.on_call_tool(context, call_next) for _ in range(10)]
+
+    assert asyncio.run(run()) == ["ok"] * 10
+
+
+def test_catalogue_tools_take_upstream_slots():
+    """Test lookups that may fetch metadata on a cold catalogue wait in their dataset's queue"""
+    middleware = RateLimitMiddleware()
+    held = {}
+
+    async def call_next(context):
+        held[context.message.name] = middleware.queue_for(queue_name(context.message.name, context.message.arguments)).active
+        return "ok"
+
+    async def run():
+        for tool, arguments in (("lookup_mospi_codes", {"dataset": "CPI"}), ("wpi_hierarchy", {}), ("estimate_data", {})):
+            context = SimpleNamespace(message=SimpleNamespace(name=tool, arguments=arguments), fastmcp_context=None)
+            await middleware.on_call_tool(context, call_next)
+
+    asyncio.run(run())
+
+    assert held == {"lookup_mospi_codes": 1, "wpi_hierarchy": 1, "estimate_data": 0}
+
+
+def test_rejected_call_charges_no_bucket(monkeypatch):
+    """Test a call rejected by the session bucket leaves the IP bucket untouched"""
+    ip_buckets = BucketTable(rate=0.001, burst=4.0)
+    session_buckets = BucketTable(rate=0.001, burst=2.0)
+    middleware = RateLimitMiddleware(ip_buckets=ip_buckets, session_buckets=session_buckets)
+    monkeypatch.setattr(ratelimit, "client_keys", lambda context: ("10.0.0.1", "s1"))
+    context = SimpleNamespace(message=SimpleNamespace(name="estimate_data", arguments={}), fastmcp_context=None)
+
+    async def call_next(context):
+        return "ok"
+
+    async def run():
+        session_buckets.acquire("s1", 2.0)
+        return await middleware.on_call_tool(context, call_next)
+
+    result = asyncio.run(run())
+
+    assert result.structured_content["reason"] == "session_quota"
+    assert ip_buckets.acquire("10.0.0.1", 4.0) == 0.0
+
+
+# ============================================================================
+# CLIENT ADDRESS TESTS
+# ============================================================================
+
+def test_forwarded_for_ignored_without_trusted_proxies():
+    """Test X-Forwarded-For cannot change the client address unless the peer is trusted"""
+    assert client_ip("203.0.113.5", "198.51.100.1", []) == "203.0.113.5"
+    assert client_ip("203.0.113.5", "198.51.100.1", parse_networks("10.0.0.0/8")) == "203.0.113.5"
+
+
+def test_right_most_untrusted_hop_used():
+    """Test behind trusted proxies the right-most untrusted hop is the client, whatever comes before it"""
+    proxies = parse_networks("10.0.0.0/8, 127.0.0.1, not-an-ip")
+
+    assert len(proxies) == 2
+    assert client_ip("10.0.0.2", "1.2.3.4, 198.51.100.1, 10.0.0.3", proxies) == "198.51.100.1"
+    assert client_ip("127.0.0.1", "", proxies) == "127.0.0.1"
+    assert client_ip(None, "198.51.100.1", proxies) is None
+
+
+# ============================================================================
+# FAIR QUEUE TESTS
+# ============================================================================
+
+def test_fair_queue_serves_light_client_first():
+    """Test a client with one queued call overtakes a client with many"""
+    async def scenario():
+        queue = FairQueue(slots=1, max_queue=10)
+        assert await queue.acquire("holder", 1.0)
+        order = []
+
+        async def call(client):
+            await queue.acquire(client, 1.0)
+            order.append(client)
+            queue.release(0.01)
+
+        tasks = [asyncio.create_task(call("flood")) for _ in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call("single")))
+        await asyncio.sleep(0)
+        queue.release(0.01)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()).index("single") <= 1
+
+
+def test_fair_queue_timeout():
+    """Test a waiter gives up after its timeout and leaves the queue"""
+    async def scenario():
+        queue = FairQueue(slots=1, max_queue=10)
+        await queue.acquire("a", 1.0)
+        granted = await queue.acquire("b", 1.0, timeout=0.05)
+        return granted, len(queue)
+
+    assert asyncio.run(scenario()) == (False, 0)
+
+
+def test_fair_queue_serves_interactive_before_bulk():
+    """Test a metadata call overtakes bulk calls queued before it"""
+    async def scenario():
+        queue = FairQueue(slots=1, max_queue=10)
+        assert await queue.acquire("holder", 1.0)
+        order = []
+
+        async def call(client, priority_class):
+            await queue.acquire(client, 1.0, priority_class=priority_class)
+            order.append(priority_class)
+            queue.release(0.01)
+
+        tasks = [asyncio.create_task(call(f"bulk{i}", BULK)) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call("meta", INTERACTIVE)))
+        await asyncio.sleep(0)
+        queue.release(0.01)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario())[0] == INTERACTIVE
+
+
+def test_fair_queue_ages_bulk_calls(monkeypatch):
+    """Test a bulk call that has waited long enough beats a fresh metadata call"""
+    monkeypatch.setattr(scheduler, "AGING_SECONDS", 0.01)
+
+    async def scenario():
+        queue = FairQueue(slots=1, max_queue=10)
+        assert await queue.acquire("holder", 1.0)
+        order = []
+
+        async def call(client, priority_class):
+            await queue.acquire(client, 1.0, priority_class=priority_class)
+            order.append(priority_class)
+            queue.release(0.01)
+
+        tasks = [asyncio.create_task(call("bulk", BULK))]
+        await asyncio.sleep(0.05)
+        tasks.append(asyncio.create_task(call("meta", INTERACTIVE)))
+        await asyncio.sleep(0)
+        queue.release(0.01)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario())[0] == BULK
+
+
+# ============================================================================
+# PER-DATASET QUEUE TESTS
+# ============================================================================
+
+def test_queue_name_by_dataset_family():
+    """Test calls are queued by dataset family"""
+    assert queue_name("4_get_data", {"dataset": "cpi_item"}) == "CPI"
+    assert queue_name("4_get_data", {"dataset": "ASI"}) == "ASI"
+    assert queue_name("get_wpi_subtree", {"nodes": ["x"]}) == "WPI"
+    assert queue_name("4_get_data", {"dataset": "nonsense"}) == "OTHER"
+    assert queue_name("4_get_data", None) == "OTHER"
+
+
+def test_slow_dataset_does_not_hold_other_queues():
+    """Test a saturated ASI queue leaves CPI calls a free slot"""
+    async def scenario():
+        limiter = RateLimitMiddleware(slots=2, max_queue=4)
+        asi = limiter.queue_for("ASI")
+        for _ in range(2):
+            assert await asi.acquire("client", 1.0)
+        return await limiter.queue_for("CPI").acquire("client", 1.0, timeout=0.01)
+
+    assert asyncio.run(scenario()) is True
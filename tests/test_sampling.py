@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Telemetry Sampling Tests
+Tests the tail-based sampling policy in observability.sampling and that
+TelemetryMiddleware keeps the [TELEMETRY] log line for dropped calls.
+Runs without a server.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from fastmcp.tools.tool import ToolResult
+
+from observability.sampling import DROP_SAMPLED, KEEP_ERROR, KEEP_SLOW, SamplingPolicy
+from observability.telemetry import TelemetryMiddleware
+
+
+class RecordingSink:
+    def __init__(self):
+        self.records = []
+
+    def submit(self, prefix, payload):
+        self.records.append((prefix, payload))
+
+
+# ============================================================================
+# POLICY TESTS
+# ============================================================================
+
+def test_errors_and_slow_calls_kept():
+    """Test errors and slow calls are kept even at a rate of 0"""
+    policy = SamplingPolicy(rate=0.0, slow_ms=100)
+
+    assert policy.decide("t", True, 1, 10) == (True, KEEP_ERROR)
+    assert policy.decide("t", False, 150, 10) == (True, KEEP_SLOW)
+    assert policy.decide("t", False, 1, 10) == (False, DROP_SAMPLED)
+
+
+def test_size_does_not_drop_by_default():
+    """Test large outputs are kept at the default rate unless sample_bytes is set"""
+    assert SamplingPolicy().decide("t", False, 1, 10 * 1024 * 1024)[0]
+    assert not SamplingPolicy(sample_bytes=1024).decide("t", False, 1, 1 << 60)[0]
+
+
+def test_tool_overrides_from_env(monkeypatch):
+    """Test per-tool rates and slow thresholds are read from the environment"""
+    monkeypatch.setenv("MOSPI_TELEMETRY_TOOL_RATES", "4_get_data=0.1,bad")
+    monkeypatch.setenv("MOSPI_TELEMETRY_TOOL_SLOW_MS", "4_get_data=500,get_long_series=10000")
+    policy = SamplingPolicy.from_env()
+
+    assert policy.settings_for("4_get_data") == (0.1, 500)
+    assert policy.settings_for("get_long_series") == (1.0, 10000)
+    assert policy.settings_for("3_get_metadata") == (1.0, 2000)
+
+
+# ============================================================================
+# MIDDLEWARE TESTS
+# ============================================================================
+
+def test_dropped_call_still_logged():
+    """Test a call dropped by sampling still writes its output log line"""
+    middleware = TelemetryMiddleware(sampling=SamplingPolicy(rate=0.0))
+    sink = RecordingSink()
+    middleware._log_sink = sink
+    context = SimpleNamespace(
+        message=SimpleNamespace(name="4_get_data", arguments={"dataset": "CPI"}), fastmcp_context=None)
+
+    async def call_next(context):
+        return ToolResult(content="ok", structured_content={"data": [1, 2]})
+
+    asyncio.run(middleware.on_call_tool(context, call_next))
+
+    assert len(sink.records) == 1
+    assert sink.records[0][0].startswith("[TELEMETRY] Output")
+    assert b'"data": [1, 2]' in sink.records[0][1]
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Series Stitching Tests
+Tests request planning and overlap linking across base years in
+mospi.stitch, and how get_long_series pages each piece. Runs without a server.
+"""
+
+import mospi_server
+from mospi.stitch import dimension_key, link_segments, plan_requests
+
+FILTERS = {"state_code": "99", "series": "Current"}
+
+
+def _cpi(base, years, index, label="Cereals and products", code="1.1.01"):
+    return [
+        {"base_year": base, "year": str(y), "group_code": code, "group": label, "sector": "Rural", "index": str(i)}
+        for y, i in zip(years, index)
+    ]
+
+
+# ============================================================================
+# PLANNING TESTS
+# ============================================================================
+
+def test_plan_covers_overlap_in_both_segments():
+    """Test overlapping base years both request the overlap years"""
+    plans = plan_requests("CPI", {"state_code": "99"}, 2011, 2016)
+
+    assert [(p["base_year"], p["year"]) for p in plans] == [
+        ("2010", "2011,2012,2013,2014"), ("2012", "2013,2014,2015,2016")]
+
+
+# ============================================================================
+# LINKING TESTS
+# ============================================================================
+
+def test_relabelled_series_linked_by_code():
+    """Test a series whose label changed between base years stays one group"""
+    old = _cpi("2010", (2012, 2013, 2014), (100, 110, 120))
+    new = _cpi("2012", (2013, 2014, 2015), (220, 240, 260), label="Cereals & products")
+    result = link_segments([("2010", old), ("2012", new)])
+
+    assert len({dimension_key(r, ["index"]) for r in old + new}) == 1
+    assert result["links"][0]["groups_linked"] == 1
+    assert result["links"][0]["mean_factor"] == 2.0
+    assert [r["index"] for r in result["data"]] == [200.0, 220.0, 240.0, 260.0]
+
+
+def test_labels_without_codes_still_split_groups():
+    """Test label-only dimensions (sector) keep their series apart"""
+    records = _cpi("2012", (2013,), (100,)) + [dict(r, sector="Urban", index="90") for r in _cpi("2012", (2013,), (0,))]
+    result = link_segments([("2012", records)])
+
+    assert sorted(r["index"] for r in result["data"]) == [90.0, 100.0]
+    assert "collisions" not in result
+
+
+def test_collisions_reported():
+    """Test records sharing a group and period in one segment are reported, first one kept"""
+    records = _cpi("2012", (2013, 2014), (100, 110)) + _cpi("2012", (2013,), (999,))
+    result = link_segments([("2012", records)])
+
+    assert result["collisions"]["count"] == 1
+    assert result["collisions"]["examples"][0]["ignored"] == "999"
+    assert [r["index"] for r in result["data"]] == [100.0, 110.0]
+
+
+# ============================================================================
+# LONG SERIES TESTS
+# ============================================================================
+
+def _long_series(monkeypatch, total, max_pages=20):
+    """Run get_long_series for CPI 2010-2016 against pages of 2 records; returns (result, calls)."""
+    calls = []
+
+    def get_data_many(requests):
+        calls.extend(requests)
+        responses = []
+        for _, filters in requests:
+            first = (int(filters["page"]) - 1) * 2
+            years = range(2011 + first, 2011 + min(first + 2, total))
+            records = _cpi(filters["base_year"], years, [100 + y - 2011 for y in years])
+            responses.append({"data": records, "statusCode": True, "meta_data": {"totalRecords": total}})
+        return responses
+
+    monkeypatch.setattr(mospi_server.mospi, "get_data_many", get_data_many)
+    monkeypatch.setattr(mospi_server, "LONG_SERIES_MAX_PAGES", max_pages)
+    tool = getattr(mospi_server.get_long_series, "fn", mospi_server.get_long_series)
+    return tool(dataset="CPI", filters={**FILTERS, "limit": "2"}, start_year=2010, end_year=2016), calls
+
+
+def test_long_series_pages_until_total(monkeypatch):
+    """Test each base year piece is paged until totalRecords instead of stopping at one page"""
+    result, calls = _long_series(monkeypatch, total=5)
+
+    assert sorted(f["page"] for _, f in calls) == ["1", "1", "2", "2", "3", "3"]
+    assert "truncated" not in result
+    assert "limit" not in result["requests"][0]
+
+
+def test_long_series_reports_truncated_pieces(monkeypatch):
+    """Test a piece still unfinished at the page cap is listed under truncated"""
+    result, _ = _long_series(monkeypatch, total=5, max_pages=2)
+
+    assert result["truncated"] == [
+        {"base_year": "2010", "records": 4, "total_records": 5, "next_page": 3},
+        {"base_year": "2012", "records": 4, "total_records": 5, "next_page": 3},
+    ]
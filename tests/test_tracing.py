@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tracing Tests
+Tests detail levels, span recording and the no-op paths of
+observability.tracing, and the request size the client reports on upstream
+spans. Runs without a server.
+"""
+
+import pytest
+import requests
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from mospi.client import request_size
+from observability import tracing
+from observability.tracing import TRACE_CALLS, TRACE_PHASES, enabled, parse_detail, phase, set_trace_detail
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    """Spans of tracing._tracer recorded in memory, at the current detail level."""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "_tracer", provider.get_tracer("test"))
+    monkeypatch.setattr(tracing, "TRACE_DETAIL", tracing.TRACE_DETAIL)
+    return exporter
+
+
+# ============================================================================
+# LEVEL TESTS
+# ============================================================================
+
+def test_parse_detail():
+    """Test names and numbers map to levels, clamped, with unknown values turning tracing off"""
+    assert parse_detail("phases") == TRACE_PHASES
+    assert parse_detail(" Calls ") == TRACE_CALLS
+    assert parse_detail("7") == TRACE_PHASES
+    assert parse_detail("verbose") == tracing.TRACE_OFF
+
+
+def test_set_trace_detail_at_runtime(monkeypatch):
+    """Test the level can be changed while running and enabled() follows it"""
+    monkeypatch.setattr(tracing, "TRACE_DETAIL", tracing.TRACE_OFF)
+    assert not enabled()
+    set_trace_detail("calls")
+    assert enabled(TRACE_CALLS) and not enabled(TRACE_PHASES)
+
+
+# ============================================================================
+# SPAN TESTS
+# ============================================================================
+
+def test_spans_recorded_up_to_level(exporter):
+    """Test phases at or below the detail level become spans with their attributes"""
+    set_trace_detail("calls")
+    with phase("mospi.validate", TRACE_CALLS, **{"mospi.dataset": "CPI"}) as span:
+        span.set("mospi.filter_count", 3)
+        with phase("mospi.http.download", TRACE_PHASES) as inner:
+            inner.set("http.response_body_size", 10)
+
+    span, = exporter.get_finished_spans()
+    assert span.name == "mospi.validate"
+    assert dict(span.attributes) == {"mospi.dataset": "CPI", "mospi.filter_count": 3}
+
+
+def test_off_returns_shared_noop(exporter):
+    """Test disabled phases record nothing and allocate no span"""
+    set_trace_detail("off")
+    first = phase("a", TRACE_CALLS)
+    with first as span:
+        span.set("ignored", 1)
+
+    assert first is phase("b", TRACE_PHASES)
+    assert exporter.get_finished_spans() == ()
+
+
+def test_enabled_without_exporter(monkeypatch):
+    """Test enabled phases work against the default tracer when no SDK or exporter is configured"""
+    monkeypatch.setattr(tracing, "TRACE_DETAIL", TRACE_PHASES)
+    with phase("mospi.http.decode", TRACE_PHASES) as span:
+        span.set("mospi.records", 1)
+
+
+def test_exception_recorded_and_raised(exporter):
+    """Test an exception inside a phase propagates and marks the span as an error"""
+    set_trace_detail("calls")
+    with pytest.raises(ValueError):
+        with phase("mospi.decode"):
+            raise ValueError("bad json")
+
+    span, = exporter.get_finished_spans()
+    assert not span.status.is_ok
+
+
+# ============================================================================
+# REQUEST SIZE TESTS
+# ============================================================================
+
+def test_request_size_counts_line_headers_and_body():
+    """Test the request size matches the HTTP/1.1 bytes: request line, headers with Host, body"""
+    request = requests.Request("POST", "https://api.example.org/api/cpi/getCPIIndex?year=2023",
+                               headers={"Accept": "application/json"}, data=b"abc").prepare()
+    expected = (
+        "POST /api/cpi/getCPIIndex?year=2023 HTTP/1.1\r\n"
+        + "".join(f"{name}: {value}\r\n" for name, value in request.headers.items())
+        + "Host: api.example.org\r\n\r\nabc"
+    )
+
+    assert request_size(request) == len(expected)
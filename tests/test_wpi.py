@@ -199,10 +199,47 @@ async def test_wpi_data_combined_filters(client):
     assert "data" in result
 
 
+# ============================================================================
+# WPI HIERARCHY TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_wpi_hierarchy_major_groups(client):
+    """Test WPI hierarchy lists major groups at the root"""
+    result = await call_tool(client, "wpi_hierarchy")
+
+    assert "children" in result, f"Should list major groups: {result}"
+    assert len(result["children"]) >= 3, "Should have 3+ major groups"
+    assert all(c["level"] == "major_group" for c in result["children"])
+
+
+@pytest.mark.asyncio
+async def test_wpi_hierarchy_items_under_major_group(client):
+    """Test resolving a major group to all its item codes"""
+    result = await call_tool(client, "wpi_hierarchy",
+                            node="Manufactured products", view="items")
+
+    assert "item_codes" in result, f"Should return item codes: {result}"
+    assert len(result["item_codes"]) >= 100, "Manufactured products should have 100+ items"
+
+
+@pytest.mark.asyncio
+async def test_wpi_subtree_single_request(client):
+    """Test a whole-group subtree fetch plans a single upstream request"""
+    result = await call_tool(client, "get_wpi_subtree",
+                            nodes=["1000000000"],
+                            filters={"year": "2023"})
+
+    assert_valid_api_response(result)
+    assert len(result["requests"]) == 1
+    assert result["requests"][0]["major_group_code"] == "1000000000"
+
+
 # ============================================================================
 # SUMMARY
 # ============================================================================
-# Total: 13 tests covering:
+# Total: 16 tests covering:
 # - Metadata endpoint (hierarchical structure)
 # - Data endpoint (various filters)
 # - Pagination and format options
+# - Hierarchy navigation and subtree fetch
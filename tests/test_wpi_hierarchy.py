@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+WPI Hierarchy Tests
+Tests the minimal cover and request planning of mospi.wpi, and the internal
+paging of get_wpi_subtree (mospi_server.fetch_wpi_levels) against a stubbed
+upstream. Runs without a server.
+"""
+
+import pytest
+
+import mospi_server
+from mospi.wpi import WpiHierarchy
+
+PAYLOAD = {
+    "major_group": [{"major_group_code": "1000000000", "major_group_name": "Primary articles"}],
+    "group": [
+        {"group_code": "1010000000", "group_name": "Food articles"},
+        {"group_code": "1020000000", "group_name": "Minerals"},
+    ],
+    "item": [
+        {"item_code": "1010000001", "item_name": "Rice"},
+        {"item_code": "1010000002", "item_name": "Wheat"},
+        {"item_code": "1020000001", "item_name": "Coal"},
+    ],
+}
+
+
+@pytest.fixture
+def tree():
+    tree = WpiHierarchy()
+    tree.build(PAYLOAD)
+    return tree
+
+
+def _page(records, total=None):
+    response = {"data": records, "statusCode": True}
+    if total is not None:
+        response["meta_data"] = {"totalRecords": total}
+    return response
+
+
+# ============================================================================
+# COVER TESTS
+# ============================================================================
+
+def test_cover_drops_nodes_under_selected_ancestor(tree):
+    """Test an item is dropped when its group is also selected"""
+    assert tree.minimal_cover(["1010000001", "1010000000"]) == ["1010000000"]
+
+
+def test_cover_rolls_complete_siblings_up(tree):
+    """Test selecting every item of a group becomes the group, and every group the major group"""
+    assert tree.minimal_cover(["1010000001", "1010000002"]) == ["1010000000"]
+    assert tree.minimal_cover(["1010000001", "1010000002", "1020000001"]) == ["1000000000"]
+
+
+def test_cover_ignores_unknown_codes(tree):
+    """Test codes missing from the tree are left out"""
+    assert tree.minimal_cover(["1010000001", "9999999999"]) == ["1010000001"]
+
+
+def test_plan_one_request_per_level(tree):
+    """Test the cover is fetched with one comma-joined request per level"""
+    assert tree.plan_requests(["1010000001", "1020000000"]) == [
+        {"group_code": "1020000000"}, {"item_code": "1010000001"}]
+
+
+# ============================================================================
+# PAGING TESTS
+# ============================================================================
+
+def test_levels_paged_until_total(monkeypatch):
+    """Test a level is paged until totalRecords while a short level stops after page 1"""
+    monkeypatch.setattr(mospi_server, "WPI_SUBTREE_PAGE_SIZE", "2")
+    calls = []
+
+    def get_data_many(requests):
+        calls.append(requests)
+        responses = []
+        for _, filters in requests:
+            if "group_code" in filters:
+                responses.append(_page([{"page": filters["page"]}] * 2, total=5)
+                                 if filters["page"] != "3" else _page([{"page": "3"}], total=5))
+            else:
+                responses.append(_page([{"item": 1}], total=1))
+        return responses
+
+    monkeypatch.setattr(mospi_server.mospi, "get_data_many", get_data_many)
+    records, errors, truncated = mospi_server.fetch_wpi_levels([{"group_code": "1"}, {"item_code": "2"}])
+
+    assert [len(c) for c in calls] == [2, 1, 1]
+    assert len(records) == 6
+    assert errors == [] and truncated == []
+
+
+def test_level_truncated_at_max_pages(monkeypatch):
+    """Test a level still full after WPI_SUBTREE_MAX_PAGES is reported with its next page"""
+    monkeypatch.setattr(mospi_server, "WPI_SUBTREE_PAGE_SIZE", "1")
+    monkeypatch.setattr(mospi_server, "WPI_SUBTREE_MAX_PAGES", 2)
+    monkeypatch.setattr(mospi_server.mospi, "get_data_many",
+                        lambda requests: [_page([{"x": 1}], total=10) for _ in requests])
+
+    records, errors, truncated = mospi_server.fetch_wpi_levels([{"group_code": "1"}])
+
+    assert len(records) == 2
+    assert truncated == [{"filters": {"group_code": "1"}, "records": 2, "total_records": 10, "next_page": 3}]
+
+
+def test_level_error_reported(monkeypatch):
+    """Test an upstream error stops that level and is reported with its page"""
+    monkeypatch.setattr(mospi_server.mospi, "get_data_many", lambda requests: [{"error": "timeout"}])
+
+    records, errors, truncated = mospi_server.fetch_wpi_levels([{"group_code": "1"}])
+
+    assert records == []
+    assert errors == [{"filters": {"group_code": "1"}, "page": 1, "error": "timeout"}]
+
+
+def test_subtree_rejects_paging_filters(monkeypatch):
+    """Test get_wpi_subtree refuses limit/page since it pages internally"""
+    monkeypatch.setattr(mospi_server.catalogue, "ensure", lambda *args, **kwargs: None)
+    tool = getattr(mospi_server.get_wpi_subtree, "fn", mospi_server.get_wpi_subtree)
+    result = tool(nodes=["1000000000"], filters={"year": "2023", "limit": "10"})
+
+    assert "limit" in result["error"]